@@ -0,0 +1,202 @@
+"""
+Jazmín OS - Agent Monitor
+==========================
+Contabilidad de recursos por corrida de agente: se engancha al PID (o al
+cgroup) de una corrida, muestrea todo el árbol de procesos y al terminar
+guarda un resumen compacto en agent_run_resources.
+"""
+
+import asyncio
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import psutil
+
+import config
+from db_executor import DBExecutor
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+
+RESOURCE_FIELDS = ("cpu_peak", "cpu_avg", "rss_peak", "read_bytes", "write_bytes", "ctx_switches", "procs_peak")
+
+
+class RunMonitor:
+    """Muestrea el árbol de procesos de una corrida y acumula pico/promedio/totales."""
+
+    def __init__(self, run_id: int, agent_name: str, pid: Optional[int] = None,
+                 cgroup: Optional[str] = None, interval: float = config.AGENT_MONITOR_INTERVAL):
+        if pid is None and cgroup is None:
+            raise ValueError("se necesita pid o cgroup")
+        self.run_id = run_id
+        self.agent_name = agent_name
+        self.pid = pid
+        self.cgroup = cgroup
+        self.interval = interval
+        self.started_at = datetime.now().isoformat()
+        self.samples = 0
+        self.cpu_peak = 0.0
+        self.rss_peak = 0
+        self.procs_peak = 0
+        self._cpu_sum = 0.0
+        self._procs: Dict[int, psutil.Process] = {}
+        # Últimos contadores vistos por pid: los de procesos que ya terminaron siguen sumando
+        self._io: Dict[int, tuple] = {}
+        self._ctx: Dict[int, int] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def _pids(self) -> List[int]:
+        if self.cgroup is not None:
+            procs_file = CGROUP_ROOT / self.cgroup.lstrip("/") / "cgroup.procs"
+            try:
+                return [int(line) for line in procs_file.read_text().split()]
+            except (OSError, ValueError):
+                return []
+        try:
+            root = self._procs.get(self.pid) or psutil.Process(self.pid)
+            return [root.pid] + [child.pid for child in root.children(recursive=True)]
+        except psutil.NoSuchProcess:
+            return []
+
+    def sample(self) -> int:
+        """Toma una muestra del árbol (bloqueante). Devuelve cuántos procesos vivos hay."""
+        cpu = 0.0
+        rss = 0
+        alive = 0
+        for pid in self._pids():
+            proc = self._procs.get(pid)
+            try:
+                if proc is None:
+                    proc = self._procs[pid] = psutil.Process(pid)
+                    proc.cpu_percent(None)  # referencia; cuenta desde la próxima muestra
+                with proc.oneshot():
+                    cpu += proc.cpu_percent(None)
+                    rss += proc.memory_info().rss
+                    ctx = proc.num_ctx_switches()
+                    self._ctx[pid] = ctx.voluntary + ctx.involuntary
+                    try:
+                        io = proc.io_counters()
+                        self._io[pid] = (io.read_bytes, io.write_bytes)
+                    except (psutil.AccessDenied, AttributeError):
+                        pass
+                alive += 1
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                self._procs.pop(pid, None)
+
+        if alive:
+            self.samples += 1
+            self._cpu_sum += cpu
+            self.cpu_peak = max(self.cpu_peak, cpu)
+            self.rss_peak = max(self.rss_peak, rss)
+            self.procs_peak = max(self.procs_peak, alive)
+        return alive
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "run_id": self.run_id,
+            "agent_name": self.agent_name,
+            "started_at": self.started_at,
+            "samples": self.samples,
+            "cpu_peak": round(self.cpu_peak, 1),
+            "cpu_avg": round(self._cpu_sum / self.samples, 1) if self.samples else 0.0,
+            "rss_peak": self.rss_peak,
+            "read_bytes": sum(read for read, _ in self._io.values()),
+            "write_bytes": sum(write for _, write in self._io.values()),
+            "ctx_switches": sum(self._ctx.values()),
+            "procs_peak": self.procs_peak,
+        }
+
+    async def run(self):
+        """Muestrea hasta que el árbol termina (o se cancela la tarea)."""
+        seen = False
+        while True:
+            alive = await asyncio.to_thread(self.sample)
+            if alive:
+                seen = True
+            elif seen or self.pid is not None:
+                return
+            await asyncio.sleep(self.interval)
+
+
+def _save_summary(conn: sqlite3.Connection, summary: Dict[str, Any]):
+    columns = ("run_id", "agent_name", "started_at", "samples") + RESOURCE_FIELDS
+    conn.execute(f'''
+        INSERT OR REPLACE INTO agent_run_resources ({", ".join(columns)})
+        VALUES ({", ".join("?" for _ in columns)})
+    ''', tuple(summary[column] for column in columns))
+
+
+class ResourceMonitor:
+    """Administra los RunMonitor activos y persiste su resumen al terminar."""
+
+    def __init__(self, db: DBExecutor):
+        self.db = db
+        self.monitors: Dict[int, RunMonitor] = {}
+        self._tasks: Dict[int, asyncio.Task] = {}
+
+    def attach(self, run_id: int, agent_name: str, pid: Optional[int] = None,
+               cgroup: Optional[str] = None, interval: Optional[float] = None) -> RunMonitor:
+        """Empieza a monitorear una corrida. Si ya estaba monitoreada, devuelve el monitor existente."""
+        if run_id in self.monitors:
+            return self.monitors[run_id]
+        monitor = RunMonitor(run_id, agent_name, pid, cgroup, interval or config.AGENT_MONITOR_INTERVAL)
+        self.monitors[run_id] = monitor
+        self._tasks[run_id] = asyncio.create_task(self._watch(monitor))
+        return monitor
+
+    async def _watch(self, monitor: RunMonitor):
+        try:
+            await monitor.run()
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            print(f"[Monitor] Error monitoreando corrida {monitor.run_id}: {e}")
+        finally:
+            self.monitors.pop(monitor.run_id, None)
+            self._tasks.pop(monitor.run_id, None)
+            try:
+                await self.db.write(_save_summary, monitor.summary())
+            except Exception as e:
+                print(f"[Monitor] Error guardando recursos de la corrida {monitor.run_id}: {e}")
+
+    async def detach(self, run_id: int):
+        """Deja de monitorear una corrida y guarda lo acumulado."""
+        task = self._tasks.get(run_id)
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def stop(self):
+        """Detiene todos los monitores (llamar desde el shutdown de la app)."""
+        for run_id in list(self._tasks):
+            await self.detach(run_id)
+
+    async def get(self, run_id: int) -> Optional[Dict[str, Any]]:
+        """Resumen de una corrida: en vivo si sigue activa, si no el guardado."""
+        monitor = self.monitors.get(run_id)
+        if monitor is not None:
+            return {**monitor.summary(), "active": True}
+        row = await self.db.fetchone("SELECT * FROM agent_run_resources WHERE run_id = ?", (run_id,))
+        return {**row, "active": False} if row else None
+
+    async def compare(self, agent_name: str, limit: int = 20) -> Dict[str, Any]:
+        """Recursos de las últimas corridas de un agente, con promedio y máximo de cada métrica."""
+        runs = await self.db.fetchall('''
+            SELECT r.run_id, r.started_at, r.samples, r.cpu_peak, r.cpu_avg, r.rss_peak,
+                   r.read_bytes, r.write_bytes, r.ctx_switches, r.procs_peak,
+                   a.status, a.execution_time_ms
+            FROM agent_run_resources r
+            LEFT JOIN agent_runs a ON a.id = r.run_id
+            WHERE r.agent_name = ?
+            ORDER BY r.started_at DESC
+            LIMIT ?
+        ''', (agent_name, limit))
+        stats = {}
+        for field in RESOURCE_FIELDS:
+            values = [run[field] for run in runs if run[field] is not None]
+            stats[field] = {
+                "avg": round(sum(values) / len(values), 1) if values else None,
+                "max": max(values) if values else None,
+            }
+        return {"agent_name": agent_name, "runs": runs, "stats": stats}
@@ -0,0 +1,13 @@
+"""
+Jazmín OS - Benchmarks
+=======================
+Carga HTTP/WebSocket y micro-benchmarks contra una instancia en proceso
+sobre bases temporales (nunca toca data/ ni jazmin_os.db).
+
+    python -m benchmarks                          # corre todo, JSON por stdout
+    python -m benchmarks --output bench.json --save-baseline
+    python -m benchmarks --baseline benchmarks/baseline.json --tolerance 0.25
+
+Con --baseline sale con código 1 si alguna métrica empeoró más que la
+tolerancia. Ver `python -m benchmarks --help` para tamaños y concurrencia.
+"""
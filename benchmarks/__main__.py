@@ -0,0 +1,114 @@
+"""
+Jazmín OS - Benchmarks CLI
+===========================
+python -m benchmarks [--scenarios system,logs,...] [--baseline archivo] ...
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks import load, micro
+from benchmarks.report import compare
+from benchmarks.server import BenchServer
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmarks de Jazmín OS")
+    parser.add_argument("--logs", type=int, default=10000, help="logs sembrados")
+    parser.add_argument("--runs", type=int, default=2000, help="corridas sembradas")
+    parser.add_argument("--metrics", type=int, default=5000, help="muestras de system_metrics sembradas")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--scenarios", default=",".join(load.SCENARIOS),
+                        help=f"escenarios HTTP separados por coma ({', '.join(load.SCENARIOS)})")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=5, help="segundos por escenario HTTP")
+    parser.add_argument("--warmup", type=float, default=0.5, help="segundos de calentamiento por escenario")
+    parser.add_argument("--ws-clients", type=int, default=50)
+    parser.add_argument("--ws-messages", type=int, default=500)
+    parser.add_argument("--micro-iterations", type=int, default=2000)
+    parser.add_argument("--skip-http", action="store_true")
+    parser.add_argument("--skip-ws", action="store_true")
+    parser.add_argument("--skip-micro", action="store_true")
+    parser.add_argument("--output", help="archivo JSON del reporte (por defecto stdout)")
+    parser.add_argument("--baseline", nargs="?", const=str(DEFAULT_BASELINE),
+                        help="compara contra este reporte y sale con 1 si hay regresiones")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="empeoramiento tolerado (0.25 = 25%%)")
+    parser.add_argument("--save-baseline", nargs="?", const=str(DEFAULT_BASELINE),
+                        help="guarda el reporte como baseline")
+    args = parser.parse_args(argv)
+    unknown = set(filter(None, args.scenarios.split(","))) - set(load.SCENARIOS)
+    if unknown:
+        parser.error(f"escenarios desconocidos: {', '.join(sorted(unknown))}")
+    return args
+
+
+async def run(args: argparse.Namespace, server: BenchServer) -> dict:
+    report = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "seeded": server.seeded,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+        },
+    }
+    if not args.skip_http:
+        report["http"] = {}
+        for name in filter(None, args.scenarios.split(",")):
+            report["http"][name] = await load.http_scenario(server.base_url, name, args.concurrency,
+                                                            args.duration, args.warmup)
+            print(f"[Bench] {name}: {report['http'][name]['rps']} req/s, "
+                  f"p95 {report['http'][name]['p95_ms']} ms", file=sys.stderr)
+    if not args.skip_ws:
+        report["ws"] = await load.ws_broadcast(server.base_url, server.ws_url, args.ws_clients, args.ws_messages)
+        print(f"[Bench] ws: {report['ws']['delivered']}/{report['ws']['expected']} entregados, "
+              f"p95 {report['ws']['p95_ms']} ms", file=sys.stderr)
+    if not args.skip_micro:
+        report["micro"] = {**await micro.database_helpers(args.micro_iterations),
+                           **await micro.broadcast(args.micro_iterations)}
+        for name, result in report["micro"].items():
+            print(f"[Bench] {name}: p50 {result['p50_us']} µs", file=sys.stderr)
+    return report
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    # Los prints de la app van a stderr: stdout queda solo para el JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        with BenchServer(args.logs, args.runs, args.metrics, args.seed) as server:
+            report = asyncio.run(run(args, server))
+
+    status = 0
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        report["regressions"] = compare(report, baseline, args.tolerance)
+        for regression in report["regressions"]:
+            print(f"[Bench] REGRESIÓN {regression['section']}/{regression['name']} {regression['metric']}: "
+                  f"{regression['baseline']} -> {regression['current']} ({regression['change']:+.1%})",
+                  file=sys.stderr)
+        status = 1 if report["regressions"] else 0
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text)
+    else:
+        print(text)
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(text)
+        print(f"[Bench] Baseline guardado en {args.save_baseline}", file=sys.stderr)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""
+Jazmín OS - Load Generator
+===========================
+Carga HTTP en lazo cerrado (N workers concurrentes durante D segundos por
+escenario) y fan-out de WebSocket: K clientes suscriptos a logs mientras se
+publican logs por POST; la latencia es publicación -> recepción en cada
+cliente (mismo proceso, mismo reloj).
+"""
+
+import asyncio
+import itertools
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+import websockets
+
+from benchmarks.report import latency_summary
+
+_counter = itertools.count()
+
+
+def _log_body() -> Dict[str, Any]:
+    return {"agent_name": "bench", "level": "info", "message": f"bench {next(_counter)}"}
+
+
+# nombre -> (método, ruta, generador de body)
+SCENARIOS: Dict[str, Tuple[str, str, Optional[Callable[[], Dict[str, Any]]]]] = {
+    "system": ("GET", "/api/system", None),
+    "dashboard": ("GET", "/api/dashboard", None),
+    "logs": ("GET", "/api/logs?limit=50", None),
+    "logs_filtered": ("GET", "/api/logs?limit=50&level=error&agent=crawler", None),
+    "logs_search": ("GET", "/api/logs/search?q=procesado&limit=20", None),
+    "post_log": ("POST", "/api/logs", _log_body),
+    "runs": ("GET", "/api/runs?limit=50", None),
+    "runs_stats": ("GET", "/api/runs/stats?since=7d", None),
+    "metrics_history": ("GET", "/api/metrics/history?range=24h&step=5m", None),
+}
+
+
+async def _worker(client: httpx.AsyncClient, method: str, path: str,
+                  body: Optional[Callable[[], Dict[str, Any]]], deadline: float,
+                  latencies: Optional[List[float]], errors: List[str]):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, path, json=body() if body else None)
+            ok = response.status_code < 400
+            if not ok:
+                errors.append(str(response.status_code))
+        except httpx.HTTPError as e:
+            ok = False
+            errors.append(type(e).__name__)
+        if ok and latencies is not None:
+            latencies.append(time.perf_counter() - start)
+
+
+async def http_scenario(base_url: str, name: str, concurrency: int, duration: float,
+                        warmup: float = 0.5) -> Dict[str, Any]:
+    """Corre un escenario de SCENARIOS y devuelve throughput y percentiles."""
+    method, path, body = SCENARIOS[name]
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        if warmup > 0:
+            deadline = time.perf_counter() + warmup
+            await asyncio.gather(*(_worker(client, method, path, body, deadline, None, [])
+                                   for _ in range(concurrency)))
+        latencies: List[float] = []
+        errors: List[str] = []
+        start = time.perf_counter()
+        deadline = start + duration
+        await asyncio.gather(*(_worker(client, method, path, body, deadline, latencies, errors)
+                               for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return {"method": method, "path": path, "concurrency": concurrency,
+            "errors": len(errors), **latency_summary(latencies, elapsed)}
+
+
+async def _ws_client(url: str, ready: asyncio.Event, expected: int, sent_at: Dict[str, float],
+                     latencies: List[float], connected: List[int], timeout: float):
+    async with websockets.connect(url, max_size=None) as ws:
+        await ws.send(json.dumps({"action": "subscribe", "topics": ["logs"]}))
+        while json.loads(await ws.recv()).get("type") != "subscribed":
+            pass
+        connected.append(1)
+        await ready.wait()
+        received = 0
+        deadline = time.perf_counter() + timeout
+        while received < expected:
+            try:
+                message = json.loads(await asyncio.wait_for(ws.recv(), deadline - time.perf_counter()))
+            except asyncio.TimeoutError:
+                return
+            if message.get("type") != "new_log":
+                continue
+            sent = sent_at.get(message["data"]["message"])
+            if sent is not None:
+                latencies.append(time.perf_counter() - sent)
+                received += 1
+
+
+async def ws_broadcast(base_url: str, ws_url: str, clients: int, messages: int,
+                       publishers: int = 4, timeout: float = 60) -> Dict[str, Any]:
+    """K clientes suscriptos a `logs`; se publican `messages` logs y se mide la entrega."""
+    ready = asyncio.Event()
+    sent_at: Dict[str, float] = {}
+    latencies: List[float] = []
+    connected: List[int] = []
+    tasks = [asyncio.create_task(_ws_client(ws_url, ready, messages, sent_at, latencies, connected, timeout))
+             for _ in range(clients)]
+    while len(connected) < clients:
+        if any(task.done() for task in tasks):
+            await asyncio.gather(*tasks)  # propaga el error de conexión
+        await asyncio.sleep(0.01)
+    ready.set()
+
+    pending = iter(range(messages))
+
+    async def publish(client: httpx.AsyncClient):
+        for i in pending:
+            text = f"ws-bench {i}"
+            sent_at[text] = time.perf_counter()
+            await client.post("/api/logs", json={"agent_name": "bench", "level": "info", "message": text})
+
+    start = time.perf_counter()
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+        await asyncio.gather(*(publish(client) for _ in range(publishers)))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    summary = latency_summary(latencies, elapsed, rate_key="msgs_per_s")
+    return {"clients": clients, "messages": messages, "expected": clients * messages,
+            "delivered": summary.pop("count"), **summary}
@@ -0,0 +1,122 @@
+"""
+Jazmín OS - Micro-benchmarks
+=============================
+Tiempo por operación de los helpers de database.py (sobre la base temporal
+ya sembrada) y de ConnectionManager.broadcast con K clientes falsos: solo
+el encolado, y encolado + entrega hasta vaciar todas las colas.
+"""
+
+import asyncio
+import contextlib
+import io
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+from benchmarks.report import latency_summary
+
+BROADCAST_CLIENTS = (1, 100, 1000)
+
+
+async def _measure(fn: Callable[[int], Awaitable[Any]], iterations: int, warmup: int = 20) -> Dict[str, Any]:
+    for i in range(warmup):
+        await fn(i)
+    timings: List[float] = []
+    start = time.perf_counter()
+    for i in range(iterations):
+        t0 = time.perf_counter()
+        await fn(i)
+        timings.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+    summary = latency_summary(timings, elapsed, rate_key="ops_per_s", scale=1e6, unit="us")
+    summary["ops"] = summary.pop("count")
+    return summary
+
+
+async def database_helpers(iterations: int) -> Dict[str, Dict[str, Any]]:
+    import database
+
+    results = {}
+    run_ids: List[int] = []
+
+    async def add_run(i):
+        run_ids.append(await database.add_agent_run("bench", "running"))
+
+    results["database.add_agent_run"] = await _measure(add_run, iterations)
+    results["database.update_agent_run"] = await _measure(
+        lambda i: database.update_agent_run(run_ids[i % len(run_ids)], "success", "ok", None, 2), iterations)
+    results["database.get_agent_run"] = await _measure(
+        lambda i: database.get_agent_run(run_ids[i % len(run_ids)]), iterations)
+    results["database.get_agent_runs"] = await _measure(lambda i: database.get_agent_runs(50), iterations)
+    results["database.get_agents_config"] = await _measure(lambda i: database.get_agents_config(), iterations)
+    results["database.save_system_metrics"] = await _measure(
+        lambda i: database.save_system_metrics(12.5, 40.0, 6.4, 16, 41.0, 200, 500, i), iterations)
+    batch = [("2026-01-01 00:00:00", 12.5, 40.0, 6.4, 16, 41.0, 200, 500, i) for i in range(100)]
+    results["database.save_system_metrics_batch[100]"] = await _measure(
+        lambda i: database.save_system_metrics_batch(batch), max(1, iterations // 10))
+    return results
+
+
+class FakeWebSocket:
+    """Lo mínimo que usa ConnectionManager; send_text no hace I/O."""
+
+    def __init__(self):
+        self.received = 0
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        self.received += 1
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+async def _delivered(sockets: List[FakeWebSocket], expected: int) -> None:
+    while any(websocket.received < expected for websocket in sockets):
+        await asyncio.sleep(0)
+
+
+async def broadcast(iterations: int) -> Dict[str, Dict[str, Any]]:
+    from websocket_manager import ConnectionManager
+
+    rng = random.Random(1)
+    message = {"type": "new_log", "timestamp": "2026-01-01T00:00:00",
+               "data": {"id": 1, "agent_name": "bench", "level": "info",
+                        "message": "x" * 120, "timestamp": "2026-01-01T00:00:00"}}
+    results = {}
+    for clients in BROADCAST_CLIENTS:
+        manager = ConnectionManager()
+        sockets = [FakeWebSocket() for _ in range(clients)]
+        with contextlib.redirect_stdout(io.StringIO()):  # connect/disconnect loguean cada cliente
+            for websocket in sockets:
+                await manager.connect(websocket)
+
+        published = 0
+
+        async def enqueue_only(i):
+            nonlocal published
+            message["data"]["id"] = rng.random()
+            await manager.broadcast(message)
+            published += 1
+            if published % 64 == 0:
+                await _delivered(sockets, published)  # sin esto las colas se llenan y se mide el descarte
+
+        async def delivered(i):
+            nonlocal published
+            message["data"]["id"] = rng.random()
+            await manager.broadcast(message)
+            published += 1
+            await _delivered(sockets, published)
+
+        results[f"ConnectionManager.broadcast[{clients}]"] = await _measure(enqueue_only, iterations)
+        await _delivered(sockets, published)
+        results[f"ConnectionManager.broadcast+deliver[{clients}]"] = await _measure(
+            delivered, max(1, iterations // 10))
+        senders = [client.task for client in manager.clients.values()]
+        with contextlib.redirect_stdout(io.StringIO()):
+            for websocket in sockets:
+                manager.disconnect(websocket)
+        await asyncio.gather(*senders, return_exceptions=True)
+    return results
@@ -0,0 +1,66 @@
+"""
+Jazmín OS - Benchmark Report
+=============================
+Resúmenes de latencia (p50/p95/p99 nearest-rank, como run_stats) y
+comparación contra un baseline guardado.
+"""
+
+import math
+from typing import Any, Dict, List, Sequence
+
+# Métricas que se comparan contra el baseline, por sección: (clave, mayor_es_mejor)
+COMPARED = {
+    "http": [("rps", True), ("p95_ms", False)],
+    "ws": [("msgs_per_s", True), ("p95_ms", False)],
+    "micro": [("p50_us", False)],
+}
+
+
+def percentile(values: Sequence[float], p: float) -> float:
+    """Nearest-rank sobre valores ya ordenados."""
+    if not values:
+        return 0.0
+    return values[max(0, math.ceil(p * len(values)) - 1)]
+
+
+def latency_summary(latencies: List[float], elapsed: float, rate_key: str = "rps",
+                    scale: float = 1000.0, unit: str = "ms") -> Dict[str, Any]:
+    """Cantidad, throughput y percentiles de una lista de latencias en segundos."""
+    values = sorted(latencies)
+    summary = {
+        "count": len(values),
+        rate_key: round(len(values) / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+    for name, p in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99)):
+        summary[f"{name}_{unit}"] = round(percentile(values, p) * scale, 3)
+    summary[f"max_{unit}"] = round(values[-1] * scale, 3) if values else 0.0
+    return summary
+
+
+def _sections(report: Dict[str, Any]):
+    for section, metrics in COMPARED.items():
+        entries = report.get(section) or {}
+        if section == "ws" and entries:
+            entries = {"broadcast": entries}
+        for name, values in entries.items():
+            yield section, name, values, metrics
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[Dict[str, Any]]:
+    """Métricas que empeoraron más que `tolerance` (0.25 = 25%) respecto del baseline."""
+    baseline_values = {(section, name): values for section, name, values, _ in _sections(baseline)}
+    regressions = []
+    for section, name, values, metrics in _sections(report):
+        previous = baseline_values.get((section, name))
+        if previous is None:
+            continue
+        for key, higher_is_better in metrics:
+            old, new = previous.get(key), values.get(key)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            if worse > tolerance:
+                regressions.append({"section": section, "name": name, "metric": key,
+                                    "baseline": old, "current": new, "change": round(change, 4)})
+    return regressions
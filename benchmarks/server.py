@@ -0,0 +1,129 @@
+"""
+Jazmín OS - Benchmark Server
+=============================
+Levanta la app en un hilo (uvicorn, socket real en 127.0.0.1) sobre un
+directorio temporal y la siembra con logs, corridas y métricas. Las
+variables de entorno se fijan antes de importar config/main, por eso los
+imports de la app son locales.
+"""
+
+import os
+import random
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Optional
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+AGENTS = ["jazmin-core", "nocturnal-backup", "mail-sorter", "crawler", "reporter", "indexer"]
+LEVELS = ["debug", "info", "info", "info", "warning", "error"]
+RUN_STATUSES = ["success"] * 8 + ["failed", "timeout"]
+SEED_SPAN = timedelta(days=2)  # dentro de la retención más corta: el arranque no borra lo sembrado
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _timestamps(count: int, span: timedelta, fmt: Optional[str] = None):
+    now = datetime.utcnow()
+    step = span / max(count, 1)
+    for i in range(count):
+        ts = now - span + step * i
+        yield ts.strftime(fmt) if fmt else ts.isoformat()
+
+
+def seed(logs: int, runs: int, metrics: int, rng: random.Random) -> Dict[str, int]:
+    """Inserta datos sintéticos directo en las tablas (antes del startup de la app)."""
+    import database
+    import main
+
+    main.init_db()
+    with main.db.pool.transaction() as conn:
+        conn.executemany("INSERT INTO agents (name, status) VALUES (?, ?)",
+                         [(name, rng.choice(["active", "inactive"])) for name in AGENTS])
+        conn.executemany("INSERT INTO logs (agent_name, level, message, timestamp) VALUES (?, ?, ?, ?)", [
+            (rng.choice(AGENTS), rng.choice(LEVELS), f"evento {i} procesado en {rng.randint(1, 900)} ms", ts)
+            for i, ts in enumerate(_timestamps(logs, SEED_SPAN))
+        ])
+    with database.pool.transaction() as conn:
+        rows = []
+        for started in _timestamps(runs, SEED_SPAN, "%Y-%m-%d %H:%M:%S"):
+            duration = int(rng.lognormvariate(7, 1))
+            rows.append((rng.choice(AGENTS), rng.choice(RUN_STATUSES), started, duration, rng.randint(0, 1 << 16)))
+        conn.executemany('''
+            INSERT INTO agent_runs (agent_name, status, started_at, execution_time_ms, output_bytes)
+            VALUES (?, ?, ?, ?, ?)
+        ''', rows)
+        conn.executemany('''
+            INSERT INTO system_metrics
+            (timestamp, cpu_percent, memory_percent, memory_used_gb, memory_total_gb,
+             disk_percent, disk_used_gb, disk_total_gb, uptime_seconds)
+            VALUES (?, ?, ?, 8, 16, 40, 200, 500, 3600)
+        ''', [(ts, rng.uniform(0, 100), rng.uniform(20, 90))
+              for ts in _timestamps(metrics, timedelta(days=1), "%Y-%m-%d %H:%M:%S")])
+    return {"agents": len(AGENTS), "logs": logs, "runs": runs, "metrics": metrics}
+
+
+class BenchServer:
+    """Context manager: directorio temporal, siembra, uvicorn en un hilo."""
+
+    def __init__(self, logs: int = 10000, runs: int = 2000, metrics: int = 5000, seed: int = 1):
+        self.sizes = {"logs": logs, "runs": runs, "metrics": metrics}
+        self.rng = random.Random(seed)
+        self.tmpdir: Optional[str] = None
+        self.port = _free_port()
+        self.seeded: Dict[str, int] = {}
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    @property
+    def ws_url(self) -> str:
+        return f"ws://127.0.0.1:{self.port}/ws"
+
+    def __enter__(self) -> "BenchServer":
+        if "main" in sys.modules:
+            raise RuntimeError("main ya está importado: el benchmark necesita importarlo sobre la base temporal")
+        self.tmpdir = tempfile.mkdtemp(prefix="jazmin-bench-")
+        os.environ.update({
+            "DATA_DIR": os.path.join(self.tmpdir, "data"),
+            "APP_DB_PATH": os.path.join(self.tmpdir, "jazmin_os.db"),
+            "SCHEDULER_ENABLED": "false",
+        })
+        os.environ.pop("DATABASE_URL", None)
+        os.chdir(REPO_DIR)  # static/ y templates/ son relativos
+        sys.path.insert(0, str(REPO_DIR))
+
+        import uvicorn
+        import main
+
+        self.seeded = seed(**self.sizes, rng=self.rng)
+        self._server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=self.port,
+                                                     log_level="warning", access_log=False))
+        self._thread = threading.Thread(target=self._server.run, name="bench-server", daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + 30
+        while not self._server.started:
+            if not self._thread.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError("el servidor no arrancó")
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc):
+        if self._server is not None:
+            self._server.should_exit = True
+            self._thread.join(timeout=30)
+        if self.tmpdir is not None:
+            shutil.rmtree(self.tmpdir, ignore_errors=True)
@@ -9,7 +9,43 @@ from pathlib import Path
 
 # Base paths
 BASE_DIR = Path(__file__).parent
-DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{BASE_DIR}/jazmin_os.db")
+DATA_DIR = Path(os.getenv("DATA_DIR", BASE_DIR / "data"))  # base de database.py, archivos de retención
+APP_DB_PATH = os.getenv("APP_DB_PATH", "jazmin_os.db")     # base de main.py (agents, logs, metrics)
+# Base de los modelos SQLAlchemy (repository.py); por defecto la misma que database.py
+DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{DATA_DIR}/jazmin_os.db")
+
+# Pool del engine de SQLAlchemy (solo con una DATABASE_URL que no sea la base de database.py)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))  # seconds
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() == "true"
+
+# SQLite settings
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", 5000))
+DB_STATEMENT_CACHE = int(os.getenv("DB_STATEMENT_CACHE", 256))  # prepared statements por conexión
+DB_READER_THREADS = int(os.getenv("DB_READER_THREADS", 4))
+
+# Log ingestion (group commit)
+LOG_BATCH_MAX_ROWS = int(os.getenv("LOG_BATCH_MAX_ROWS", 500))
+LOG_BATCH_MAX_DELAY_MS = float(os.getenv("LOG_BATCH_MAX_DELAY_MS", 20))
+LOG_QUEUE_MAX_ROWS = int(os.getenv("LOG_QUEUE_MAX_ROWS", 10000))  # filas en cola antes de que ack=async espere al commit
+
+# Retention settings (TTL en días; "*" = niveles de log no listados)
+RETENTION_INTERVAL = float(os.getenv("RETENTION_INTERVAL", 3600))  # seconds
+RETENTION_CHUNK_SIZE = int(os.getenv("RETENTION_CHUNK_SIZE", 1000))
+RETENTION_ARCHIVE = os.getenv("RETENTION_ARCHIVE", "true").lower() == "true"
+RETENTION_ARCHIVE_DIR = DATA_DIR / "archive"
+LOG_RETENTION_DAYS = {
+    "debug": 3,
+    "info": 14,
+    "warning": 30,
+    "error": 90,
+    "critical": 90,
+    "*": 30,
+}
+AGENT_RUNS_RETENTION_DAYS = 90
+SYSTEM_METRICS_RETENTION_DAYS = 7
 
 # App settings
 APP_NAME = "Jazmín OS"
@@ -19,7 +55,8 @@ APP_DESCRIPTION = "Dashboard Personal - Centro de Comando para Agentes"
 # Server settings
 HOST = os.getenv("HOST", "0.0.0.0")
 PORT = int(os.getenv("PORT", 8000))
-DEBUG = os.getenv("DEBUG", "true").lower() == "true"
+DEBUG = os.getenv("DEBUG", "false").lower() == "true"
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")  # header X-Admin-Token para acciones que ejecutan comandos
 
 # CORS settings
 CORS_ORIGINS = [
@@ -31,7 +68,51 @@ CORS_ORIGINS = [
 
 # WebSocket settings
 WS_HEARTBEAT_INTERVAL = 30  # seconds
+WS_SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", 5))  # seconds por envío
+WS_QUEUE_SIZE = int(os.getenv("WS_QUEUE_SIZE", 256))  # mensajes pendientes por cliente
+WS_LAGGARD_DROPS = int(os.getenv("WS_LAGGARD_DROPS", 512))  # descartes seguidos antes de expulsar
+WS_COALESCE_TYPES = {"system_metrics"}  # solo importa el último mensaje
 AGENT_TIMEOUT = 300  # seconds (5 minutes)
+PRESENCE_FLUSH_INTERVAL = float(os.getenv("PRESENCE_FLUSH_INTERVAL", 10))  # seconds entre escrituras de last_seen
+
+# Telemetry (/metrics)
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", 0.5))  # seconds entre mediciones de lag del loop
+
+# Debug (/api/debug/*, solo con DEBUG). Captura y watchdog prendidos por defecto solo con DEBUG:
+# fuera de eso cuestan un callback por sentencia SQL y trabajo extra por request
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", 1000 if DEBUG else 0))  # 0 desactiva la captura
+SLOW_REQUEST_RING = int(os.getenv("SLOW_REQUEST_RING", 50))  # requests lentos y bloqueos guardados
+SLOW_REQUEST_MAX_QUERIES = int(os.getenv("SLOW_REQUEST_MAX_QUERIES", 200))  # consultas anotadas por request
+LOOP_WATCHDOG_MS = float(os.getenv("LOOP_WATCHDOG_MS", 500 if DEBUG else 0))  # 0 desactiva el watchdog
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", 60))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", 10))  # período de muestreo por defecto
+
+# System sampler settings
+SYSTEM_SAMPLE_INTERVAL = float(os.getenv("SYSTEM_SAMPLE_INTERVAL", 2))  # seconds
+PROCESS_SAMPLE_INTERVAL = float(os.getenv("PROCESS_SAMPLE_INTERVAL", 5))  # seconds
+AGENT_MONITOR_INTERVAL = float(os.getenv("AGENT_MONITOR_INTERVAL", 1))  # seconds, por corrida monitoreada
+
+# Dashboard summary
+DASHBOARD_CACHE_TTL = float(os.getenv("DASHBOARD_CACHE_TTL", 2))  # seconds
+DASHBOARD_RECENT_LOGS = int(os.getenv("DASHBOARD_RECENT_LOGS", 20))
+
+# Scheduler settings
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+SCHEDULER_MAX_WORKERS = int(os.getenv("SCHEDULER_MAX_WORKERS", 4))  # subprocesos simultáneos en total
+SCHEDULER_DEFAULT_TIMEOUT = float(os.getenv("SCHEDULER_DEFAULT_TIMEOUT", 3600))  # seconds
+RUN_OUTPUT_CHUNK_SIZE = int(os.getenv("RUN_OUTPUT_CHUNK_SIZE", 64 * 1024))  # bytes por chunk en agent_run_output
+RUN_OUTPUT_FLUSH_INTERVAL = float(os.getenv("RUN_OUTPUT_FLUSH_INTERVAL", 1))  # seconds sin salida antes de guardar lo pendiente
+RUN_OUTPUT_TAIL = int(os.getenv("RUN_OUTPUT_TAIL", 4096))  # bytes guardados en agent_runs.output
+
+METRICS_RING_SECONDS = float(os.getenv("METRICS_RING_SECONDS", 900))  # ventana en memoria
+METRICS_FLUSH_EVERY = int(os.getenv("METRICS_FLUSH_EVERY", 15))  # muestras por lote a system_metrics
+
+# Metrics rollups: tamaño de bucket (segundos) -> días de retención
+METRICS_ROLLUP_TIERS = {
+    60: 30,        # 1 minuto
+    900: 180,      # 15 minutos
+    3600: 730,     # 1 hora
+}
 
 # Agent types
 AGENT_TYPES = [
@@ -0,0 +1,98 @@
+"""
+Jazmín OS - Cron
+=================
+Parser mínimo de expresiones cron de 5 campos (minuto hora día mes día-semana)
+y cálculo de la próxima ejecución. Soporta *, listas, rangos, pasos, nombres
+de meses/días y los alias @hourly, @daily, @weekly, @monthly, @yearly.
+"""
+
+from datetime import datetime, timedelta
+from typing import FrozenSet, Optional
+
+ALIASES = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+
+MONTH_NAMES = {name: i for i, name in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], start=1)}
+DAY_NAMES = {name: i for i, name in enumerate(["sun", "mon", "tue", "wed", "thu", "fri", "sat"])}
+
+
+def _parse_value(value: str, names: dict) -> int:
+    return names[value.lower()] if value.lower() in names else int(value)
+
+
+def _parse_field(field: str, low: int, high: int, names: dict = {}) -> FrozenSet[int]:
+    values = set()
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+            if step < 1:
+                raise ValueError(f"paso inválido en '{field}'")
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start_text, end_text = part.split("-", 1)
+            start, end = _parse_value(start_text, names), _parse_value(end_text, names)
+        else:
+            start = _parse_value(part, names)
+            end = high if step > 1 else start
+        if not (low <= start <= high and low <= end <= high) or start > end:
+            raise ValueError(f"valor fuera de rango en '{field}' ({low}-{high})")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class CronExpression:
+    """Expresión cron ya parseada; `next_after` calcula la próxima ejecución."""
+
+    def __init__(self, expression: str):
+        self.expression = expression.strip()
+        fields = ALIASES.get(self.expression.lower(), self.expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"se esperaban 5 campos en '{expression}'")
+        minute, hour, dom, month, dow = fields
+        self.minutes = _parse_field(minute, 0, 59)
+        self.hours = _parse_field(hour, 0, 23)
+        self.days = _parse_field(dom, 1, 31)
+        self.months = _parse_field(month, 1, 12, MONTH_NAMES)
+        # 0 y 7 son domingo
+        self.weekdays = frozenset(d % 7 for d in _parse_field(dow, 0, 7, DAY_NAMES))
+        self._dom_any = dom == "*"
+        self._dow_any = dow == "*"
+
+    def _day_matches(self, dt: datetime) -> bool:
+        dom_ok = dt.day in self.days
+        dow_ok = (dt.weekday() + 1) % 7 in self.weekdays
+        # Como en cron: si ambos campos están restringidos alcanza con que coincida uno
+        if self._dom_any or self._dow_any:
+            return dom_ok and dow_ok
+        return dom_ok or dow_ok
+
+    def next_after(self, after: datetime) -> Optional[datetime]:
+        """Primera fecha estrictamente posterior a `after` que cumple la expresión."""
+        dt = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = dt + timedelta(days=366 * 5)
+        while dt < limit:
+            if dt.month not in self.months:
+                dt = (dt.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(dt):
+                dt = dt.replace(hour=0, minute=0) + timedelta(days=1)
+            elif dt.hour not in self.hours:
+                dt = dt.replace(minute=0) + timedelta(hours=1)
+            elif dt.minute not in self.minutes:
+                dt += timedelta(minutes=1)
+            else:
+                return dt
+        return None  # p.ej. "0 0 31 2 *": nunca ocurre
+
+    def __repr__(self) -> str:
+        return f"CronExpression({self.expression!r})"
@@ -0,0 +1,210 @@
+"""
+Jazmín OS - Dashboard Summary
+==============================
+Resumen del dashboard (schemas.DashboardData) mantenido en memoria: los
+contadores se cargan una vez al arrancar y después se actualizan en cada
+escritura de agentes, proyectos y tareas. Los jobs se releen de agent_config
+en cada armado (se editan fuera de la API). El JSON armado se cachea unos
+segundos, así la página carga con un solo request sin tocar la base.
+"""
+
+import asyncio
+import time
+from collections import Counter, deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import config
+from db_executor import DBExecutor
+from http_cache import content_etag
+from schemas import DashboardData
+
+ONLINE_STATUSES = {"online", "active", "running"}
+ACTIVE_PROJECT_STATUSES = {"active", "in_progress"}
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    """Fecha ISO de la base o None: last_run y los logs viejos pueden traer texto libre."""
+    if isinstance(value, datetime):
+        return value
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def _is_online(agent: Dict[str, Any]) -> bool:
+    # Con heartbeats manda la presencia; si el agente nunca latió, su status
+    if "is_online" in agent:
+        return agent["is_online"]
+    return agent.get("status") in ONLINE_STATUSES
+
+
+class DashboardSummary:
+    """Contadores incrementales + payload serializado con TTL."""
+
+    def __init__(self, app_db: DBExecutor, data_db: DBExecutor,
+                 ttl: float = config.DASHBOARD_CACHE_TTL,
+                 recent_logs: int = config.DASHBOARD_RECENT_LOGS):
+        self.app_db = app_db
+        self.data_db = data_db
+        self.ttl = ttl
+        self.agents: Dict[int, Dict[str, Any]] = {}
+        self.project_status: Counter = Counter()
+        self.task_status: Counter = Counter()
+        self.recent_logs: Deque[Dict[str, Any]] = deque(maxlen=recent_logs)
+        self._cached: Optional[Tuple[float, bytes, str]] = None
+        self._generation = 0  # cambia con cada escritura; evita cachear un armado ya viejo
+        self._lock = asyncio.Lock()
+
+    async def load(self, presence: Optional[Dict[str, Dict[str, Any]]] = None):
+        """Carga inicial de contadores y listas (una sola vez, al arrancar).
+
+        `presence` (nombre -> entrada del PresenceTracker ya cargado) manda
+        sobre el status persistido: tras un reinicio nadie está online hasta latir.
+        """
+        presence = presence or {}
+        for agent in await self.app_db.fetchall("SELECT * FROM agents"):
+            if agent["name"] in presence:
+                agent["is_online"] = presence[agent["name"]]["is_online"]
+            self.agents[agent["id"]] = agent
+        logs = await self.app_db.fetchall("SELECT * FROM logs ORDER BY timestamp DESC, id DESC LIMIT ?",
+                                          (self.recent_logs.maxlen,))
+        self.recent_logs.extend(reversed(logs))
+        self.project_status = Counter(dict(await self.data_db.read(
+            lambda conn: conn.execute("SELECT status, COUNT(*) FROM projects GROUP BY status").fetchall())))
+        self.task_status = Counter(dict(await self.data_db.read(
+            lambda conn: conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall())))
+        self.invalidate()
+
+    # --- Hooks de escritura -------------------------------------------------
+
+    def invalidate(self):
+        self._cached = None
+        self._generation += 1
+
+    def agent_changed(self, agent: Dict[str, Any]):
+        self.agents[agent["id"]] = {**self.agents.get(agent["id"], {}), **agent}
+        self.invalidate()
+
+    def project_added(self, project: Dict[str, Any]):
+        self.project_status[project["status"]] += 1
+        self.invalidate()
+
+    def task_changed(self, old_status: Optional[str], new_status: Optional[str]):
+        """Alta (old None), cambio de estado o baja (new None) de una tarea."""
+        if old_status is not None:
+            self.task_status[old_status] -= 1
+        if new_status is not None:
+            self.task_status[new_status] += 1
+        self.invalidate()
+
+    def logs_committed(self, logs: List[Dict[str, Any]]):
+        # Sin invalidar: los logs recientes alcanza con refrescarlos cada TTL
+        self.recent_logs.extend(logs)
+
+    # --- Lectura ------------------------------------------------------------
+
+    def stats(self, cron_jobs: List[Dict[str, Any]]) -> Dict[str, int]:
+        online = sum(1 for agent in self.agents.values() if _is_online(agent))
+        return {
+            "total_agents": len(self.agents),
+            "online_agents": online,
+            "offline_agents": len(self.agents) - online,
+            "total_projects": sum(self.project_status.values()),
+            "active_projects": sum(self.project_status[s] for s in ACTIVE_PROJECT_STATUSES),
+            "completed_projects": self.project_status["completed"],
+            "total_tasks": sum(self.task_status.values()),
+            "pending_tasks": self.task_status["pending"],
+            "completed_tasks": self.task_status["completed"],
+            "total_cron_jobs": len(cron_jobs),
+            "active_cron_jobs": sum(1 for job in cron_jobs if job["status"] == "active"),
+        }
+
+    async def _projects(self) -> List[Dict[str, Any]]:
+        # Los contadores de tareas viven en projects (triggers): una sola lectura
+        return await self.data_db.fetchall('''
+            SELECT id, name, status, progress, priority, task_count, completed_tasks
+            FROM projects ORDER BY priority, id
+        ''')
+
+    async def _cron_jobs(self) -> List[Dict[str, Any]]:
+        rows = await self.data_db.fetchall('''
+            SELECT id, name, description, schedule, command, enabled, last_run, next_run,
+                   COALESCE(run_count, 0) AS run_count, COALESCE(success_count, 0) AS success_count,
+                   COALESCE(fail_count, 0) AS fail_count, created_at
+            FROM agent_config WHERE schedule IS NOT NULL ORDER BY name
+        ''')
+        return [{**row, "status": "active" if row.pop("enabled") else "paused",
+                 "updated_at": row["created_at"]} for row in rows]
+
+    def _agents(self) -> List[Dict[str, Any]]:
+        return [{
+            "id": agent["id"],
+            "name": agent["name"],
+            "display_name": agent.get("display_name"),
+            "status": agent.get("status") or "offline",
+            "is_online": _is_online(agent),
+            "last_seen": next((ts for ts in map(_parse_timestamp, (
+                agent.get("last_seen"), agent.get("last_run"), agent.get("created_at"))) if ts), None),
+            "agent_type": agent.get("agent_type") or "background",
+        } for agent in self.agents.values()]
+
+    def _recent_logs(self) -> List[Dict[str, Any]]:
+        # Filas anteriores a la validación de /api/logs: sin mensaje o sin fecha legible se omiten
+        logs = []
+        for log in reversed(self.recent_logs):
+            timestamp = _parse_timestamp(log["timestamp"])
+            if timestamp is None or not log["message"]:
+                continue
+            logs.append({
+                "id": log["id"],
+                "level": log["level"] or "info",
+                "source": (log["agent_name"] or "sistema")[:100],
+                "message": log["message"],
+                "metadata_json": {},
+                "timestamp": timestamp,
+            })
+        return logs
+
+    @staticmethod
+    def _system_metrics(snapshot: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if snapshot is None:
+            return None
+        return {
+            "cpu_percent": snapshot["cpu"]["percent"],
+            "memory_percent": snapshot["memory"]["percent"],
+            "memory_used_mb": snapshot["memory"]["used"] * 1024,
+            "memory_total_mb": snapshot["memory"]["total"] * 1024,
+            "disk_percent": snapshot["disk"]["percent"],
+            "disk_used_gb": snapshot["disk"]["used"],
+            "disk_total_gb": snapshot["disk"]["total"],
+            "timestamp": snapshot["sampled_at"],
+        }
+
+    async def get(self, system_snapshot: Optional[Dict[str, Any]] = None) -> Tuple[bytes, str]:
+        """Devuelve (JSON, ETag); se rearma solo si pasó el TTL o hubo una escritura."""
+        cached = self._cached
+        if cached is not None and time.monotonic() - cached[0] < self.ttl:
+            return cached[1], cached[2]
+        async with self._lock:
+            cached = self._cached
+            if cached is not None and time.monotonic() - cached[0] < self.ttl:
+                return cached[1], cached[2]
+            generation = self._generation
+            projects, cron_jobs = await asyncio.gather(self._projects(), self._cron_jobs())
+            data = DashboardData(
+                stats=self.stats(cron_jobs),
+                agents=self._agents(),
+                projects=projects,
+                recent_logs=self._recent_logs(),
+                system_metrics=self._system_metrics(system_snapshot),
+                cron_jobs=cron_jobs,
+            )
+            body = data.model_dump_json().encode()
+            etag = content_etag(body.decode())
+            if generation == self._generation:
+                self._cached = (time.monotonic(), body, etag)
+            return body, etag
@@ -1,22 +1,68 @@
 import sqlite3
 import os
-from datetime import datetime
 from pathlib import Path
 from typing import Optional, List, Dict, Any
 
+from sqlalchemy.orm import DeclarativeBase
+
+import config
+from db_executor import DBExecutor
+from db_pool import get_pool
+from run_stats import RUN_LIST_COLUMNS
+
 # Base directory
 BASE_DIR = Path(__file__).parent
-DATA_DIR = BASE_DIR / "data"
+DATA_DIR = config.DATA_DIR
 DB_PATH = DATA_DIR / "jazmin_os.db"
 
 # Ensure data directory exists
-DATA_DIR.mkdir(exist_ok=True)
+DATA_DIR.mkdir(parents=True, exist_ok=True)
+
+pool = get_pool(DB_PATH)
+db = DBExecutor(pool)
+
+class Base(DeclarativeBase):
+    """Declarative base for the SQLAlchemy models (models.py, used by repository.py)."""
 
 def get_db_connection() -> sqlite3.Connection:
-    """Get a database connection with row factory."""
-    conn = sqlite3.connect(str(DB_PATH))
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Get this thread's pooled connection (WAL mode, row factory set)."""
+    return pool.connection()
+
+def add_missing_columns(cursor: sqlite3.Cursor, table: str, columns: Dict[str, str]) -> List[str]:
+    """ALTER TABLE ADD COLUMN for columns that older databases don't have yet; returns the added ones."""
+    existing = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+    added = []
+    for name, definition in columns.items():
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+            added.append(name)
+    return added
+
+# Project counters (task_count, completed_tasks, progress) kept in sync by triggers,
+# so listing projects never has to count tasks
+PROJECT_PROGRESS_SQL = "ROUND(100.0 * ({completed}) / NULLIF({total}, 0), 2)"
+
+def _project_delta_sql(project: str, total: str, completed: str) -> str:
+    new_total = f"task_count + ({total})"
+    new_completed = f"completed_tasks + ({completed})"
+    return f'''UPDATE projects SET
+            task_count = {new_total},
+            completed_tasks = {new_completed},
+            progress = COALESCE({PROJECT_PROGRESS_SQL.format(completed=new_completed, total=new_total)}, 0)
+        WHERE id = {project};'''
+
+TASK_COUNTER_TRIGGERS = [
+    f'''CREATE TRIGGER IF NOT EXISTS tasks_counters_ai AFTER INSERT ON tasks BEGIN
+        {_project_delta_sql("new.project_id", "1", "new.status = 'completed'")}
+    END''',
+    f'''CREATE TRIGGER IF NOT EXISTS tasks_counters_ad AFTER DELETE ON tasks BEGIN
+        {_project_delta_sql("old.project_id", "-1", "-(old.status = 'completed')")}
+    END''',
+    f'''CREATE TRIGGER IF NOT EXISTS tasks_counters_au AFTER UPDATE OF status, project_id ON tasks BEGIN
+        {_project_delta_sql("old.project_id", "-1", "-(old.status = 'completed')")}
+        {_project_delta_sql("new.project_id", "1", "new.status = 'completed'")}
+    END''',
+]
 
 def init_db():
     """Initialize database with all tables."""
@@ -38,6 +84,50 @@ def init_db():
         )
     ''')
     
+    add_missing_columns(cursor, "agent_runs", {"output_bytes": "INTEGER"})
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_agent_runs_agent_started
+        ON agent_runs (agent_name, started_at)
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_agent_runs_started ON agent_runs (started_at)')
+    
+    # Salida de las corridas en chunks append-only (agent_runs.output guarda solo la cola)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS agent_run_output (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_id INTEGER NOT NULL,
+            offset INTEGER NOT NULL,
+            data BLOB NOT NULL,
+            created_at TIMESTAMP
+        )
+    ''')
+    cursor.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_agent_run_output_run
+        ON agent_run_output (run_id, offset)
+    ''')
+    
+    # Recursos consumidos por cada corrida (árbol de procesos completo)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS agent_run_resources (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_id INTEGER UNIQUE NOT NULL,
+            agent_name TEXT NOT NULL,
+            started_at TIMESTAMP,
+            samples INTEGER,
+            cpu_peak REAL,
+            cpu_avg REAL,
+            rss_peak INTEGER,
+            read_bytes INTEGER,
+            write_bytes INTEGER,
+            ctx_switches INTEGER,
+            procs_peak INTEGER
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_agent_run_resources_agent
+        ON agent_run_resources (agent_name, started_at)
+    ''')
+    
     # System metrics history
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS system_metrics (
@@ -54,6 +144,22 @@ def init_db():
         )
     ''')
     
+    # System metrics rollups (min/avg/max/p95 por bucket de `tier` segundos)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS system_metrics_rollup (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tier INTEGER NOT NULL,
+            metric TEXT NOT NULL,
+            bucket_start INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            min REAL,
+            avg REAL,
+            max REAL,
+            p95 REAL,
+            UNIQUE (tier, metric, bucket_start)
+        )
+    ''')
+    
     # Agent configuration
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS agent_config (
@@ -68,6 +174,63 @@ def init_db():
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     ''')
+    # Columnas del scheduler (command NULL = el agente no se ejecuta desde acá)
+    add_missing_columns(cursor, "agent_config", {
+        "command": "TEXT",
+        "next_run": "TIMESTAMP",
+        "run_count": "INTEGER DEFAULT 0",
+        "success_count": "INTEGER DEFAULT 0",
+        "fail_count": "INTEGER DEFAULT 0",
+        "max_concurrency": "INTEGER DEFAULT 1",
+        "jitter_seconds": "REAL DEFAULT 0",
+        "timeout_seconds": "REAL",
+    })
+    
+    # Projects and tasks (same columns as models.Project / models.Task)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS projects (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            description TEXT,
+            status TEXT DEFAULT 'planning',
+            progress REAL DEFAULT 0,
+            priority INTEGER DEFAULT 2,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            completed_at TIMESTAMP
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            project_id INTEGER NOT NULL REFERENCES projects(id),
+            title TEXT NOT NULL,
+            description TEXT,
+            status TEXT DEFAULT 'pending',
+            priority INTEGER DEFAULT 2,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            completed_at TIMESTAMP
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_project ON tasks (project_id, status)')
+    added = add_missing_columns(cursor, "projects", {
+        "task_count": "INTEGER NOT NULL DEFAULT 0",
+        "completed_tasks": "INTEGER NOT NULL DEFAULT 0",
+    })
+    if added:
+        # Backfill once, for databases created before the counters existed
+        cursor.execute('''
+            UPDATE projects SET
+                task_count = (SELECT COUNT(*) FROM tasks WHERE project_id = projects.id),
+                completed_tasks = (SELECT COUNT(*) FROM tasks WHERE project_id = projects.id
+                                   AND status = 'completed')
+        ''')
+        cursor.execute(f"UPDATE projects SET progress = COALESCE("
+                       f"{PROJECT_PROGRESS_SQL.format(completed='completed_tasks', total='task_count')}, 0)")
+    for trigger in TASK_COUNTER_TRIGGERS:
+        cursor.execute(trigger)
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_projects_status ON projects (status, priority)')
     
     # Insert default agents if not exist
     default_agents = [
@@ -83,83 +246,79 @@ def init_db():
         ''', agent)
     
     conn.commit()
-    conn.close()
     print("✅ Database initialized")
 
 # Agent operations
-def get_agent_runs(limit: int = 50) -> List[Dict[str, Any]]:
-    """Get recent agent runs."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT * FROM agent_runs 
+async def get_agent_runs(limit: int = 50) -> List[Dict[str, Any]]:
+    """Get recent agent runs (list columns only; see get_agent_run for output)."""
+    return await db.fetchall(f'''
+        SELECT {RUN_LIST_COLUMNS} FROM agent_runs 
         ORDER BY started_at DESC 
         LIMIT ?
     ''', (limit,))
-    rows = cursor.fetchall()
-    conn.close()
-    return [dict(row) for row in rows]
 
-def get_agents_config() -> List[Dict[str, Any]]:
+async def get_agent_run(run_id: int) -> Optional[Dict[str, Any]]:
+    """Get one agent run with its output tail and error message."""
+    return await db.fetchone('SELECT * FROM agent_runs WHERE id = ?', (run_id,))
+
+async def get_agents_config() -> List[Dict[str, Any]]:
     """Get all agent configurations."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM agent_config ORDER BY name')
-    rows = cursor.fetchall()
-    conn.close()
-    return [dict(row) for row in rows]
+    return await db.fetchall('SELECT * FROM agent_config ORDER BY name')
 
-def add_agent_run(agent_name: str, status: str = 'pending', output: str = None) -> int:
+async def add_agent_run(agent_name: str, status: str = 'pending', output: str = None) -> int:
     """Add a new agent run record."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        INSERT INTO agent_runs (agent_name, status, output)
-        VALUES (?, ?, ?)
+    return await db.execute('''
+        INSERT INTO agent_runs (agent_name, status, output, started_at)
+        VALUES (?, ?, ?, strftime('%Y-%m-%d %H:%M:%f', 'now'))
     ''', (agent_name, status, output))
-    run_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
-    return run_id
 
-def update_agent_run(run_id: int, status: str, output: str = None, error_message: str = None):
-    """Update agent run status."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT started_at FROM agent_runs WHERE id = ?', (run_id,))
-    row = cursor.fetchone()
-    
-    if row:
-        started = datetime.fromisoformat(row['started_at'])
-        now = datetime.now()
-        execution_time = int((now - started).total_seconds() * 1000)
-        
-        cursor.execute('''
-            UPDATE agent_runs 
-            SET status = ?, output = ?, error_message = ?, 
-                completed_at = ?, execution_time_ms = ?
-            WHERE id = ?
-        ''', (status, output, error_message, now, execution_time, run_id))
-        
-        conn.commit()
-    
-    conn.close()
+def _update_agent_run(conn: sqlite3.Connection, run_id: int, status: str,
+                      output: Optional[str], error_message: Optional[str],
+                      output_bytes: Optional[int] = None):
+    # started_at is UTC (with milliseconds): compute both ends in SQLite so
+    # the duration does not depend on the server's local timezone
+    conn.execute('''
+        UPDATE agent_runs
+        SET status = ?, output = ?, error_message = ?,
+            completed_at = strftime('%Y-%m-%d %H:%M:%f', 'now'),
+            execution_time_ms = CAST(ROUND((julianday('now') - julianday(started_at)) * 86400000) AS INTEGER),
+            output_bytes = ?
+        WHERE id = ?
+    ''', (status, output, error_message, output_bytes, run_id))
+
+async def update_agent_run(run_id: int, status: str, output: str = None, error_message: str = None,
+                           output_bytes: int = None):
+    """Update agent run status.
+
+    For streamed runs `output` is just the tail; the full output lives in
+    agent_run_output and `output_bytes` is its size.
+    """
+    await db.write(_update_agent_run, run_id, status, output, error_message, output_bytes)
 
 # System metrics
-def save_system_metrics(cpu: float, memory: float, memory_used: float, memory_total: float,
-                        disk: float, disk_used: float, disk_total: float, uptime: int):
+async def save_system_metrics(cpu: float, memory: float, memory_used: float, memory_total: float,
+                              disk: float, disk_used: float, disk_total: float, uptime: int):
     """Save system metrics to database."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
+    await db.execute('''
         INSERT INTO system_metrics 
         (cpu_percent, memory_percent, memory_used_gb, memory_total_gb,
          disk_percent, disk_used_gb, disk_total_gb, uptime_seconds)
         VALUES (?, ?, ?, ?, ?, ?, ?, ?)
     ''', (cpu, memory, memory_used, memory_total, disk, disk_used, disk_total, uptime))
-    conn.commit()
-    conn.close()
+
+async def save_system_metrics_batch(rows: List[tuple]):
+    """Save many metric samples in one transaction.
+
+    Each row is (timestamp, cpu, memory, memory_used, memory_total,
+    disk, disk_used, disk_total, uptime), timestamp in UTC 'YYYY-MM-DD HH:MM:SS'.
+    """
+    if rows:
+        await db.write(lambda conn: conn.executemany('''
+            INSERT INTO system_metrics 
+            (timestamp, cpu_percent, memory_percent, memory_used_gb, memory_total_gb,
+             disk_percent, disk_used_gb, disk_total_gb, uptime_seconds)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows))
 
 # Initialize on import
 init_db()
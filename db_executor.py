@@ -0,0 +1,146 @@
+"""
+Jazmín OS - Async DB Executor
+==============================
+Ejecuta el trabajo de SQLite fuera del event loop: un hilo escritor
+y N hilos lectores, con estadísticas de cola y tiempo de espera.
+"""
+
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import config
+from db_pool import SQLitePool
+
+
+class _QueueStats:
+    """Contadores de una cola del executor (thread-safe)."""
+
+    def __init__(self, window: int = 1024):
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.running = 0
+        self.completed = 0
+        self.errors = 0
+        self.max_wait_ms = 0.0
+        self._waits = deque(maxlen=window)
+
+    def submitted(self):
+        with self._lock:
+            self.pending += 1
+
+    def started(self, wait_ms: float):
+        with self._lock:
+            self.pending -= 1
+            self.running += 1
+            self._waits.append(wait_ms)
+            if wait_ms > self.max_wait_ms:
+                self.max_wait_ms = wait_ms
+
+    def finished(self, ok: bool):
+        with self._lock:
+            self.running -= 1
+            self.completed += 1
+            if not ok:
+                self.errors += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = sorted(self._waits)
+            snap = {
+                "queue_depth": self.pending,
+                "running": self.running,
+                "completed": self.completed,
+                "errors": self.errors,
+                "max_wait_ms": round(self.max_wait_ms, 3),
+            }
+        if waits:
+            snap["avg_wait_ms"] = round(sum(waits) / len(waits), 3)
+            snap["p99_wait_ms"] = round(waits[min(len(waits) - 1, int(len(waits) * 0.99))], 3)
+        else:
+            snap["avg_wait_ms"] = snap["p99_wait_ms"] = 0.0
+        return snap
+
+
+class DBExecutor:
+    """API async sobre un SQLitePool: las escrituras se serializan en un único hilo."""
+
+    def __init__(self, pool: SQLitePool, readers: int = config.DB_READER_THREADS,
+                 on_job: Optional[Callable[[str, float, float, bool], None]] = None):
+        self.pool = pool
+        self.readers = readers
+        self.on_job = on_job  # (kind, espera_s, duración_s, ok) desde el hilo que ejecutó el trabajo
+        self._writer, self._readers = self._new_executors()
+        self._stats = {"read": _QueueStats(), "write": _QueueStats()}
+
+    def _new_executors(self):
+        # Los hilos se crean recién con el primer submit, así que esto es barato
+        return (ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer"),
+                ThreadPoolExecutor(max_workers=self.readers, thread_name_prefix="db-reader"))
+
+    def _wrap(self, kind: str, job: Callable[[], Any]) -> Callable[[], Any]:
+        stats = self._stats[kind]
+        submitted_at = time.perf_counter()
+        stats.submitted()
+        # run_in_executor no propaga contextvars (a diferencia de asyncio.to_thread)
+        context = contextvars.copy_context()
+
+        def run():
+            started_at = time.perf_counter()
+            stats.started((started_at - submitted_at) * 1000)
+            ok = False
+            try:
+                result = context.run(job)
+                ok = True
+                return result
+            finally:
+                stats.finished(ok)
+                if self.on_job is not None:
+                    self.on_job(kind, started_at - submitted_at, time.perf_counter() - started_at, ok)
+
+        return run
+
+    async def read(self, fn: Callable[..., Any], *args) -> Any:
+        """Ejecuta fn(conn, *args) en un hilo lector."""
+        job = self._wrap("read", lambda: fn(self.pool.connection(), *args))
+        return await asyncio.get_running_loop().run_in_executor(self._readers, job)
+
+    async def write(self, fn: Callable[..., Any], *args) -> Any:
+        """Ejecuta fn(conn, *args) dentro de una transacción en el hilo escritor."""
+        def job():
+            with self.pool.transaction() as conn:
+                return fn(conn, *args)
+
+        return await asyncio.get_running_loop().run_in_executor(self._writer, self._wrap("write", job))
+
+    async def fetchall(self, sql: str, params: Sequence = ()) -> List[Dict[str, Any]]:
+        """SELECT que devuelve todas las filas como dicts."""
+        return await self.read(lambda conn: [dict(row) for row in conn.execute(sql, params)])
+
+    async def fetchone(self, sql: str, params: Sequence = ()) -> Optional[Dict[str, Any]]:
+        """SELECT que devuelve la primera fila como dict (o None)."""
+        def query(conn):
+            row = conn.execute(sql, params).fetchone()
+            return dict(row) if row else None
+
+        return await self.read(query)
+
+    async def execute(self, sql: str, params: Sequence = ()) -> int:
+        """INSERT/UPDATE/DELETE en el hilo escritor; devuelve lastrowid."""
+        return await self.write(lambda conn: conn.execute(sql, params).lastrowid)
+
+    def stats(self) -> Dict[str, Any]:
+        """Profundidad de cola y tiempos de espera de lectores y escritor."""
+        return {kind: stats.snapshot() for kind, stats in self._stats.items()}
+
+    def shutdown(self):
+        """Espera a que terminen los trabajos pendientes y cierra las conexiones."""
+        writer, readers = self._writer, self._readers
+        self._writer, self._readers = self._new_executors()
+        writer.shutdown(wait=True)
+        readers.shutdown(wait=True)
+        self.pool.close_all()
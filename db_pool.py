@@ -0,0 +1,95 @@
+"""
+Jazmín OS - SQLite Connection Pool
+===================================
+Conexiones SQLite reutilizables (una por hilo) en modo WAL.
+"""
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Union
+
+import config
+
+
+class SQLitePool:
+    """Pool de conexiones SQLite: cada hilo reutiliza su propia conexión."""
+
+    def __init__(self, path: Union[str, Path],
+                 busy_timeout_ms: int = config.DB_BUSY_TIMEOUT_MS,
+                 statement_cache: int = config.DB_STATEMENT_CACHE):
+        self.path = str(path)
+        self.busy_timeout_ms = busy_timeout_ms
+        self.statement_cache = statement_cache
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: List[sqlite3.Connection] = []
+        self.on_statement: Optional[Callable[[str], None]] = None  # cada SQL ejecutado, desde el hilo de la conexión
+
+    def set_statement_hook(self, hook: Optional[Callable[[str], None]]):
+        """Instala (o quita, con None) el trace callback en las conexiones actuales y futuras."""
+        with self._lock:
+            self.on_statement = hook
+            for conn in self._connections:
+                conn.set_trace_callback(hook)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout_ms / 1000,
+            cached_statements=self.statement_cache,
+            check_same_thread=False,
+        )
+        conn.row_factory = sqlite3.Row
+        # Solo tiene efecto en una base nueva; las existentes se convierten con retention.compact()
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        with self._lock:
+            if self.on_statement is not None:
+                conn.set_trace_callback(self.on_statement)
+            self._connections.append(conn)
+        return conn
+
+    def connection(self) -> sqlite3.Connection:
+        """Devuelve la conexión del hilo actual, creándola si hace falta."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Context manager que hace commit al salir (o rollback si hay error)."""
+        conn = self.connection()
+        with conn:
+            yield conn
+
+    def close_all(self):
+        """Cierra todas las conexiones abiertas por el pool."""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:
+                pass
+        self._local = threading.local()
+
+
+_pools: Dict[str, SQLitePool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path: Union[str, Path]) -> SQLitePool:
+    """Devuelve el pool compartido para una ruta de base de datos."""
+    key = str(path)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = SQLitePool(key)
+        return pool
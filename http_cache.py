@@ -0,0 +1,61 @@
+"""
+Jazmín OS - HTTP Cache
+=======================
+ETag / If-None-Match para los endpoints que el dashboard consulta seguido.
+Los ETags se arman con contadores de versión que se incrementan en cada
+escritura, así un 304 no necesita tocar la base.
+"""
+
+import hashlib
+import json
+import time
+import zlib
+from typing import Any, Dict
+
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+
+# Distingue procesos: los contadores arrancan de cero en cada reinicio
+BOOT_ID = format(int(time.time() * 1000), "x")
+
+_versions: Dict[str, int] = {}
+
+
+def bump(name: str):
+    """Marca que el recurso `name` cambió."""
+    _versions[name] = _versions.get(name, 0) + 1
+
+
+def version(name: str) -> int:
+    return _versions.get(name, 0)
+
+
+def version_etag(name: str, request: Request = None) -> str:
+    """ETag débil a partir del contador de versión (y de la query string, si se pasa)."""
+    tag = f"{name}-{BOOT_ID}-{version(name)}"
+    if request is not None and request.url.query:
+        tag += f"-{zlib.crc32(request.url.query.encode()):x}"
+    return f'W/"{tag}"'
+
+
+def content_etag(content: Any) -> str:
+    """ETag a partir del contenido serializado."""
+    digest = hashlib.blake2b(json.dumps(content, default=str).encode(), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+def not_modified(request: Request, etag: str) -> bool:
+    """True si el If-None-Match del cliente ya tiene este ETag."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+def not_modified_response(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+def json_response(content: Any, etag: str) -> JSONResponse:
+    return JSONResponse(content=content, headers={"ETag": etag})
@@ -0,0 +1,169 @@
+"""
+Jazmín OS - Log Store
+======================
+Consultas sobre la tabla logs: índices, filtros, paginación por keyset
+y búsqueda full-text (FTS5).
+"""
+
+import argparse
+import html
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+LOG_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_logs_timestamp ON logs(timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_logs_agent_level_ts ON logs(agent_name, level, timestamp)",
+]
+
+# Índice FTS5 "external content": guarda solo el índice, el texto sigue en logs
+LOGS_FTS_SCHEMA = [
+    '''CREATE VIRTUAL TABLE IF NOT EXISTS logs_fts USING fts5(
+        message, agent_name,
+        content='logs', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )''',
+    '''CREATE TRIGGER IF NOT EXISTS logs_fts_ai AFTER INSERT ON logs BEGIN
+        INSERT INTO logs_fts(rowid, message, agent_name) VALUES (new.id, new.message, new.agent_name);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS logs_fts_ad AFTER DELETE ON logs BEGIN
+        INSERT INTO logs_fts(logs_fts, rowid, message, agent_name)
+        VALUES ('delete', old.id, old.message, old.agent_name);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS logs_fts_au AFTER UPDATE OF message, agent_name ON logs BEGIN
+        INSERT INTO logs_fts(logs_fts, rowid, message, agent_name)
+        VALUES ('delete', old.id, old.message, old.agent_name);
+        INSERT INTO logs_fts(rowid, message, agent_name) VALUES (new.id, new.message, new.agent_name);
+    END''',
+]
+
+MAX_PAGE_SIZE = 1000
+
+
+def create_indexes(conn: sqlite3.Connection):
+    """Crea los índices de logs (idempotente)."""
+    for sql in LOG_INDEXES:
+        conn.execute(sql)
+
+
+def create_fts(conn: sqlite3.Connection):
+    """Crea la tabla FTS5 y sus triggers; si es nueva, la llena con los logs existentes."""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'logs_fts'"
+    ).fetchone()
+    for sql in LOGS_FTS_SCHEMA:
+        conn.execute(sql)
+    if not exists:
+        rebuild_fts(conn)
+
+
+def rebuild_fts(conn: sqlite3.Connection) -> int:
+    """Reconstruye el índice full-text desde la tabla logs. Devuelve la cantidad de logs."""
+    conn.execute("INSERT INTO logs_fts(logs_fts) VALUES ('rebuild')")
+    return conn.execute("SELECT COUNT(*) FROM logs").fetchone()[0]
+
+
+def _fts_query(q: str) -> str:
+    """Convierte texto libre en una consulta FTS5 segura: cada término entre comillas,
+    con soporte de prefijo ("conex*")."""
+    terms = []
+    for term in q.split():
+        prefix = term.endswith("*")
+        term = term.rstrip("*").replace('"', '""')
+        if term:
+            terms.append(f'"{term}"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+# Marcadores que no aparecen en texto normal: el mensaje se escapa como HTML
+# y recién después se cambian por <mark> (el contenido de los logs no es confiable)
+MARK_START, MARK_END = "\x02", "\x03"
+
+
+def _highlight_html(text: Optional[str]) -> Optional[str]:
+    if text is None:
+        return None
+    return html.escape(text).replace(MARK_START, "<mark>").replace(MARK_END, "</mark>")
+
+
+def search_logs(conn: sqlite3.Connection, q: str, limit: int = 50, offset: int = 0,
+                agent: Optional[str] = None, level: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Busca en mensaje y agente, ordenado por relevancia (bm25), con el match resaltado."""
+    match = _fts_query(q)
+    if not match:
+        return []
+    sql = '''
+        SELECT logs.*,
+               bm25(logs_fts) AS rank,
+               highlight(logs_fts, 0, ?, ?) AS highlight
+        FROM logs_fts JOIN logs ON logs.id = logs_fts.rowid
+        WHERE logs_fts MATCH ?
+    '''
+    params: List[Any] = [MARK_START, MARK_END, match]
+    if agent:
+        sql += " AND logs.agent_name = ?"
+        params.append(agent)
+    if level:
+        sql += " AND logs.level = ?"
+        params.append(level)
+    sql += " ORDER BY rank LIMIT ? OFFSET ?"
+    params += [max(1, min(limit, MAX_PAGE_SIZE)), max(0, offset)]
+    return [{**row, "highlight": _highlight_html(row["highlight"])}
+            for row in map(dict, conn.execute(sql, params))]
+
+
+def query_logs(conn: sqlite3.Connection, limit: int = 50,
+               agent: Optional[str] = None, level: Optional[str] = None,
+               since: Optional[str] = None, until: Optional[str] = None,
+               before_id: Optional[int] = None, after_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Logs más recientes primero, filtrados y paginados por (timestamp, id).
+
+    before_id devuelve la página siguiente (más vieja) a partir de ese log;
+    after_id devuelve la página anterior (más nueva). Ninguno usa OFFSET,
+    así que el costo no crece con la profundidad de la página.
+    """
+    where, params = [], []
+    if agent:
+        where.append("agent_name = ?")
+        params.append(agent)
+    if level:
+        where.append("level = ?")
+        params.append(level)
+    if since:
+        where.append("timestamp >= ?")
+        params.append(since)
+    if until:
+        where.append("timestamp < ?")
+        params.append(until)
+
+    ascending = False
+    if before_id is not None:
+        where.append("(timestamp, id) < (SELECT timestamp, id FROM logs WHERE id = ?)")
+        params.append(before_id)
+    elif after_id is not None:
+        where.append("(timestamp, id) > (SELECT timestamp, id FROM logs WHERE id = ?)")
+        params.append(after_id)
+        ascending = True
+
+    sql = "SELECT * FROM logs"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    order = "ASC" if ascending else "DESC"
+    sql += f" ORDER BY timestamp {order}, id {order} LIMIT ?"
+    params.append(max(1, min(limit, MAX_PAGE_SIZE)))
+
+    rows = [dict(row) for row in conn.execute(sql, params)]
+    if ascending:
+        rows.reverse()
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mantenimiento del índice full-text de logs")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--db", default="jazmin_os.db", help="ruta a la base SQLite")
+    args = parser.parse_args()
+
+    with sqlite3.connect(args.db) as conn:
+        for sql in LOGS_FTS_SCHEMA:
+            conn.execute(sql)
+        print(f"✅ Índice FTS reconstruido ({rebuild_fts(conn)} logs)")
@@ -0,0 +1,143 @@
+"""
+Jazmín OS - Log Writer
+=======================
+Cola de ingesta de logs con group commit: las inserciones de todos los
+requests concurrentes se agrupan en una sola transacción cada N ms o M filas.
+
+"Durable" significa commiteado en SQLite, no en disco: con journal WAL y
+synchronous=NORMAL (db_pool) un commit sobrevive a que se caiga el proceso,
+pero los últimos commits pueden perderse si se corta la luz o cae el SO.
+
+La cola está acotada en filas (LOG_QUEUE_MAX_ROWS): cuando está llena, un
+submit no durable se degrada a durable y espera al commit, así el productor
+frena en vez de hacer crecer la memoria.
+"""
+
+import asyncio
+import sqlite3
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import config
+from db_executor import DBExecutor
+
+# (agent_name, level, message, timestamp)
+LogRow = Tuple[str, str, str, str]
+
+INSERT_LOG_SQL = "INSERT INTO logs (agent_name, level, message, timestamp) VALUES (?, ?, ?, ?)"
+
+
+def _insert_groups(conn: sqlite3.Connection, groups: List[Sequence[LogRow]]) -> List[List[int]]:
+    ids = []
+    for rows in groups:
+        ids.append([conn.execute(INSERT_LOG_SQL, row).lastrowid for row in rows])
+    return ids
+
+
+class LogWriter:
+    """Agrupa inserciones de logs y las escribe en una única transacción."""
+
+    def __init__(self, db: DBExecutor,
+                 max_rows: int = config.LOG_BATCH_MAX_ROWS,
+                 max_delay_ms: float = config.LOG_BATCH_MAX_DELAY_MS,
+                 max_pending_rows: int = config.LOG_QUEUE_MAX_ROWS,
+                 on_commit: Optional[Callable[[List[Tuple[int, LogRow]]], None]] = None):
+        self.db = db
+        self.on_commit = on_commit  # recibe [(id, row), ...] de cada commit
+        self.max_rows = max_rows
+        self.max_delay = max_delay_ms / 1000
+        self.max_pending_rows = max_pending_rows
+        self.commits = 0
+        self.rows_written = 0
+        self.degraded = 0  # submits async que esperaron al commit por cola llena
+        self._queue: Optional[asyncio.Queue] = None
+        self._full: Optional[asyncio.Event] = None
+        self._pending_rows = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Inicia el loop de group commit (llamar desde el startup de la app)."""
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._full = asyncio.Event()
+            self._pending_rows = 0
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Escribe lo que quede en cola y detiene el loop."""
+        if self._task is not None:
+            self._queue.put_nowait(None)
+            self._full.set()
+            await self._task
+            self._task = None
+
+    async def submit(self, rows: Sequence[LogRow], durable: bool = True) -> Optional[List[int]]:
+        """Encola filas. Si durable, espera al commit y devuelve los ids asignados.
+
+        Sin durable devuelve None al encolar, salvo que la cola esté llena: en
+        ese caso espera al commit igual y devuelve los ids.
+        """
+        if not rows:
+            return [] if durable else None
+        if not durable and self._pending_rows + len(rows) > self.max_pending_rows:
+            durable = True
+            self.degraded += 1
+        future = asyncio.get_running_loop().create_future() if durable else None
+        self._queue.put_nowait((rows, future))
+        self._pending_rows += len(rows)
+        if self._pending_rows >= self.max_rows:
+            self._full.set()
+        if future is not None:
+            return await future
+        return None
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            batch = []
+            if first is None:
+                stopping = True
+            else:
+                batch.append(first)
+                if self._pending_rows < self.max_rows:
+                    self._full.clear()
+                    try:
+                        await asyncio.wait_for(self._full.wait(), self.max_delay)
+                    except asyncio.TimeoutError:
+                        pass
+
+            # Drenar lo que ya está en cola, hasta max_rows (o todo si estamos parando)
+            count = sum(len(rows) for rows, _ in batch)
+            while not self._queue.empty() and (stopping or count < self.max_rows):
+                item = self._queue.get_nowait()
+                if item is None:
+                    stopping = True
+                    continue
+                batch.append(item)
+                count += len(item[0])
+            self._pending_rows -= count
+            if batch:
+                await self._commit(batch)
+
+    async def _commit(self, batch: List[Tuple[Sequence[LogRow], Optional[asyncio.Future]]]):
+        try:
+            ids = await self.db.write(_insert_groups, [rows for rows, _ in batch])
+        except Exception as e:
+            print(f"[LogWriter] Error escribiendo {len(batch)} lotes: {e}")
+            for _, future in batch:
+                if future is not None and not future.done():
+                    future.set_exception(e)
+            return
+
+        self.commits += 1
+        for (rows, future), row_ids in zip(batch, ids):
+            self.rows_written += len(rows)
+            if future is not None and not future.done():
+                future.set_result(row_ids)
+
+        if self.on_commit is not None:
+            try:
+                self.on_commit([(row_id, row) for (rows, _), row_ids in zip(batch, ids)
+                                for row_id, row in zip(row_ids, rows)])
+            except Exception as e:
+                print(f"[LogWriter] Error en on_commit: {e}")
@@ -1,25 +1,111 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, ValidationError, field_validator
 from datetime import datetime
-import sqlite3
+import asyncio
+import hmac
 import psutil
 import os
 import json
 from typing import List, Optional
 
+import config
+import database
+import http_cache
+import log_store
+import metrics_store
+import profiler
+import repository
+import run_output
+import run_stats
+import telemetry
+from agent_monitor import ResourceMonitor
+from dashboard import DashboardSummary
+from db_executor import DBExecutor
+from db_pool import get_pool
+from log_writer import LogWriter
+from presence import PresenceTracker
+from process_table import SORT_KEYS, process_table
+from retention import RetentionJob, default_rules
+from schemas import (AgentHeartbeat, ProjectCreate, ProjectResponse, ProjectWithTasks, TaskBatchUpdate,
+                     TaskCreate, TaskResponse, TaskUpdate)
+from scheduler import Scheduler
+from system_sampler import sampler
+from websocket_manager import manager
+
 app = FastAPI(title="Jazmín OS", description="Dashboard Personal de Agentes")
+app.add_middleware(telemetry.PrometheusMiddleware)
+if config.SLOW_REQUEST_MS > 0:
+    app.add_middleware(profiler.SlowRequestMiddleware)
 
 # Static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 
 # Database
-DB_PATH = "jazmin_os.db"
+DB_PATH = config.APP_DB_PATH
+db = DBExecutor(get_pool(DB_PATH))
+telemetry.instrument_db_executor("app", db)
+telemetry.instrument_db_executor("data", database.db)
+telemetry.instrument_ws(manager)
+if config.SLOW_REQUEST_MS > 0:
+    profiler.instrument_sqlite_pool("app", db.pool)
+    profiler.instrument_sqlite_pool("data", database.db.pool)
+if not repository.SHARED:
+    # Con la base compartida las sentencias ya pasan por el DBExecutor y su SQLitePool
+    telemetry.instrument_sqlalchemy(repository.engine)
+    if config.SLOW_REQUEST_MS > 0:
+        profiler.instrument_sqlalchemy(repository.engine)
+
+# Push de logs nuevos por WebSocket, una vez por commit del LogWriter
+def push_new_logs(committed):
+    http_cache.bump("logs")
+    logs = [{"id": log_id, "agent_name": agent_name, "level": level, "message": message, "timestamp": timestamp}
+            for log_id, (agent_name, level, message, timestamp) in committed]
+    dashboard_summary.logs_committed(logs)
+    if manager.subscribers:
+        for log in logs:
+            manager.broadcast_new_log(log)
+
+log_writer = LogWriter(db, on_commit=push_new_logs)
+
+
+def on_retention_report(report: dict):
+    if any(count for name, count in report["rows_deleted"].items() if name.startswith("logs")):
+        http_cache.bump("logs")
+
+retention = RetentionJob(default_rules(db, database.db), on_report=on_retention_report)
+rollups = metrics_store.RollupEngine(database.db)
+metrics_recorder = metrics_store.MetricsRecorder(rollups, sampler.boot_ts)
+resource_monitor = ResourceMonitor(database.db)
+dashboard_summary = DashboardSummary(db, database.db)
+
+
+def on_presence_change(entry):
+    update = {key: entry[key] for key in ("id", "name", "status", "last_seen", "is_online")}
+    dashboard_summary.agent_changed(update)
+    http_cache.bump("agents")
+    manager.broadcast_agent_update(update)
+
+presence = PresenceTracker(db, on_change=on_presence_change, on_flush=lambda: http_cache.bump("agents"))
+
+
+def on_run_start(run_id, job, pid):
+    resource_monitor.attach(run_id, job.name, pid)
+    manager.broadcast_run_status({"id": run_id, "agent_name": job.name, "status": "running"})
+
+def on_run_output(run_id, offset, data):
+    manager.broadcast_run_output(run_id, offset, data.decode(errors="replace"))
+
+def on_run_finish(run_id, job, status):
+    manager.broadcast_run_status({"id": run_id, "agent_name": job.name, "status": status})
+
+scheduler = Scheduler(database.db, on_start=on_run_start, on_output=on_run_output, on_finish=on_run_finish)
 
 def init_db():
-    conn = sqlite3.connect(DB_PATH)
+    conn = db.pool.connection()
     c = conn.cursor()
     c.execute('''CREATE TABLE IF NOT EXISTS agents (
         id INTEGER PRIMARY KEY,
@@ -38,6 +124,9 @@ def init_db():
         message TEXT,
         timestamp TEXT DEFAULT CURRENT_TIMESTAMP
     )''')
+    database.add_missing_columns(c, "agents", {"last_seen": "TEXT"})
+    log_store.create_indexes(conn)
+    log_store.create_fts(conn)
     c.execute('''CREATE TABLE IF NOT EXISTS metrics (
         id INTEGER PRIMARY KEY,
         metric_type TEXT,
@@ -45,11 +134,52 @@ def init_db():
         timestamp TEXT DEFAULT CURRENT_TIMESTAMP
     )''')
     conn.commit()
-    conn.close()
+
+async def push_system_metrics(snapshot: dict):
+    if "metrics" in manager.subscribers:
+        manager.broadcast_system_metrics(snapshot)
+
+async def push_processes(table):
+    # Un solo top por refresco, compartido por todos los clientes conectados
+    if "processes" in manager.subscribers:
+        manager.broadcast_processes(table.top())
 
 @app.on_event("startup")
 async def startup():
     init_db()
+    telemetry.loop_lag_monitor.start()
+    profiler.watchdog.start()
+    await presence.load()
+    await dashboard_summary.load(presence.agents)
+    presence.start()
+    manager.actions["heartbeat"] = ws_heartbeat
+    sampler.add_listener(metrics_recorder.record)
+    sampler.add_listener(push_system_metrics)
+    sampler.start()
+    process_table.add_listener(push_processes)
+    process_table.start()
+    log_writer.start()
+    retention.start()
+    if config.SCHEDULER_ENABLED:
+        await scheduler.load()
+        scheduler.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await scheduler.stop()
+    await sampler.stop()
+    await process_table.stop()
+    await resource_monitor.stop()
+    await presence.stop()
+    await metrics_recorder.flush()
+    await rollups.flush()
+    await retention.stop()
+    await log_writer.stop()
+    await telemetry.loop_lag_monitor.stop()
+    profiler.watchdog.stop()
+    repository.dispose()
+    db.shutdown()
+    database.db.shutdown()
 
 # Models
 class Agent(BaseModel):
@@ -61,101 +191,413 @@ class Agent(BaseModel):
     success_count: int = 0
     fail_count: int = 0
 
+class RunMonitorRequest(BaseModel):
+    pid: Optional[int] = None
+    cgroup: Optional[str] = None
+    interval: Optional[float] = None
+
 class LogEntry(BaseModel):
     id: Optional[int] = None
     agent_name: str
     level: str
-    message: str
+    message: str = Field(..., min_length=1)
     timestamp: Optional[str] = None
 
+    @field_validator("timestamp")
+    @classmethod
+    def _iso_timestamp(cls, value: Optional[str]) -> Optional[str]:
+        # Se guarda tal cual, pero tiene que ser ISO: retención, filtros y el dashboard la parsean
+        if value is not None:
+            datetime.fromisoformat(value)
+        return value
+
 # Routes
 @app.get("/")
 async def dashboard(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
+@app.get("/api/dashboard")
+async def get_dashboard(request: Request):
+    """Todo lo que necesita la página inicial en una sola respuesta (schemas.DashboardData)."""
+    body, etag = await dashboard_summary.get(sampler.snapshot)
+    if http_cache.not_modified(request, etag):
+        return http_cache.not_modified_response(etag)
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
 @app.get("/api/system")
 async def system_info():
-    cpu_percent = psutil.cpu_percent(interval=1)
-    memory = psutil.virtual_memory()
-    disk = psutil.disk_usage('/')
-    boot_time = datetime.fromtimestamp(psutil.boot_time()).strftime("%Y-%m-%d %H:%M:%S")
-    
-    return {
-        "cpu": {
-            "percent": cpu_percent,
-            "cores": psutil.cpu_count(),
-            "freq": psutil.cpu_freq()._asdict() if psutil.cpu_freq() else None
-        },
-        "memory": {
-            "total": memory.total // (1024**3),
-            "available": memory.available // (1024**3),
-            "percent": memory.percent,
-            "used": memory.used // (1024**3)
-        },
-        "disk": {
-            "total": disk.total // (1024**3),
-            "used": disk.used // (1024**3),
-            "free": disk.free // (1024**3),
-            "percent": (disk.used / disk.total) * 100
-        },
-        "boot_time": boot_time,
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    }
+    return sampler.latest()
+
+@app.get("/api/metrics/recent")
+async def metrics_recent(seconds: float = 300):
+    return {"seconds": seconds, **metrics_recorder.recent.window(seconds)}
+
+@app.get("/api/metrics/history")
+async def metrics_history(range: str = "1h", step: str = "1m"):
+    try:
+        range_seconds, step_seconds = metrics_store.parse_duration(range), metrics_store.parse_duration(step)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return await rollups.history(range_seconds, step_seconds, metrics_recorder.unflushed())
 
 @app.get("/api/agents")
-async def get_agents():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    c = conn.cursor()
-    c.execute("SELECT * FROM agents ORDER BY created_at DESC")
-    agents = [dict(row) for row in c.fetchall()]
-    conn.close()
-    return agents
+async def get_agents(request: Request):
+    etag = http_cache.version_etag("agents")
+    if http_cache.not_modified(request, etag):
+        return http_cache.not_modified_response(etag)
+    return http_cache.json_response(await db.fetchall("SELECT * FROM agents ORDER BY created_at DESC"), etag)
 
 @app.post("/api/agents")
 async def create_agent(agent: Agent):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('''INSERT INTO agents (name, status, last_run, next_run) 
-                 VALUES (?, ?, ?, ?)''',
-              (agent.name, agent.status, agent.last_run, agent.next_run))
-    conn.commit()
-    agent_id = c.lastrowid
-    conn.close()
-    return {"id": agent_id, **agent.dict()}
+    agent_id = await db.execute('''INSERT INTO agents (name, status, last_run, next_run) 
+                                   VALUES (?, ?, ?, ?)''',
+                                (agent.name, agent.status, agent.last_run, agent.next_run))
+    created = {**agent.dict(), "id": agent_id}
+    http_cache.bump("agents")
+    dashboard_summary.agent_changed({**created, "created_at": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")})
+    presence.agent_added(created)
+    manager.broadcast_agent_update(created)
+    return created
+
+@app.post("/api/agents/{name}/heartbeat")
+async def agent_heartbeat(name: str, heartbeat: AgentHeartbeat):
+    entry = presence.heartbeat(name, heartbeat.status, heartbeat.metadata)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Agente desconocido")
+    return {"name": name, "status": entry["status"], "is_online": True, "timeout": presence.timeout}
+
+async def ws_heartbeat(websocket: WebSocket, message: dict):
+    """{"action": "heartbeat", "agent": "<nombre>", "status": "online", "metadata": {...}}; sin respuesta si sale bien."""
+    try:
+        heartbeat = AgentHeartbeat(**{k: v for k, v in message.items() if k in ("status", "metadata")})
+        name = message["agent"]
+    except (KeyError, ValidationError):
+        return {"type": "error", "error": "heartbeat inválido"}
+    if not isinstance(name, str) or presence.heartbeat(name, heartbeat.status, heartbeat.metadata) is None:
+        return {"type": "error", "error": "agente desconocido"}
+    return None
+
+@app.get("/api/presence")
+async def presence_stats():
+    return presence.stats()
 
 @app.get("/api/logs")
-async def get_logs(limit: int = 50):
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    c = conn.cursor()
-    c.execute("SELECT * FROM logs ORDER BY timestamp DESC LIMIT ?", (limit,))
-    logs = [dict(row) for row in c.fetchall()]
-    conn.close()
-    return logs
+async def get_logs(request: Request, limit: int = 50, agent: Optional[str] = None, level: Optional[str] = None,
+                   since: Optional[str] = None, until: Optional[str] = None,
+                   before_id: Optional[int] = None, after_id: Optional[int] = None):
+    etag = http_cache.version_etag("logs", request)
+    if http_cache.not_modified(request, etag):
+        return http_cache.not_modified_response(etag)
+    logs = await db.read(log_store.query_logs, limit, agent, level, since, until, before_id, after_id)
+    return http_cache.json_response(logs, etag)
+
+def _log_row(log: LogEntry) -> tuple:
+    return (log.agent_name, log.level, log.message, log.timestamp or datetime.now().isoformat())
+
+@app.get("/api/logs/search")
+async def search_logs(q: str, limit: int = 50, offset: int = 0,
+                      agent: Optional[str] = None, level: Optional[str] = None):
+    items = await db.read(log_store.search_logs, q, limit, offset, agent, level)
+    next_offset = offset + len(items) if len(items) == limit else None
+    return {"query": q, "items": items, "next_offset": next_offset}
+
+@app.post("/api/logs/search/rebuild")
+async def rebuild_log_search():
+    return {"indexed": await db.write(log_store.rebuild_fts)}
 
 @app.post("/api/logs")
 async def add_log(log: LogEntry):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('''INSERT INTO logs (agent_name, level, message, timestamp) 
-                 VALUES (?, ?, ?, ?)''',
-              (log.agent_name, log.level, log.message, 
-               log.timestamp or datetime.now().isoformat()))
-    conn.commit()
-    log_id = c.lastrowid
-    conn.close()
-    return {"id": log_id, **log.dict()}
+    row = _log_row(log)
+    [log_id] = await log_writer.submit([row])
+    return {**log.dict(), "id": log_id, "timestamp": row[3]}
+
+@app.post("/api/logs/batch")
+async def add_logs_batch(request: Request, ack: str = "durable"):
+    """Acepta un array JSON de LogEntry o NDJSON (una entrada por línea).
+
+    ack=durable espera al commit y devuelve los ids; ack=async responde 202 al encolar,
+    o espera al commit (200 con ids) si la cola de ingesta está llena.
+    """
+    if ack not in ("durable", "async"):
+        raise HTTPException(status_code=400, detail="ack debe ser 'durable' o 'async'")
+    body = await request.body()
+    try:
+        if "ndjson" in request.headers.get("content-type", ""):
+            items = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            items = json.loads(body)
+            if not isinstance(items, list):
+                raise ValueError("se esperaba un array de logs")
+        entries = [LogEntry(**item) for item in items]
+    except (ValueError, TypeError, ValidationError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    rows = [_log_row(entry) for entry in entries]
+    ids = await log_writer.submit(rows, durable=ack == "durable")
+    if ids is None:
+        return JSONResponse(status_code=202, content={"accepted": len(rows)})
+    return {"accepted": len(rows), "ids": ids}
 
 @app.get("/api/processes")
-async def get_processes():
-    processes = []
-    for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent', 'status']):
-        try:
-            processes.append(proc.info)
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            pass
-    return sorted(processes, key=lambda x: x['cpu_percent'] or 0, reverse=True)[:20]
+async def get_processes(request: Request, limit: int = 20, sort: str = "cpu",
+                        name: Optional[str] = None, user: Optional[str] = None):
+    if sort not in SORT_KEYS:
+        raise HTTPException(status_code=422, detail=f"sort debe ser uno de: {', '.join(SORT_KEYS)}")
+    if process_table.sampled_at is None:
+        await asyncio.to_thread(process_table.refresh)
+    processes = process_table.top(limit, sort, name, user)
+    etag = http_cache.content_etag(processes)
+    if http_cache.not_modified(request, etag):
+        return http_cache.not_modified_response(etag)
+    return http_cache.json_response(processes, etag)
+
+def _task_dict(task) -> dict:
+    return TaskResponse.model_validate(task).model_dump(mode="json")
+
+@app.get("/api/projects")
+async def list_projects(status: Optional[str] = None, include_tasks: bool = False):
+    schema = ProjectWithTasks if include_tasks else ProjectResponse
+    projects = await repository.read(
+        lambda session: repository.ProjectRepository(session).list(status, with_tasks=include_tasks))
+    return [schema.model_validate(project).model_dump(mode="json") for project in projects]
+
+@app.post("/api/projects")
+async def create_project(project: ProjectCreate):
+    created = await repository.write(
+        lambda session: repository.ProjectRepository(session).create(**project.model_dump()))
+    created = ProjectResponse.model_validate(created).model_dump(mode="json")
+    dashboard_summary.project_added(created)
+    return created
+
+@app.get("/api/projects/{project_id}")
+async def get_project(project_id: int):
+    project = await repository.read(lambda session: repository.ProjectRepository(session).get_with_tasks(project_id))
+    if project is None:
+        raise HTTPException(status_code=404, detail="Proyecto no encontrado")
+    return ProjectWithTasks.model_validate(project).model_dump(mode="json")
+
+@app.get("/api/projects/{project_id}/tasks")
+async def list_project_tasks(project_id: int):
+    tasks = await repository.read(lambda session: repository.TaskRepository(session).for_project(project_id))
+    return [_task_dict(task) for task in tasks]
+
+@app.post("/api/tasks")
+async def create_task(task: TaskCreate):
+    created = await repository.write(lambda session: repository.TaskRepository(session).create(**task.model_dump()))
+    if created is None:
+        raise HTTPException(status_code=404, detail="Proyecto no encontrado")
+    created = _task_dict(created)
+    dashboard_summary.task_changed(None, created["status"])
+    manager.broadcast_task_update(created)
+    return created
+
+@app.post("/api/tasks/batch")
+async def create_tasks(tasks: List[TaskCreate]):
+    def create(session):
+        tasks_repo = repository.TaskRepository(session)
+        return tasks_repo.list_by_ids(tasks_repo.bulk_create([task.model_dump() for task in tasks]))
+
+    try:
+        created = [_task_dict(task) for task in await repository.write(create)]
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    for task in created:
+        dashboard_summary.task_changed(None, task["status"])
+        manager.broadcast_task_update(task)
+    return created
+
+@app.patch("/api/tasks/batch")
+async def update_tasks(changes: List[TaskBatchUpdate]):
+    results = await repository.write(lambda session: repository.TaskRepository(session).bulk_update(
+        [change.model_dump(exclude_unset=True) for change in changes]))
+    updated = []
+    for old_status, task in results:
+        task = _task_dict(task)
+        if old_status != task["status"]:
+            dashboard_summary.task_changed(old_status, task["status"])
+        manager.broadcast_task_update(task)
+        updated.append(task)
+    return updated
+
+@app.patch("/api/tasks/{task_id}")
+async def update_task(task_id: int, changes: TaskUpdate):
+    old_status, updated = await repository.write(lambda session: repository.TaskRepository(session).update(
+        task_id, changes.model_dump(exclude_unset=True)))
+    if updated is None:
+        raise HTTPException(status_code=404, detail="Tarea no encontrada")
+    updated = _task_dict(updated)
+    if old_status != updated["status"]:
+        dashboard_summary.task_changed(old_status, updated["status"])
+    manager.broadcast_task_update(updated)
+    return updated
+
+@app.delete("/api/tasks/{task_id}")
+async def delete_task(task_id: int):
+    deleted = await repository.write(lambda session: repository.TaskRepository(session).delete(task_id))
+    if deleted is None:
+        raise HTTPException(status_code=404, detail="Tarea no encontrada")
+    dashboard_summary.task_changed(deleted.status, None)
+    manager.broadcast_task_update({**_task_dict(deleted), "deleted": True})
+    return {"deleted": task_id}
+
+@app.get("/api/runs")
+async def list_runs(limit: int = 50, agent: Optional[str] = None, status: Optional[str] = None,
+                    before_id: Optional[int] = None):
+    return await database.db.read(run_stats.list_runs, limit, agent, status, before_id)
+
+def _since(since: str) -> str:
+    try:
+        return run_stats.since_cutoff(metrics_store.parse_duration(since))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+@app.get("/api/runs/stats")
+async def runs_stats(since: str = "7d", agent: Optional[str] = None):
+    return {"since": since, "agents": await database.db.read(run_stats.agent_stats, _since(since), agent)}
+
+@app.get("/api/runs/histogram")
+async def runs_histogram(since: str = "7d", agent: Optional[str] = None, buckets: int = 10):
+    if not 1 <= buckets <= 100:
+        raise HTTPException(status_code=422, detail="buckets debe estar entre 1 y 100")
+    histogram = await database.db.read(run_stats.duration_histogram, _since(since), agent, buckets)
+    return {"since": since, "agent": agent, **histogram}
+
+@app.get("/api/runs/{run_id}")
+async def get_run(run_id: int):
+    run = await database.get_agent_run(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Corrida no encontrada")
+    return run
+
+@app.get("/api/runs/{run_id}/output")
+async def run_output_range(run_id: int, offset: int = 0, limit: int = config.RUN_OUTPUT_CHUNK_SIZE):
+    """Tramo de la salida de una corrida; para seguirla, pedir desde next_offset o suscribirse a runs:<id>."""
+    run = await database.db.fetchone("SELECT status FROM agent_runs WHERE id = ?", (run_id,))
+    if run is None:
+        raise HTTPException(status_code=404, detail="Corrida no encontrada")
+    if offset < 0 or limit <= 0:
+        raise HTTPException(status_code=422, detail="offset debe ser >= 0 y limit > 0")
+    output = await database.db.read(run_output.read_output, run_id, offset, min(limit, 1024 * 1024))
+    return {**output, "status": run["status"], "complete": run["status"] != "running"}
+
+@app.post("/api/runs/{run_id}/monitor")
+async def monitor_run(run_id: int, body: RunMonitorRequest):
+    run = await database.db.fetchone("SELECT agent_name FROM agent_runs WHERE id = ?", (run_id,))
+    if run is None:
+        raise HTTPException(status_code=404, detail="Corrida no encontrada")
+    if body.pid is None and body.cgroup is None:
+        raise HTTPException(status_code=422, detail="Se necesita pid o cgroup")
+    if body.pid is not None and not psutil.pid_exists(body.pid):
+        raise HTTPException(status_code=404, detail=f"No existe el proceso {body.pid}")
+    resource_monitor.attach(run_id, run["agent_name"], body.pid, body.cgroup, body.interval)
+    return await resource_monitor.get(run_id)
+
+@app.delete("/api/runs/{run_id}/monitor")
+async def stop_monitor_run(run_id: int):
+    await resource_monitor.detach(run_id)
+    return await resource_monitor.get(run_id) or {}
+
+@app.get("/api/runs/{run_id}/resources")
+async def run_resources(run_id: int):
+    resources = await resource_monitor.get(run_id)
+    if resources is None:
+        raise HTTPException(status_code=404, detail="Sin datos de recursos para esta corrida")
+    return resources
+
+@app.get("/api/agents/{agent_name}/resources")
+async def agent_resources(agent_name: str, limit: int = 20):
+    return await resource_monitor.compare(agent_name, limit)
+
+@app.websocket("/ws")
+async def websocket_endpoint(websocket: WebSocket):
+    await manager.connect(websocket)
+    try:
+        while True:
+            await manager.handle_message(websocket, await websocket.receive_text())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        # Cualquier error en el lazo no debe dejar el cliente (y su tarea de envío) registrado
+        manager.disconnect(websocket)
+
+@app.get("/api/scheduler")
+async def scheduler_status():
+    return scheduler.status()
+
+@app.post("/api/scheduler/reload")
+async def reload_scheduler():
+    await scheduler.load()
+    dashboard_summary.invalidate()
+    return scheduler.status()
+
+def _require_admin(request: Request):
+    # Correr un job ejecuta su comando: sin ADMIN_TOKEN configurado no se expone
+    token = request.headers.get("X-Admin-Token", "")
+    if not config.ADMIN_TOKEN or not hmac.compare_digest(token.encode(), config.ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Requiere X-Admin-Token")
+
+@app.post("/api/scheduler/jobs/{name}/run")
+async def run_scheduled_job(name: str, request: Request):
+    _require_admin(request)
+    if name not in scheduler.jobs:
+        raise HTTPException(status_code=404, detail="Job no encontrado")
+    if not scheduler.run_now(name):
+        raise HTTPException(status_code=409, detail="El job ya está corriendo al máximo de su concurrencia")
+    return scheduler.jobs[name].to_dict()
+
+@app.get("/api/retention")
+async def retention_report():
+    return retention.last_report or {}
+
+@app.post("/api/retention/run")
+async def run_retention():
+    return await retention.run_once()
+
+@app.post("/api/retention/compact")
+async def compact_databases():
+    """VACUUM completo de las bases: bloquea las escrituras mientras dura."""
+    return {"bytes_reclaimed": await retention.compact()}
+
+@app.get("/api/db/stats")
+async def db_stats():
+    return {db.pool.path: db.stats(), database.db.pool.path: database.db.stats(),
+            "sqlalchemy_pool": repository.pool_status()}
+
+def _require_debug():
+    # Sin auth en la app: las herramientas de debug solo existen con DEBUG
+    if not config.DEBUG:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+@app.get("/api/debug/profile")
+async def debug_profile(seconds: float = 10, interval_ms: float = config.PROFILE_INTERVAL_MS,
+                        format: str = "collapsed", idle: bool = False):
+    """Muestrea todos los hilos durante `seconds`; collapsed = entrada de flamegraph.pl / speedscope."""
+    _require_debug()
+    if not 0 < seconds <= config.PROFILE_MAX_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds debe estar entre 0 y {config.PROFILE_MAX_SECONDS:g}")
+    if not 1 <= interval_ms <= 1000:
+        raise HTTPException(status_code=400, detail="interval_ms debe estar entre 1 y 1000")
+    if format not in ("collapsed", "json"):
+        raise HTTPException(status_code=400, detail="format debe ser collapsed o json")
+    if profiler.profiler.busy:
+        raise HTTPException(status_code=409, detail="Ya hay un perfil en curso")
+    profile = await profiler.profiler.run(seconds, interval_ms / 1000, idle)
+    if format == "json":
+        return {**profile, "stacks": [{"stack": stack.split(";"), "count": count}
+                                      for stack, count in profile["stacks"].most_common(100)]}
+    filename = f"jazmin-profile-{datetime.now():%Y%m%d-%H%M%S}.folded"
+    return PlainTextResponse(profiler.collapsed(profile),
+                             headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+@app.get("/api/debug/slow")
+async def debug_slow():
+    _require_debug()
+    return profiler.slow_snapshot()
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    # Con media_type Starlette le agregaría otro "; charset=utf-8" a CONTENT_TYPE
+    return Response(telemetry.registry.render(), headers={"Content-Type": telemetry.CONTENT_TYPE})
 
 @app.get("/api/health")
 async def health_check():
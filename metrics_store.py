@@ -0,0 +1,252 @@
+"""
+Jazmín OS - Metrics Store
+==========================
+Buffer en memoria de las muestras recientes, volcado en lotes a system_metrics,
+rollups incrementales (1m / 15m / 1h con min/avg/max/p95) y consulta de
+historial eligiendo el tier más grueso que alcanza la resolución.
+"""
+
+import math
+import re
+import sqlite3
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Sequence, Tuple
+
+import config
+import database
+from db_executor import DBExecutor
+from ring_buffer import MetricRing
+
+# Columnas de system_metrics (sin id ni timestamp), en el orden de la tabla
+SAMPLE_FIELDS = ("cpu_percent", "memory_percent", "memory_used_gb", "memory_total_gb",
+                 "disk_percent", "disk_used_gb", "disk_total_gb", "uptime_seconds")
+
+# Columnas de system_metrics que se agregan en rollups
+ROLLUP_METRICS = ("cpu_percent", "memory_percent", "disk_percent")
+
+# p95 no se puede combinar sin las muestras: al sumar una parte a un bucket
+# ya guardado (reinicio) queda el máximo de los p95, una cota superior
+UPSERT_ROLLUP_SQL = '''
+    INSERT INTO system_metrics_rollup (tier, metric, bucket_start, count, min, avg, max, p95)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (tier, metric, bucket_start) DO UPDATE SET
+        avg = (avg * count + excluded.avg * excluded.count) / (count + excluded.count),
+        count = count + excluded.count,
+        min = MIN(min, excluded.min),
+        max = MAX(max, excluded.max),
+        p95 = MAX(p95, excluded.p95)
+'''
+
+# (tier, metric, bucket_start, count, min, avg, max, p95)
+RollupRow = Tuple[int, str, int, int, float, float, float, float]
+
+_DURATION_RE = re.compile(r"^(\d+(?:\.\d+)?)([smhd]?)$")
+_DURATION_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_duration(value: str) -> int:
+    """'90', '90s', '15m', '6h', '7d' -> segundos."""
+    match = _DURATION_RE.match(value.strip().lower())
+    if not match:
+        raise ValueError(f"duración inválida: {value!r}")
+    return int(float(match.group(1)) * _DURATION_UNITS[match.group(2)])
+
+
+def sample_values(snapshot: Dict[str, Any], boot_ts: float) -> Dict[str, Any]:
+    """Convierte un snapshot del SystemSampler en una fila de system_metrics."""
+    return {
+        "cpu_percent": snapshot["cpu"]["percent"],
+        "memory_percent": snapshot["memory"]["percent"],
+        "memory_used_gb": snapshot["memory"]["used"],
+        "memory_total_gb": snapshot["memory"]["total"],
+        "disk_percent": snapshot["disk"]["percent"],
+        "disk_used_gb": snapshot["disk"]["used"],
+        "disk_total_gb": snapshot["disk"]["total"],
+        "uptime_seconds": int(datetime.fromisoformat(snapshot["sampled_at"]).timestamp() - boot_ts),
+    }
+
+
+def _summarize(tier: int, metric: str, start: int, values: List[float]) -> RollupRow:
+    ordered = sorted(values)
+    p95 = ordered[max(0, math.ceil(0.95 * len(ordered)) - 1)]
+    return (tier, metric, start, len(ordered), ordered[0], sum(ordered) / len(ordered), ordered[-1], p95)
+
+
+def _upsert_rollups(conn: sqlite3.Connection, rows: List[RollupRow]):
+    conn.executemany(UPSERT_ROLLUP_SQL, rows)
+
+
+class _OpenBucket:
+    """Bucket en curso de un tier: guarda las muestras para poder calcular el p95."""
+
+    def __init__(self, start: int):
+        self.start = start
+        self.values: Dict[str, List[float]] = {metric: [] for metric in ROLLUP_METRICS}
+
+    def rows(self, tier: int) -> List[RollupRow]:
+        return [_summarize(tier, metric, self.start, values)
+                for metric, values in self.values.items() if values]
+
+
+class RollupEngine:
+    """Mantiene los buckets abiertos de cada tier y persiste los que se cierran."""
+
+    def __init__(self, db: DBExecutor, tiers: Tuple[int, ...] = tuple(config.METRICS_ROLLUP_TIERS)):
+        self.db = db
+        self.tiers = tuple(sorted(tiers))
+        self._open: Dict[int, _OpenBucket] = {}
+
+    def add(self, ts: float, values: Dict[str, float]) -> List[RollupRow]:
+        """Suma una muestra a los buckets abiertos. Devuelve las filas de los buckets cerrados."""
+        closed: List[RollupRow] = []
+        for tier in self.tiers:
+            start = int(ts) - int(ts) % tier
+            bucket = self._open.get(tier)
+            if bucket is None or bucket.start != start:
+                if bucket is not None:
+                    closed.extend(bucket.rows(tier))
+                bucket = self._open[tier] = _OpenBucket(start)
+            for metric in ROLLUP_METRICS:
+                value = values.get(metric)
+                if value is not None:
+                    bucket.values[metric].append(float(value))
+        return closed
+
+    async def record(self, ts: float, values: Dict[str, float]):
+        """Agrega la muestra y escribe los buckets que se hayan cerrado."""
+        closed = self.add(ts, values)
+        if closed:
+            await self.db.write(_upsert_rollups, closed)
+
+    async def flush(self):
+        """Persiste los buckets parciales (al apagar). El upsert los combina al reabrir."""
+        rows = [row for tier, bucket in self._open.items() for row in bucket.rows(tier)]
+        self._open.clear()
+        if rows:
+            await self.db.write(_upsert_rollups, rows)
+
+    def pick_tier(self, step: int) -> int:
+        """Tier más grueso que no supera el step pedido (0 = muestras crudas)."""
+        candidates = [tier for tier in self.tiers if tier <= step]
+        return candidates[-1] if candidates else 0
+
+    async def history(self, range_seconds: int, step: int,
+                      pending: Sequence[Tuple[float, Dict[str, float]]] = ()) -> Dict[str, Any]:
+        """Serie de [now - range, now] agregada cada `step` segundos.
+
+        `pending` son las muestras que todavía no se volcaron a system_metrics
+        (MetricsRecorder.unflushed()); completan el tier crudo. Con rollups, el
+        p95 de un punto que junta varios buckets (o partes de un bucket guardadas
+        en distintos momentos) es el máximo de sus p95: una cota superior del
+        percentil, no el percentil; la respuesta lo indica con p95_upper_bound.
+        """
+        step = max(1, step)
+        tier = self.pick_tier(step)
+        since = int(time.time()) - range_seconds
+        if tier:
+            rows = await self.db.fetchall('''
+                SELECT (bucket_start / ?) * ? AS t, metric, SUM(count) AS count,
+                       MIN(min) AS min, SUM(avg * count) / SUM(count) AS avg,
+                       MAX(max) AS max, MAX(p95) AS p95
+                FROM system_metrics_rollup
+                WHERE tier = ? AND bucket_start >= ?
+                GROUP BY t, metric
+                ORDER BY t
+            ''', (step, step, tier, since))
+            # El bucket en curso todavía no está en la base: se suma desde memoria
+            bucket = self._open.get(tier)
+            if bucket is not None and bucket.start >= since:
+                for row in bucket.rows(tier):
+                    open_row = dict(zip(("tier", "metric", "t", "count", "min", "avg", "max", "p95"), row))
+                    open_row["t"] = (open_row["t"] // step) * step
+                    rows.append(open_row)
+        else:
+            selects = ", ".join(
+                f"MIN({m}) AS {m}_min, AVG({m}) AS {m}_avg, MAX({m}) AS {m}_max" for m in ROLLUP_METRICS
+            )
+            # Lo pendiente se tomó antes de consultar: si un volcado termina en el medio,
+            # esas filas quedan fuera del rango de la consulta y no se cuentan dos veces
+            until = int(pending[0][0]) if pending else None
+            raw = await self.db.fetchall(f'''
+                SELECT (CAST(strftime('%s', timestamp) AS INTEGER) / ?) * ? AS t, COUNT(*) AS count, {selects}
+                FROM system_metrics
+                WHERE timestamp >= datetime(?, 'unixepoch')
+                  AND (? IS NULL OR timestamp < datetime(?, 'unixepoch'))
+                GROUP BY t
+                ORDER BY t
+            ''', (step, step, since, until, until))
+            rows = [
+                {"t": r["t"], "metric": m, "count": r["count"], "min": r[f"{m}_min"],
+                 "avg": r[f"{m}_avg"], "max": r[f"{m}_max"], "p95": None}
+                for r in raw for m in ROLLUP_METRICS
+            ]
+            rows.extend(
+                {"t": int(ts) // step * step, "metric": m, "count": 1,
+                 "min": values[m], "avg": values[m], "max": values[m], "p95": None}
+                for ts, values in pending if ts >= since
+                for m in ROLLUP_METRICS if values.get(m) is not None
+            )
+
+        points: Dict[int, Dict[str, Any]] = {}
+        for row in rows:
+            point = points.setdefault(row["t"], {"t": row["t"]})
+            current = point.get(row["metric"])
+            summary = {key: row[key] for key in ("count", "min", "avg", "max", "p95")}
+            point[row["metric"]] = _merge(current, summary) if current else summary
+
+        return {
+            "range": range_seconds,
+            "step": step,
+            "tier": tier or "raw",
+            "p95_upper_bound": bool(tier),
+            "points": [points[t] for t in sorted(points)],
+        }
+
+
+def _merge(a: Dict[str, Any], b: Dict[str, Any]) -> Dict[str, Any]:
+    count = a["count"] + b["count"]
+    return {
+        "count": count,
+        "min": min(a["min"], b["min"]),
+        "avg": (a["avg"] * a["count"] + b["avg"] * b["count"]) / count,
+        "max": max(a["max"], b["max"]),
+        "p95": max(a["p95"], b["p95"]) if a["p95"] is not None and b["p95"] is not None else None,
+    }
+
+
+class MetricsRecorder:
+    """Recibe los snapshots del sampler: ring buffer en memoria, rollups y volcado en lotes."""
+
+    def __init__(self, rollups: RollupEngine, boot_ts: float,
+                 window_seconds: float = config.METRICS_RING_SECONDS,
+                 flush_every: int = config.METRICS_FLUSH_EVERY):
+        capacity = max(flush_every, int(window_seconds / config.SYSTEM_SAMPLE_INTERVAL) + 1)
+        self.recent = MetricRing(SAMPLE_FIELDS, capacity)
+        self.rollups = rollups
+        self.boot_ts = boot_ts
+        self.flush_every = flush_every
+        self._flushed = 0
+
+    def unflushed(self) -> List[Tuple[float, Dict[str, float]]]:
+        """Muestras del ring que todavía no están en system_metrics, en orden."""
+        _, rows = self.recent.rows_since(self._flushed)
+        return [(ts, dict(zip(SAMPLE_FIELDS, values))) for ts, *values in rows]
+
+    async def record(self, snapshot: Dict[str, Any]):
+        """Listener del SystemSampler."""
+        ts = datetime.fromisoformat(snapshot["sampled_at"]).timestamp()
+        values = sample_values(snapshot, self.boot_ts)
+        self.recent.append(ts, values)
+        if self.recent.written - self._flushed >= self.flush_every:
+            await self.flush()
+        await self.rollups.record(ts, values)
+
+    async def flush(self):
+        """Vuelca a system_metrics las muestras que todavía no se guardaron."""
+        seq, rows = self.recent.rows_since(self._flushed)
+        await database.save_system_metrics_batch([
+            (datetime.utcfromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S"), *values)
+            for ts, *values in rows
+        ])
+        self._flushed = seq
@@ -55,6 +55,9 @@ class Project(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     completed_at = Column(DateTime, nullable=True)
+    # Contadores mantenidos por triggers sobre tasks (ver database.TASK_COUNTER_TRIGGERS)
+    task_count = Column(Integer, default=0, nullable=False)
+    completed_tasks = Column(Integer, default=0, nullable=False)
     
     # Relaciones
     tasks = relationship("Task", back_populates="project", cascade="all, delete-orphan")
@@ -63,14 +66,12 @@ class Project(Base):
         return f"<Project {self.name}>"
     
     def update_progress(self):
-        """Calcula el progreso basado en tareas completadas."""
-        if not self.tasks:
+        """Calcula el progreso a partir de los contadores, sin cargar las tareas."""
+        if not self.task_count:
             self.progress = 0.0
             return
         
-        total = len(self.tasks)
-        completed = sum(1 for t in self.tasks if t.status == "completed")
-        self.progress = round((completed / total) * 100, 2)
+        self.progress = round((self.completed_tasks / self.task_count) * 100, 2)
 
 
 class Task(Base):
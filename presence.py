@@ -0,0 +1,150 @@
+"""
+Jazmín OS - Presence
+=====================
+Presencia de agentes en memoria a partir de heartbeats. Cada agente online
+tiene una entrada en un heap de vencimientos: el loop duerme hasta el
+próximo vencimiento y emite las transiciones online/offline. last_seen se
+persiste en lotes cada PRESENCE_FLUSH_INTERVAL segundos, nunca por latido.
+"""
+
+import asyncio
+import heapq
+import sqlite3
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import config
+from db_executor import DBExecutor
+
+
+def _flush_last_seen(conn: sqlite3.Connection, rows: List[Tuple[str, str, str]]):
+    conn.executemany("UPDATE agents SET last_seen = ?, status = ? WHERE name = ?", rows)
+
+
+class PresenceTracker:
+    """Mapa agente -> último latido, con vencimiento por heap."""
+
+    def __init__(self, db: DBExecutor, timeout: float = config.AGENT_TIMEOUT,
+                 flush_interval: float = config.PRESENCE_FLUSH_INTERVAL,
+                 on_change: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 on_flush: Optional[Callable[[], None]] = None):
+        self.db = db
+        self.timeout = timeout
+        self.flush_interval = flush_interval
+        self.on_change = on_change  # recibe la entrada del agente en cada transición
+        self.on_flush = on_flush    # después de cada lote escrito en agents
+        self.agents: Dict[str, Dict[str, Any]] = {}  # nombre -> {id, name, status, last_seen, is_online, metadata}
+        self._last_beat: Dict[str, float] = {}       # nombre -> monotonic del último latido
+        self._expiry: List[Tuple[float, str]] = []   # (vence, nombre), solo agentes online
+        self._dirty: set = set()
+        self._wake: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self.beats = 0
+
+    async def load(self):
+        """Carga los agentes conocidos; arrancan offline hasta su primer latido."""
+        for row in await self.db.fetchall("SELECT id, name, status, last_seen FROM agents"):
+            self.agents[row["name"]] = {**row, "is_online": False, "metadata": {}}
+
+    def agent_added(self, agent: Dict[str, Any]):
+        """Agente creado por otra vía (POST /api/agents)."""
+        self.agents.setdefault(agent["name"], {**agent, "is_online": False, "metadata": {}})
+
+    def _emit(self, entry: Dict[str, Any]):
+        if self.on_change is not None:
+            try:
+                self.on_change(entry)
+            except Exception as e:
+                print(f"[Presence] Error en on_change: {e}")
+
+    def heartbeat(self, name: str, status: str = "online",
+                  metadata: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Registra un latido sin tocar la base; None si el agente no existe (se crean con POST /api/agents)."""
+        entry = self.agents.get(name)
+        if entry is None:
+            return None
+        was_online = entry["is_online"]
+        changed = not was_online or entry.get("status") != status
+        entry.update(status=status, is_online=True, last_seen=datetime.utcnow().isoformat(),
+                     metadata=metadata or entry.get("metadata") or {})
+        self._last_beat[name] = time.monotonic()
+        self._dirty.add(name)
+        self.beats += 1
+        if not was_online:
+            heapq.heappush(self._expiry, (self._last_beat[name] + self.timeout, name))
+            if self._wake is not None:
+                self._wake.set()
+        if changed:
+            self._emit(entry)
+        return entry
+
+    def _expire(self, now: float):
+        while self._expiry and self._expiry[0][0] <= now:
+            _, name = heapq.heappop(self._expiry)
+            expires = self._last_beat.get(name, 0) + self.timeout
+            if expires > now:
+                # Latió después de encolarse: se reprograma con su vencimiento real
+                heapq.heappush(self._expiry, (expires, name))
+                continue
+            entry = self.agents[name]
+            entry.update(status="offline", is_online=False)
+            self._dirty.add(name)
+            self._emit(entry)
+
+    async def _expiry_loop(self):
+        while True:
+            self._wake.clear()
+            self._expire(time.monotonic())
+            timeout = self._expiry[0][0] - time.monotonic() if self._expiry else None
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def flush(self):
+        """Escribe last_seen/status de los agentes que cambiaron, en una sola transacción."""
+        if not self._dirty:
+            return
+        names, self._dirty = self._dirty, set()
+        rows = [(self.agents[name]["last_seen"], self.agents[name]["status"], name) for name in names]
+        try:
+            await self.db.write(_flush_last_seen, rows)
+        except Exception as e:
+            self._dirty |= names
+            print(f"[Presence] Error guardando last_seen: {e}")
+            return
+        if self.on_flush is not None:
+            self.on_flush()
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def is_online(self, name: str) -> bool:
+        entry = self.agents.get(name)
+        return bool(entry and entry["is_online"])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "agents": len(self.agents),
+            "online": sum(1 for entry in self.agents.values() if entry["is_online"]),
+            "heap_size": len(self._expiry),
+            "pending_writes": len(self._dirty),
+            "beats": self.beats,
+        }
+
+    def start(self):
+        """Inicia los loops de vencimiento y de flush (llamar desde el startup de la app)."""
+        if not self._tasks:
+            self._wake = asyncio.Event()
+            self._tasks = [asyncio.create_task(self._expiry_loop()), asyncio.create_task(self._flush_loop())]
+
+    async def stop(self):
+        """Detiene los loops y guarda lo pendiente."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.flush()
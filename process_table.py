@@ -0,0 +1,149 @@
+"""
+Jazmín OS - Process Table
+==========================
+Tabla de procesos de larga vida: conserva los handles de psutil.Process
+entre muestras (así cpu_percent y las tasas de I/O tienen referencia) y se
+refresca en segundo plano. Las consultas leen la última muestra en memoria.
+"""
+
+import asyncio
+import heapq
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import psutil
+
+import config
+
+SORT_KEYS = {
+    "cpu": "cpu_percent",
+    "memory": "memory_percent",
+    "io": "io_rate",
+}
+
+
+class ProcessTable:
+    """Muestrea todos los procesos en un intervalo fijo, reutilizando los handles."""
+
+    def __init__(self, interval: float = config.PROCESS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.rows: List[Dict[str, Any]] = []
+        self.sampled_at: Optional[float] = None
+        self._procs: Dict[int, psutil.Process] = {}
+        self._io: Dict[int, tuple] = {}  # pid -> (ts, bytes leídos + escritos)
+        self._task: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[["ProcessTable"], Awaitable[None]]] = []
+
+    def _handle(self, pid: int) -> Optional[psutil.Process]:
+        proc = self._procs.get(pid)
+        if proc is None:
+            try:
+                proc = psutil.Process(pid)
+                proc.cpu_percent(None)  # primera llamada: fija la referencia, devuelve 0
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                return None
+            self._procs[pid] = proc
+        return proc
+
+    def _read(self, proc: psutil.Process, now: float) -> Dict[str, Any]:
+        with proc.oneshot():
+            row = {
+                "pid": proc.pid,
+                "name": proc.name(),
+                "username": None,
+                "status": proc.status(),
+                "cpu_percent": proc.cpu_percent(None),
+                "memory_percent": proc.memory_percent(),
+                "io_rate": None,
+            }
+            try:
+                row["username"] = proc.username()
+            except (psutil.AccessDenied, KeyError):
+                pass
+            try:
+                io = proc.io_counters()
+            except (psutil.AccessDenied, AttributeError):
+                io = None
+        if io is not None:
+            total = io.read_bytes + io.write_bytes
+            previous = self._io.get(proc.pid)
+            if previous is not None and now > previous[0]:
+                row["io_rate"] = max(0.0, (total - previous[1]) / (now - previous[0]))
+            self._io[proc.pid] = (now, total)
+        return row
+
+    def refresh(self) -> List[Dict[str, Any]]:
+        """Muestrea todos los procesos (bloqueante; se corre en un thread)."""
+        now = time.monotonic()
+        pids = psutil.pids()
+        rows = []
+        for pid in pids:
+            proc = self._handle(pid)
+            if proc is None:
+                continue
+            try:
+                rows.append(self._read(proc, now))
+            except psutil.NoSuchProcess:
+                # Terminó (o el PID se reutilizó): se descarta el handle viejo
+                self._procs.pop(pid, None)
+                self._io.pop(pid, None)
+            except psutil.AccessDenied:
+                pass
+
+        alive = set(pids)
+        for pid in [pid for pid in self._procs if pid not in alive]:
+            del self._procs[pid]
+            self._io.pop(pid, None)
+
+        self.rows = rows
+        self.sampled_at = time.time()
+        return rows
+
+    def top(self, limit: int = 20, sort: str = "cpu", name: Optional[str] = None,
+            user: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Top-N de la última muestra, filtrado por nombre (substring) y usuario."""
+        field = SORT_KEYS[sort]
+        rows = self.rows
+        if name:
+            name = name.lower()
+            rows = [row for row in rows if name in (row["name"] or "").lower()]
+        if user:
+            rows = [row for row in rows if row["username"] == user]
+        return heapq.nlargest(limit, rows, key=lambda row: row[field] or 0)
+
+    def add_listener(self, listener: Callable[["ProcessTable"], Awaitable[None]]):
+        """Registra una corutina que se llama después de cada refresco."""
+        self._listeners.append(listener)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                print(f"[Processes] Error muestreando procesos: {e}")
+            else:
+                for listener in self._listeners:
+                    try:
+                        await listener(self)
+                    except Exception as e:
+                        print(f"[Processes] Error en listener {listener.__name__}: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Inicia el loop de refresco (llamar desde el startup de la app)."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Detiene el loop de refresco."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Instancia global de la tabla de procesos
+process_table = ProcessTable()
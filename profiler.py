@@ -0,0 +1,293 @@
+"""
+Jazmín OS - Profiler
+=====================
+Herramientas para cuando el dashboard se traba:
+
+- Profiler por muestreo bajo demanda: lee sys._current_frames() cada
+  `interval` durante N segundos y devuelve stacks colapsados (formato de
+  flamegraph.pl / speedscope).
+- Watchdog del event loop: un hilo le hace ping al loop y, si no responde
+  en LOOP_WATCHDOG_MS, vuelca el stack del hilo del loop (lo que lo bloquea).
+- Requests lentos: los que pasan SLOW_REQUEST_MS quedan en un ring en
+  memoria con su stack (dónde estaban esperando) y las consultas que hicieron.
+"""
+
+import asyncio
+import contextvars
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import config
+
+# Hojas de stack de hilos que solo esperan trabajo: se omiten salvo idle=True
+IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+    ("_base.py", "result"),
+}
+MAX_QUERY_CHARS = 500
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def _stack(frame) -> List[str]:
+    """Frames de la raíz a la hoja, como 'archivo:línea en función'."""
+    return [f"{entry.filename}:{entry.lineno} in {entry.name}"
+            for entry in traceback.extract_stack(frame)]
+
+
+def _await_chain(coro) -> list:
+    """Frames de una corrutina suspendida siguiendo sus awaits (Task.get_stack solo da el primero)."""
+    frames = []
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            break
+        frames.append(frame)
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return frames
+
+
+def _is_idle(frame) -> bool:
+    return (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in IDLE_LEAVES
+
+
+# --- Profiler por muestreo ---------------------------------------------------
+
+def sample(seconds: float, interval: float, idle: bool = False) -> Dict[str, Any]:
+    """Muestrea todos los hilos (bloqueante: correr fuera del loop)."""
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    me = threading.get_ident()
+    stacks: Counter = Counter()
+    samples = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for ident, frame in sys._current_frames().items():
+            if ident == me or (not idle and _is_idle(frame)):
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            if ident not in names:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+            labels.append(names.get(ident, f"thread-{ident}"))
+            stacks[";".join(reversed(labels))] += 1
+        samples += 1
+        time.sleep(interval)
+    return {"seconds": seconds, "interval_ms": interval * 1000, "samples": samples, "stacks": stacks}
+
+
+def collapsed(profile: Dict[str, Any]) -> str:
+    """Una línea 'frame;frame;... cuenta' por stack (entrada de flamegraph.pl)."""
+    return "".join(f"{stack} {count}\n" for stack, count in profile["stacks"].most_common())
+
+
+class Profiler:
+    """Un perfil a la vez: dos muestreos simultáneos se pisarían el costo."""
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+
+    @property
+    def busy(self) -> bool:
+        return self._lock.locked()
+
+    async def run(self, seconds: float, interval: float, idle: bool = False) -> Dict[str, Any]:
+        async with self._lock:
+            print(f"[Profiler] Muestreando {seconds:g}s cada {interval * 1000:g} ms")
+            return await asyncio.to_thread(sample, seconds, interval, idle)
+
+
+profiler = Profiler()
+
+
+# --- Watchdog del event loop -------------------------------------------------
+
+class LoopWatchdog:
+    """Hilo que detecta bloqueos del event loop y guarda el stack que lo bloquea."""
+
+    def __init__(self, threshold_ms: float = config.LOOP_WATCHDOG_MS, ring: int = config.SLOW_REQUEST_RING):
+        self.threshold = threshold_ms / 1000
+        self.blocks: deque = deque(maxlen=ring)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self.threshold <= 0 or self._thread is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        pong = threading.Event()
+        while not self._stop.is_set():
+            pong.clear()
+            sent = time.monotonic()
+            try:
+                self._loop.call_soon_threadsafe(pong.set)
+            except RuntimeError:  # loop cerrado
+                return
+            if not pong.wait(self.threshold):
+                self._blocked(sent, pong)
+            self._stop.wait(self.threshold / 2)
+
+    def _blocked(self, sent: float, pong: threading.Event):
+        frame = sys._current_frames().get(self._loop_thread)
+        stack = _stack(frame) if frame is not None else []
+        print(f"[Watchdog] Event loop bloqueado más de {self.threshold * 1000:g} ms en:\n  "
+              + "\n  ".join(stack[-12:]))
+        block = {"timestamp": datetime.now().isoformat(), "started": sent, "blocked_ms": None, "stack": stack}
+        self.blocks.append(block)
+        while not pong.wait(1):
+            if self._stop.is_set():
+                return
+        block["blocked_ms"] = round((time.monotonic() - sent) * 1000, 1)
+        print(f"[Watchdog] Event loop liberado tras {block['blocked_ms']} ms")
+
+    def during(self, start: float, end: float) -> Optional[Dict[str, Any]]:
+        """Primer bloqueo que empezó dentro de [start, end] (reloj monotonic)."""
+        for block in list(self.blocks):
+            if start <= block["started"] <= end:
+                return block
+        return None
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        return [{key: value for key, value in block.items() if key != "started"}
+                for block in reversed(self.blocks)]
+
+
+watchdog = LoopWatchdog()
+
+
+# --- Requests lentos ---------------------------------------------------------
+
+# Consultas del request en curso; se hereda a los hilos del DBExecutor y a SQLAlchemy
+_queries: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar("jazmin_request_queries", default=None)
+_request_start: contextvars.ContextVar[float] = contextvars.ContextVar("jazmin_request_start", default=0.0)
+
+slow_requests: deque = deque(maxlen=config.SLOW_REQUEST_RING)
+
+
+def record_query(db: str, sql: str):
+    """Anota una consulta en el request actual (no hace nada fuera de un request)."""
+    queries = _queries.get()
+    if queries is None or len(queries) >= config.SLOW_REQUEST_MAX_QUERIES:
+        return
+    queries.append({
+        "db": db,
+        "sql": " ".join(sql.split())[:MAX_QUERY_CHARS],
+        "at_ms": round((time.perf_counter() - _request_start.get()) * 1000, 2),
+        "thread": threading.current_thread().name,
+    })
+
+
+def instrument_sqlite_pool(db_name: str, pool):
+    pool.set_statement_hook(lambda sql: record_query(db_name, sql))
+
+
+def instrument_sqlalchemy(engine):
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        record_query("sqlalchemy", statement)
+
+
+class SlowRequestMiddleware:
+    """Middleware ASGI: a los SLOW_REQUEST_MS toma el stack de la tarea del request."""
+
+    def __init__(self, app, threshold_ms: float = config.SLOW_REQUEST_MS):
+        self.app = app
+        self.threshold = threshold_ms / 1000
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.threshold <= 0 or scope["path"].startswith("/api/debug/"):
+            return await self.app(scope, receive, send)
+        queries: list = []
+        queries_token = _queries.set(queries)
+        start = time.perf_counter()
+        start_token = _request_start.set(start)
+        started_at = time.monotonic()
+        status = 500
+        captured: Dict[str, Any] = {}
+        task = asyncio.current_task()
+
+        def capture():
+            # Con el loop libre la tarea está suspendida: su cadena de awaits dice qué espera
+            chain = _await_chain(task.get_coro())
+            frames = traceback.StackSummary.extract((frame, frame.f_lineno) for frame in chain)
+            captured["stack"] = [f"{entry.filename}:{entry.lineno} in {entry.name}" for entry in frames]
+            captured["at_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+        timer = asyncio.get_running_loop().call_later(self.threshold, capture)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            timer.cancel()
+            _queries.reset(queries_token)
+            _request_start.reset(start_token)
+            elapsed = time.perf_counter() - start
+            if elapsed >= self.threshold:
+                self._record(scope, status, elapsed, started_at, captured, queries)
+
+    @staticmethod
+    def _record(scope, status: int, elapsed: float, started_at: float, captured: Dict[str, Any], queries: list):
+        entry = {
+            "timestamp": datetime.now().isoformat(),
+            "method": scope["method"],
+            "path": scope["path"] + (f"?{scope['query_string'].decode()}" if scope.get("query_string") else ""),
+            "status": status,
+            "duration_ms": round(elapsed * 1000, 1),
+            "stack_source": "task",
+            "stack_at_ms": captured.get("at_ms"),
+            "stack": captured.get("stack"),
+            "queries": queries,
+        }
+        if entry["stack"] is None:
+            # El timer no llegó a correr: el loop estaba bloqueado (probablemente por este request)
+            block = watchdog.during(started_at, started_at + elapsed)
+            entry["stack_source"] = "watchdog" if block else None
+            entry["stack"] = block["stack"] if block else []
+        slow_requests.append(entry)
+        print(f"[Slow] {entry['method']} {entry['path']} {entry['duration_ms']} ms "
+              f"({len(queries)} consultas)")
+
+
+def slow_snapshot() -> Dict[str, Any]:
+    """Contenido de /api/debug/slow: requests lentos y bloqueos del loop, más nuevos primero."""
+    return {
+        "threshold_ms": config.SLOW_REQUEST_MS,
+        "watchdog_threshold_ms": config.LOOP_WATCHDOG_MS,
+        "requests": list(reversed(slow_requests)),
+        "loop_blocks": watchdog.snapshot(),
+    }
@@ -0,0 +1,250 @@
+"""
+Jazmín OS - Repository
+=======================
+Capa de acceso sobre los modelos SQLAlchemy (models.py). Con la URL por
+defecto (la base de database.py) las sesiones corren en los hilos del
+DBExecutor y sobre sus mismas conexiones: las lecturas en los lectores y
+las escrituras en el único hilo escritor, así SQLite sigue teniendo un solo
+escritor. Con otra DATABASE_URL (p.ej. Postgres) se usa un engine propio con
+pool configurable y las sesiones corren en hilos (asyncio.to_thread).
+Las relaciones se cargan con selectinload (una consulta extra por relación,
+no una por fila) y las altas/cambios masivos van en un solo executemany.
+
+Cubre proyectos y tareas. Agentes, logs y métricas siguen en SQL directo
+sobre la base de main.py: su esquema no es el de models.py y sus caminos
+calientes (LogWriter, presencia, FTS, rollups) dependen de ese SQL.
+"""
+
+import asyncio
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Type, TypeVar
+
+from sqlalchemy import create_engine, insert, select, update
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session, selectinload, sessionmaker
+from sqlalchemy.pool import SingletonThreadPool
+
+import config
+import database
+from models import Project, Task
+
+T = TypeVar("T")
+
+
+def _shares_data_db(url: str) -> bool:
+    """True si la URL apunta al mismo archivo SQLite que database.py."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite" or not parsed.database or parsed.database == ":memory:":
+        return False
+    return Path(parsed.database).resolve() == Path(database.DB_PATH).resolve()
+
+
+SHARED = _shares_data_db(config.DATABASE_URL)
+
+
+class _BorrowedConnection:
+    """Conexión del SQLitePool prestada a SQLAlchemy: close() no la cierra.
+
+    La dueña es el SQLitePool (la cierra db.shutdown()); sin esto, engine.dispose()
+    o SingletonThreadPool al descartar conexiones sobrantes la cerrarían debajo
+    del DBExecutor.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        object.__setattr__(self, "_conn", conn)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name: str, value: Any):
+        setattr(self._conn, name, value)
+
+    def close(self):
+        pass
+
+
+def _borrow_connection() -> _BorrowedConnection:
+    return _BorrowedConnection(database.pool.connection())
+
+
+def _create_engine(url: str = config.DATABASE_URL):
+    if SHARED:
+        # La conexión de cada hilo es la del SQLitePool del DBExecutor (PRAGMAs incluidos).
+        # SingletonThreadPool descarta las de más si hay más hilos que pool_size: el margen
+        # cubre lectores + escritor y los hilos nuevos tras un shutdown del executor.
+        # Sin reset al devolver: la transacción la maneja el DBExecutor.
+        return create_engine("sqlite://", creator=_borrow_connection, poolclass=SingletonThreadPool,
+                             pool_size=(config.DB_READER_THREADS + 1) * 2, pool_reset_on_return=None,
+                             echo=config.DB_ECHO)
+    return create_engine(url, echo=config.DB_ECHO, pool_pre_ping=True, pool_size=config.DB_POOL_SIZE,
+                         max_overflow=config.DB_MAX_OVERFLOW, pool_timeout=config.DB_POOL_TIMEOUT,
+                         pool_recycle=config.DB_POOL_RECYCLE)
+
+
+engine = _create_engine()
+SessionFactory = sessionmaker(engine, expire_on_commit=False)
+
+
+def _in_session(fn: Callable[[Session], T], commit: bool) -> T:
+    with SessionFactory() as session:
+        try:
+            result = fn(session)
+            if commit:
+                session.commit()
+            return result
+        except Exception:
+            session.rollback()
+            raise
+
+
+async def read(fn: Callable[[Session], T]) -> T:
+    """Ejecuta fn(session) en un hilo lector."""
+    if SHARED:
+        return await database.db.read(lambda conn: _in_session(fn, commit=False))
+    return await asyncio.to_thread(_in_session, fn, False)
+
+
+async def write(fn: Callable[[Session], T]) -> T:
+    """Ejecuta fn(session) y hace commit; con SQLite compartido, en el hilo escritor del DBExecutor."""
+    if SHARED:
+        return await database.db.write(lambda conn: _in_session(fn, commit=True))
+    return await asyncio.to_thread(_in_session, fn, True)
+
+
+def dispose():
+    # Con SQLite compartido solo suelta los préstamos; las conexiones las cierra db.shutdown()
+    engine.dispose()
+
+
+def pool_status() -> str:
+    return "DBExecutor (compartido)" if SHARED else engine.pool.status()
+
+
+class Repository:
+    """Operaciones comunes por clave primaria; cada subclase fija `model`."""
+
+    model: Type[database.Base]
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def get(self, pk: int):
+        return self.session.get(self.model, pk)
+
+    def list_by_ids(self, ids: Sequence[int]) -> List[Any]:
+        if not ids:
+            return []
+        result = self.session.execute(
+            select(self.model).where(self.model.id.in_(ids)).order_by(self.model.id)
+            .execution_options(populate_existing=True))
+        return list(result.scalars())
+
+    def bulk_create(self, rows: List[Dict[str, Any]]) -> List[int]:
+        """INSERT masivo (executemany con RETURNING donde el backend lo soporta); devuelve los ids."""
+        if not rows:
+            return []
+        query = insert(self.model).returning(self.model.id, sort_by_parameter_order=True)
+        result = self.session.execute(query, rows)
+        return list(result.scalars())
+
+    def bulk_update(self, rows: List[Dict[str, Any]]):
+        """UPDATE masivo por clave primaria: cada dict trae `id` y las columnas a cambiar."""
+        if rows:
+            self.session.execute(update(self.model), rows)
+
+
+class ProjectRepository(Repository):
+    model = Project
+
+    def list(self, status: Optional[str] = None, with_tasks: bool = False) -> List[Project]:
+        query = select(Project).order_by(Project.priority, Project.id)
+        if status:
+            query = query.where(Project.status == status)
+        if with_tasks:
+            query = query.options(selectinload(Project.tasks))
+        return list(self.session.execute(query).scalars())
+
+    def get_with_tasks(self, project_id: int) -> Optional[Project]:
+        query = select(Project).where(Project.id == project_id).options(selectinload(Project.tasks))
+        return self.session.execute(query).scalar_one_or_none()
+
+    def create(self, **fields) -> Project:
+        project = Project(**fields)
+        self.session.add(project)
+        self.session.flush()
+        return project
+
+
+TASK_UPDATE_FIELDS = ("title", "description", "status", "priority")
+
+
+def _task_changes(changes: Dict[str, Any], old_status: str, now: datetime) -> Dict[str, Any]:
+    changes = {k: v for k, v in changes.items() if k in TASK_UPDATE_FIELDS}
+    if "status" in changes and changes["status"] != old_status:
+        changes["completed_at"] = now if changes["status"] == "completed" else None
+    changes["updated_at"] = now
+    return changes
+
+
+class TaskRepository(Repository):
+    model = Task
+
+    def for_project(self, project_id: int) -> List[Task]:
+        query = select(Task).where(Task.project_id == project_id).order_by(Task.priority, Task.id)
+        return list(self.session.execute(query).scalars())
+
+    def _existing_projects(self, project_ids) -> set:
+        query = select(Project.id).where(Project.id.in_(set(project_ids)))
+        return set(self.session.execute(query).scalars())
+
+    def create(self, **fields) -> Optional[Task]:
+        """Crea una tarea; None si el proyecto no existe."""
+        if not self._existing_projects([fields["project_id"]]):
+            return None
+        if fields.get("status") == "completed":
+            fields["completed_at"] = datetime.utcnow()
+        task = Task(**fields)
+        self.session.add(task)
+        self.session.flush()
+        return task
+
+    def bulk_create(self, rows: List[Dict[str, Any]]) -> List[int]:
+        """Alta masiva; si algún proyecto no existe falla el lote entero con ValueError."""
+        missing = {row["project_id"] for row in rows} - self._existing_projects(
+            row["project_id"] for row in rows)
+        if missing:
+            raise ValueError(f"Proyectos inexistentes: {sorted(missing)}")
+        now = datetime.utcnow()
+        rows = [{**row, "completed_at": now if row.get("status") == "completed" else None} for row in rows]
+        return super().bulk_create(rows)
+
+    def update(self, task_id: int, changes: Dict[str, Any]) -> Tuple[Optional[str], Optional[Task]]:
+        """Devuelve (status anterior, tarea actualizada), o (None, None) si no existe."""
+        task = self.get(task_id)
+        if task is None:
+            return None, None
+        old_status = task.status
+        for column, value in _task_changes(changes, old_status, datetime.utcnow()).items():
+            setattr(task, column, value)
+        self.session.flush()
+        return old_status, task
+
+    def bulk_update(self, changes: List[Dict[str, Any]]) -> List[Tuple[str, Task]]:
+        """Cambios masivos por id en un solo executemany; los ids inexistentes se ignoran."""
+        ids = [change["id"] for change in changes]
+        result = self.session.execute(select(Task.id, Task.status).where(Task.id.in_(ids)))
+        old_status = dict(result.all())
+        now = datetime.utcnow()
+        rows = [{"id": change["id"], **_task_changes(change, old_status[change["id"]], now)}
+                for change in changes if change["id"] in old_status]
+        super().bulk_update(rows)
+        return [(old_status[task.id], task) for task in self.list_by_ids(list(old_status))]
+
+    def delete(self, task_id: int) -> Optional[Task]:
+        task = self.get(task_id)
+        if task is not None:
+            self.session.delete(task)
+            self.session.flush()
+        return task
@@ -0,0 +1,234 @@
+"""
+Jazmín OS - Retention
+======================
+Borrado periódico de filas viejas (TTL por tabla y por nivel de log),
+en lotes chicos, con archivo opcional a NDJSON comprimido y vacuum incremental.
+Las bases creadas antes de auto_vacuum=INCREMENTAL se convierten solo con
+compact() (POST /api/retention/compact): es un VACUUM completo que bloquea
+al escritor mientras dura.
+"""
+
+import asyncio
+import gzip
+import json
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import config
+from db_executor import DBExecutor
+
+
+# Formatos de ts_column: el corte se arma igual que la columna para que la
+# comparación de strings sea correcta (' ' < 'T': mezclarlos corre el corte un día)
+UTC_SQL = "utc"      # CURRENT_TIMESTAMP de SQLite: UTC 'YYYY-MM-DD HH:MM:SS'
+LOCAL_ISO = "local"  # datetime.now().isoformat(): hora local 'YYYY-MM-DDTHH:MM:SS.ffffff'
+EPOCH = "epoch"      # segundos epoch (entero)
+
+
+def cutoff_for(ts_format: str, days: float) -> Union[str, int]:
+    """Valor de corte de `days` días atrás en el formato de la columna."""
+    if ts_format == EPOCH:
+        return int((datetime.now() - timedelta(days=days)).timestamp())
+    if ts_format == LOCAL_ISO:
+        return (datetime.now() - timedelta(days=days)).isoformat()
+    return (datetime.utcnow() - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class RetentionRule:
+    """Borra filas de `table` con `ts_column` más viejo que `days` (y que cumplan `where`)."""
+
+    def __init__(self, db: DBExecutor, table: str, ts_column: str, days: float,
+                 where: str = "", params: tuple = (), name: Optional[str] = None,
+                 ts_format: str = UTC_SQL):
+        self.db = db
+        self.table = table
+        self.ts_column = ts_column
+        self.days = days
+        self.where = where
+        self.params = params
+        self.name = name or table
+        self.ts_format = ts_format
+
+
+def default_rules(app_db: DBExecutor, data_db: DBExecutor) -> List[RetentionRule]:
+    """Reglas a partir de config: logs por nivel, agent_runs, system_metrics y sus rollups."""
+    levels = {k: v for k, v in config.LOG_RETENTION_DAYS.items() if k != "*"}
+    rules = [
+        RetentionRule(app_db, "logs", "timestamp", days, "level = ?", (level,), name=f"logs:{level}",
+                      ts_format=LOCAL_ISO)
+        for level, days in levels.items()
+    ]
+    if "*" in config.LOG_RETENTION_DAYS:
+        placeholders = ", ".join("?" for _ in levels)
+        rules.append(RetentionRule(
+            app_db, "logs", "timestamp", config.LOG_RETENTION_DAYS["*"],
+            f"(level IS NULL OR level NOT IN ({placeholders}))", tuple(levels), name="logs:*",
+            ts_format=LOCAL_ISO,
+        ))
+    rules.append(RetentionRule(data_db, "agent_runs", "started_at", config.AGENT_RUNS_RETENTION_DAYS))
+    rules.append(RetentionRule(data_db, "agent_run_resources", "started_at", config.AGENT_RUNS_RETENTION_DAYS,
+                               ts_format=LOCAL_ISO))
+    rules.append(RetentionRule(data_db, "agent_run_output", "created_at", config.AGENT_RUNS_RETENTION_DAYS))
+    rules.append(RetentionRule(data_db, "system_metrics", "timestamp", config.SYSTEM_METRICS_RETENTION_DAYS))
+    for tier, days in config.METRICS_ROLLUP_TIERS.items():
+        rules.append(RetentionRule(data_db, "system_metrics_rollup", "bucket_start", days,
+                                   "tier = ?", (tier,), name=f"system_metrics_rollup:{tier}", ts_format=EPOCH))
+    return rules
+
+
+def _delete_chunk(conn: sqlite3.Connection, rule: RetentionRule, cutoff: Union[str, int],
+                  chunk_size: int, archive_path: Optional[Path]) -> int:
+    sql = f"SELECT * FROM {rule.table} WHERE {rule.ts_column} < ?"
+    if rule.where:
+        sql += f" AND {rule.where}"
+    sql += " ORDER BY id LIMIT ?"
+    rows = conn.execute(sql, (cutoff, *rule.params, chunk_size)).fetchall()
+    if not rows:
+        return 0
+
+    # Se archiva antes de borrar, dentro de la misma transacción
+    if archive_path is not None:
+        with gzip.open(archive_path, "at", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(dict(row), default=str) + "\n")
+
+    ids = [row["id"] for row in rows]
+    conn.execute(f"DELETE FROM {rule.table} WHERE id IN ({', '.join('?' for _ in ids)})", ids)
+    return len(ids)
+
+
+def _db_size(conn: sqlite3.Connection) -> int:
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    return conn.execute("PRAGMA page_count").fetchone()[0] * page_size
+
+
+def _incremental(conn: sqlite3.Connection) -> bool:
+    return conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+
+def _vacuum(conn: sqlite3.Connection) -> Optional[int]:
+    """Devuelve los bytes liberados en disco, o None si la base todavía no es incremental."""
+    if not _incremental(conn):
+        return None
+    before = _db_size(conn)
+    # El pragma libera una página por cada step; execute() hace uno solo,
+    # executescript() lo corre hasta el final
+    conn.executescript("PRAGMA incremental_vacuum")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    return max(0, before - _db_size(conn))
+
+
+def _compact(conn: sqlite3.Connection) -> int:
+    """VACUUM completo (y conversión a auto_vacuum incremental). Reescribe toda la base."""
+    before = _db_size(conn)
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    conn.execute("VACUUM")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    return max(0, before - _db_size(conn))
+
+
+class RetentionJob:
+    """Aplica las reglas de retención cada `interval` segundos."""
+
+    def __init__(self, rules: List[RetentionRule],
+                 interval: float = config.RETENTION_INTERVAL,
+                 chunk_size: int = config.RETENTION_CHUNK_SIZE,
+                 archive_dir: Optional[Path] = config.RETENTION_ARCHIVE_DIR if config.RETENTION_ARCHIVE else None,
+                 on_report: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.rules = rules
+        self.on_report = on_report  # recibe el reporte de cada corrida
+        self.interval = interval
+        self.chunk_size = chunk_size
+        self.archive_dir = archive_dir
+        self.last_report: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    async def _apply(self, rule: RetentionRule, run_stamp: str) -> int:
+        cutoff = cutoff_for(rule.ts_format, rule.days)
+        archive_path = None
+        if self.archive_dir is not None:
+            self.archive_dir.mkdir(parents=True, exist_ok=True)
+            archive_path = self.archive_dir / f"{rule.table}-{run_stamp}.ndjson.gz"
+
+        deleted = 0
+        while True:
+            # Un lote por transacción: el escritor queda libre entre lotes
+            n = await rule.db.write(_delete_chunk, rule, cutoff, self.chunk_size, archive_path)
+            deleted += n
+            if n < self.chunk_size:
+                return deleted
+
+    async def run_once(self) -> Dict[str, Any]:
+        """Ejecuta todas las reglas y compacta las bases afectadas."""
+        async with self._lock:
+            started = datetime.now()
+            run_stamp = started.strftime("%Y%m%d-%H%M%S")
+            rows: Dict[str, int] = {}
+            for rule in self.rules:
+                rows[rule.name] = await self._apply(rule, run_stamp)
+
+            bytes_reclaimed: Dict[str, int] = {}
+            needs_compact: List[str] = []
+            for db in self._databases():
+                reclaimed = await db.write(_vacuum)
+                if reclaimed is None:
+                    needs_compact.append(db.pool.path)
+                else:
+                    bytes_reclaimed[db.pool.path] = reclaimed
+
+            self.last_report = {
+                "started_at": started.isoformat(),
+                "duration_ms": int((datetime.now() - started).total_seconds() * 1000),
+                "rows_deleted": rows,
+                "total_rows_deleted": sum(rows.values()),
+                "bytes_reclaimed": bytes_reclaimed,
+                "needs_compact": needs_compact,
+                "archive_dir": str(self.archive_dir) if self.archive_dir else None,
+            }
+            print(f"[Retention] {self.last_report['total_rows_deleted']} filas borradas, "
+                  f"{sum(bytes_reclaimed.values())} bytes liberados")
+            if self.on_report is not None:
+                self.on_report(self.last_report)
+            return self.last_report
+
+    def _databases(self) -> List[DBExecutor]:
+        return list({id(rule.db): rule.db for rule in self.rules}.values())
+
+    async def compact(self) -> Dict[str, int]:
+        """Mantenimiento explícito: VACUUM completo de cada base (bytes liberados por base).
+
+        Bloquea las escrituras de cada base mientras la reescribe; la primera vez
+        además la pasa a auto_vacuum incremental, que usa run_once() desde entonces.
+        """
+        async with self._lock:
+            reclaimed: Dict[str, int] = {}
+            for db in self._databases():
+                print(f"[Retention] VACUUM completo de {db.pool.path}")
+                reclaimed[db.pool.path] = await db.write(_compact)
+            return reclaimed
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"[Retention] Error: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Inicia el loop de retención (llamar desde el startup de la app)."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Detiene el loop de retención."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
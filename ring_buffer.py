@@ -0,0 +1,73 @@
+"""
+Jazmín OS - Ring Buffer
+========================
+Buffer circular de capacidad fija sobre array('d'): memoria acotada y
+sin asignaciones por muestra.
+"""
+
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class MetricRing:
+    """Guarda las últimas `capacity` muestras de varias series numéricas."""
+
+    def __init__(self, fields: Iterable[str], capacity: int):
+        self.fields = tuple(fields)
+        self.capacity = capacity
+        self._ts = array("d", bytes(8 * capacity))
+        self._series = {field: array("d", bytes(8 * capacity)) for field in self.fields}
+        self._head = 0      # próxima posición a escribir
+        self.written = 0    # total de muestras escritas (secuencia monótona)
+
+    def __len__(self) -> int:
+        return min(self.written, self.capacity)
+
+    def append(self, ts: float, values: Dict[str, float]):
+        """Escribe una muestra in-place, pisando la más vieja si el buffer está lleno."""
+        i = self._head
+        self._ts[i] = ts
+        for field in self.fields:
+            value = values.get(field)
+            self._series[field][i] = float("nan") if value is None else value
+        self._head = (i + 1) % self.capacity
+        self.written += 1
+
+    def _index(self, seq: int) -> int:
+        return seq % self.capacity
+
+    def window(self, seconds: float, now: Optional[float] = None) -> Dict[str, List[float]]:
+        """Muestras de los últimos `seconds` segundos, en orden cronológico. O(ventana)."""
+        cutoff = (now if now is not None else time.time()) - seconds
+        first = self.written
+        oldest = self.written - len(self)
+        while first > oldest and self._ts[self._index(first - 1)] >= cutoff:
+            first -= 1
+        return self._slice(first, self.written)
+
+    def _slice(self, start: int, end: int) -> Dict[str, List[float]]:
+        if start >= end:
+            return {"t": [], **{field: [] for field in self.fields}}
+        a, b = self._index(start), self._index(end)
+        if a < b:
+            parts = [(a, b)]
+        else:
+            parts = [(a, self.capacity), (0, b)]
+        result = {"t": [v for lo, hi in parts for v in self._ts[lo:hi]]}
+        for field in self.fields:
+            series = self._series[field]
+            # NaN marca valores faltantes; se devuelve como None (JSON no admite NaN)
+            result[field] = [v if v == v else None for lo, hi in parts for v in series[lo:hi]]
+        return result
+
+    def rows_since(self, seq: int) -> Tuple[int, List[Tuple[float, ...]]]:
+        """Filas (ts, *campos) escritas desde la secuencia `seq`.
+
+        Devuelve (nueva_secuencia, filas). Si el buffer ya pisó parte de ese
+        rango, devuelve solo lo que sigue disponible.
+        """
+        start = max(seq, self.written - len(self))
+        data = self._slice(start, self.written)
+        rows = list(zip(data["t"], *(data[field] for field in self.fields)))
+        return self.written, rows
@@ -0,0 +1,112 @@
+"""
+Jazmín OS - Run Output
+=======================
+Salida de las corridas de agentes guardada en chunks append-only
+(agent_run_output), a medida que se produce. La memoria durante la captura
+queda acotada a un chunk más la cola que se guarda en agent_runs.output.
+"""
+
+import sqlite3
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+import config
+from db_executor import DBExecutor
+
+
+def _insert_chunk(conn: sqlite3.Connection, run_id: int, offset: int, data: bytes):
+    conn.execute('''
+        INSERT INTO agent_run_output (run_id, offset, data, created_at)
+        VALUES (?, ?, ?, ?)
+    ''', (run_id, offset, data, datetime.now().isoformat()))
+
+
+class RunOutputWriter:
+    """Acumula la salida de una corrida y la escribe por chunks."""
+
+    def __init__(self, db: DBExecutor, run_id: int,
+                 chunk_size: int = config.RUN_OUTPUT_CHUNK_SIZE,
+                 tail_size: int = config.RUN_OUTPUT_TAIL,
+                 on_chunk: Optional[Callable[[int, int, bytes], None]] = None):
+        self.db = db
+        self.run_id = run_id
+        self.chunk_size = chunk_size
+        self.tail_size = tail_size
+        self.on_chunk = on_chunk  # (run_id, offset, data) después de cada chunk guardado
+        self.offset = 0           # bytes ya guardados
+        self.tail = bytearray()
+        self._pending = bytearray()
+
+    @property
+    def total_bytes(self) -> int:
+        return self.offset + len(self._pending)
+
+    async def write(self, data: bytes):
+        self._pending += data
+        self.tail += data
+        if len(self.tail) > self.tail_size:
+            del self.tail[:len(self.tail) - self.tail_size]
+        while len(self._pending) >= self.chunk_size:
+            await self._flush(self.chunk_size)
+
+    async def flush(self):
+        """Guarda lo pendiente aunque no complete un chunk (salida lenta o fin de corrida)."""
+        if self._pending:
+            await self._flush(len(self._pending))
+
+    async def _flush(self, size: int):
+        data = bytes(self._pending[:size])
+        await self.db.write(_insert_chunk, self.run_id, self.offset, data)
+        del self._pending[:size]
+        offset, self.offset = self.offset, self.offset + len(data)
+        if self.on_chunk is not None:
+            try:
+                self.on_chunk(self.run_id, offset, data)
+            except Exception as e:
+                print(f"[RunOutput] Error en on_chunk: {e}")
+
+    def tail_text(self) -> str:
+        return self.tail.decode(errors="replace")
+
+
+def _complete_utf8(data: bytes) -> int:
+    """Largo del prefijo de `data` que no corta un carácter UTF-8 al final."""
+    for back in range(1, min(4, len(data)) + 1):
+        byte = data[-back]
+        if byte & 0xC0 == 0x80:
+            continue  # byte de continuación: seguir buscando el inicio
+        if byte & 0x80 == 0:
+            return len(data)
+        needed = 2 if byte & 0xE0 == 0xC0 else 3 if byte & 0xF0 == 0xE0 else 4
+        return len(data) if back >= needed else len(data) - back
+    return len(data)
+
+
+def read_output(conn: sqlite3.Connection, run_id: int, offset: int = 0,
+                limit: int = config.RUN_OUTPUT_CHUNK_SIZE) -> Dict[str, Any]:
+    """Lee hasta `limit` bytes de la salida a partir de `offset`, sin cargar el resto."""
+    rows = conn.execute('''
+        SELECT offset, data FROM agent_run_output
+        WHERE run_id = ? AND offset >= (
+            SELECT COALESCE(MAX(offset), 0) FROM agent_run_output WHERE run_id = ? AND offset <= ?
+        )
+        ORDER BY offset
+    ''', (run_id, run_id, offset))
+    data = bytearray()
+    for chunk_offset, chunk in rows:
+        start = max(0, offset + len(data) - chunk_offset)
+        data += chunk[start:start + limit - len(data)]
+        if len(data) >= limit:
+            break
+    data = data[:_complete_utf8(data)] if len(data) >= limit else data
+    size = conn.execute('''
+        SELECT offset + length(data) FROM agent_run_output WHERE run_id = ?
+        ORDER BY offset DESC LIMIT 1
+    ''', (run_id,)).fetchone()
+    return {
+        "run_id": run_id,
+        "offset": offset,
+        "next_offset": offset + len(data),
+        "total_bytes": size[0] if size else 0,
+        "data": bytes(data).decode(errors="replace"),
+    }
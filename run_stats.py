@@ -0,0 +1,140 @@
+"""
+Jazmín OS - Run Stats
+======================
+Listado liviano de corridas y estadísticas por agente (tasa de éxito,
+percentiles de duración, rachas de fallos, histogramas), calculadas en SQL
+sobre agent_runs sin traer las filas a Python.
+"""
+
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+# Columnas del listado: sin output ni error_message
+RUN_LIST_COLUMNS = '''id, agent_name, agent_type, status, started_at, completed_at,
+    execution_time_ms, output_bytes, error_message IS NOT NULL AS has_error'''
+
+MAX_PAGE_SIZE = 500
+
+
+def since_cutoff(seconds: float) -> str:
+    """Corte para started_at (CURRENT_TIMESTAMP de SQLite: UTC 'YYYY-MM-DD HH:MM:SS')."""
+    return (datetime.utcnow() - timedelta(seconds=seconds)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def list_runs(conn: sqlite3.Connection, limit: int = 50, agent: Optional[str] = None,
+              status: Optional[str] = None, before_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Corridas más recientes primero; before_id pagina hacia atrás."""
+    sql = f"SELECT {RUN_LIST_COLUMNS} FROM agent_runs WHERE 1 = 1"
+    params: list = []
+    if agent:
+        sql += " AND agent_name = ?"
+        params.append(agent)
+    if status:
+        sql += " AND status = ?"
+        params.append(status)
+    if before_id is not None:
+        sql += " AND id < ?"
+        params.append(before_id)
+    sql += " ORDER BY id DESC LIMIT ?"
+    params.append(max(1, min(limit, MAX_PAGE_SIZE)))
+    return [dict(row) for row in conn.execute(sql, params)]
+
+
+def agent_stats(conn: sqlite3.Connection, since: str, agent: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Por agente: conteos, tasa de éxito, p50/p95/p99 de duración y rachas de fallos."""
+    agent_filter = "AND agent_name = ?" if agent else ""
+    params = (since, agent) if agent else (since,)
+    sql = f'''
+        WITH runs AS (
+            SELECT id, agent_name, status, started_at, execution_time_ms
+            FROM agent_runs
+            WHERE started_at >= ? {agent_filter}
+        ),
+        counts AS (
+            SELECT agent_name,
+                   COUNT(*) AS runs,
+                   SUM(status = 'success') AS success,
+                   SUM(status NOT IN ('success', 'running', 'pending')) AS failed,
+                   SUM(status = 'running') AS running,
+                   AVG(execution_time_ms) AS avg_ms,
+                   MAX(execution_time_ms) AS max_ms,
+                   MAX(started_at) AS last_started_at
+            FROM runs GROUP BY agent_name
+        ),
+        ranked AS (
+            SELECT agent_name, execution_time_ms AS t,
+                   ROW_NUMBER() OVER (PARTITION BY agent_name ORDER BY execution_time_ms) AS rn,
+                   COUNT(*) OVER (PARTITION BY agent_name) AS n
+            FROM runs WHERE execution_time_ms IS NOT NULL
+        ),
+        percentiles AS (
+            -- nearest-rank: el menor valor cuyo rango alcanza p * n
+            SELECT agent_name,
+                   MIN(CASE WHEN rn >= 0.50 * n THEN t END) AS p50_ms,
+                   MIN(CASE WHEN rn >= 0.95 * n THEN t END) AS p95_ms,
+                   MIN(CASE WHEN rn >= 0.99 * n THEN t END) AS p99_ms
+            FROM ranked GROUP BY agent_name
+        ),
+        finished AS (
+            SELECT agent_name, status = 'success' AS ok,
+                   ROW_NUMBER() OVER (PARTITION BY agent_name ORDER BY started_at, id) AS rn,
+                   ROW_NUMBER() OVER (PARTITION BY agent_name, status = 'success' ORDER BY started_at, id) AS rs
+            FROM runs WHERE status NOT IN ('running', 'pending')
+        ),
+        streaks AS (
+            -- islas de corridas consecutivas con el mismo resultado
+            SELECT agent_name, ok, COUNT(*) AS length, MAX(rn) AS last_rn
+            FROM finished GROUP BY agent_name, ok, rn - rs
+        ),
+        latest AS (
+            SELECT agent_name, MAX(rn) AS last_rn FROM finished GROUP BY agent_name
+        ),
+        streak_stats AS (
+            SELECT s.agent_name,
+                   MAX(CASE WHEN NOT s.ok THEN s.length END) AS longest_failure_streak,
+                   MAX(CASE WHEN NOT s.ok AND s.last_rn = l.last_rn THEN s.length END) AS current_failure_streak
+            FROM streaks s JOIN latest l USING (agent_name)
+            GROUP BY s.agent_name
+        )
+        SELECT c.agent_name, c.runs, c.success, c.failed, c.running,
+               ROUND(1.0 * c.success / NULLIF(c.success + c.failed, 0), 4) AS success_rate,
+               ROUND(c.avg_ms) AS avg_ms, p.p50_ms, p.p95_ms, p.p99_ms, c.max_ms,
+               COALESCE(s.longest_failure_streak, 0) AS longest_failure_streak,
+               COALESCE(s.current_failure_streak, 0) AS current_failure_streak,
+               c.last_started_at
+        FROM counts c
+        LEFT JOIN percentiles p USING (agent_name)
+        LEFT JOIN streak_stats s USING (agent_name)
+        ORDER BY c.agent_name
+    '''
+    return [dict(row) for row in conn.execute(sql, params)]
+
+
+def duration_histogram(conn: sqlite3.Connection, since: str, agent: Optional[str] = None,
+                       buckets: int = 10) -> Dict[str, Any]:
+    """Histograma de execution_time_ms en `buckets` intervalos de igual ancho."""
+    agent_filter = "AND agent_name = ?" if agent else ""
+    params = (since, agent) if agent else (since,)
+    bounds = conn.execute(f'''
+        SELECT MIN(execution_time_ms), MAX(execution_time_ms) FROM agent_runs
+        WHERE started_at >= ? {agent_filter} AND execution_time_ms IS NOT NULL
+    ''', params).fetchone()
+    low, high = bounds[0], bounds[1]
+    if low is None:
+        return {"buckets": []}
+    width = max(1, -(-(high - low + 1) // buckets))
+    counts = dict(conn.execute(f'''
+        SELECT (execution_time_ms - ?) / ? AS bucket, COUNT(*) FROM agent_runs
+        WHERE started_at >= ? {agent_filter} AND execution_time_ms IS NOT NULL
+        GROUP BY bucket
+    ''', (low, width, *params)).fetchall())
+    return {
+        "min_ms": low,
+        "max_ms": high,
+        "width_ms": width,
+        "buckets": [
+            {"start_ms": low + i * width, "end_ms": low + (i + 1) * width, "count": counts.get(i, 0)}
+            for i in range(buckets)
+        ],
+    }
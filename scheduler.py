@@ -0,0 +1,269 @@
+"""
+Jazmín OS - Scheduler
+======================
+Scheduler cron en asyncio para los agentes de agent_config. Los jobs viven
+en un heap ordenado por la próxima ejecución precalculada: el loop duerme
+hasta que vence el primero, sin escanear la lista cada minuto. Cada
+ejecución es un subproceso, con un límite global de workers, un límite de
+concurrencia por job y jitter opcional.
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import random
+import signal
+import sqlite3
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import config
+import database
+from cron import CronExpression
+from db_executor import DBExecutor
+from run_output import RunOutputWriter
+
+
+class Job:
+    """Un agente programado (una fila de agent_config con command)."""
+
+    def __init__(self, name: str, schedule: str, command: str, max_concurrency: int = 1,
+                 jitter_seconds: float = 0, timeout_seconds: Optional[float] = None):
+        self.name = name
+        self.cron = CronExpression(schedule)
+        self.command = command
+        self.max_concurrency = max(1, max_concurrency or 1)
+        self.jitter_seconds = jitter_seconds or 0
+        self.timeout_seconds = timeout_seconds or config.SCHEDULER_DEFAULT_TIMEOUT
+        self.next_run: Optional[datetime] = None
+        self.running = 0
+        self.skipped = 0
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "Job":
+        return cls(row["name"], row["schedule"], row["command"], row["max_concurrency"],
+                   row["jitter_seconds"], row["timeout_seconds"])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "schedule": self.cron.expression,
+            "command": self.command,
+            "next_run": self.next_run.isoformat() if self.next_run else None,
+            "running": self.running,
+            "max_concurrency": self.max_concurrency,
+            "jitter_seconds": self.jitter_seconds,
+            "timeout_seconds": self.timeout_seconds,
+            "skipped": self.skipped,
+        }
+
+
+def _set_next_run(conn: sqlite3.Connection, name: str, next_run: Optional[datetime]):
+    conn.execute("UPDATE agent_config SET next_run = ? WHERE name = ?",
+                 (next_run.isoformat() if next_run else None, name))
+
+
+def _record_finish(conn: sqlite3.Connection, name: str, status: str, finished: datetime):
+    conn.execute('''
+        UPDATE agent_config
+        SET last_run = ?, last_status = ?, run_count = COALESCE(run_count, 0) + 1,
+            success_count = COALESCE(success_count, 0) + ?,
+            fail_count = COALESCE(fail_count, 0) + ?
+        WHERE name = ?
+    ''', (finished.strftime("%Y-%m-%d %H:%M:%S"), status, int(status == "success"), int(status != "success"), name))
+
+
+class Scheduler:
+    """Dispara los jobs cuando vencen y registra cada corrida en agent_runs."""
+
+    def __init__(self, db: DBExecutor = database.db, max_workers: int = config.SCHEDULER_MAX_WORKERS,
+                 on_start: Optional[Callable[[int, Job, int], None]] = None,
+                 on_output: Optional[Callable[[int, int, bytes], None]] = None,
+                 on_finish: Optional[Callable[[int, Job, str], None]] = None):
+        self.db = db
+        self.on_start = on_start    # (run_id, job, pid) cuando arranca el subproceso
+        self.on_output = on_output  # (run_id, offset, data) por cada chunk guardado
+        self.on_finish = on_finish  # (run_id, job, status) al terminar
+        self.jobs: Dict[str, Job] = {}
+        self._heap: List[Tuple[float, int, str]] = []
+        self._seq = itertools.count()
+        self._workers = asyncio.Semaphore(max_workers)
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._runs: set = set()
+
+    async def load(self):
+        """(Re)carga los jobs habilitados con command y recalcula su próxima ejecución."""
+        rows = await self.db.fetchall('''
+            SELECT * FROM agent_config
+            WHERE enabled = 1 AND schedule IS NOT NULL AND command IS NOT NULL
+        ''')
+        jobs = {}
+        for row in rows:
+            try:
+                job = Job.from_row(row)
+            except ValueError as e:
+                print(f"[Scheduler] Cron inválido para {row['name']}: {e}")
+                continue
+            previous = self.jobs.get(job.name)
+            if previous is not None:
+                # Se conserva el objeto: las corridas en curso descuentan su `running`
+                previous.__dict__.update({k: v for k, v in job.__dict__.items()
+                                          if k not in ("running", "skipped")})
+                job = previous
+            jobs[job.name] = job
+        self.jobs = jobs
+        self._heap = []
+        now = datetime.now()
+        for job in jobs.values():
+            self._push(job, job.cron.next_after(now))
+        await self.db.write(lambda conn: [_set_next_run(conn, job.name, job.next_run) for job in jobs.values()])
+        self._notify()
+        print(f"[Scheduler] {len(jobs)} jobs programados")
+
+    def _push(self, job: Job, next_run: Optional[datetime]):
+        job.next_run = next_run
+        if next_run is not None:
+            heapq.heappush(self._heap, (next_run.timestamp(), next(self._seq), job.name))
+
+    def _notify(self):
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _run(self):
+        while True:
+            self._wake.clear()
+            timeout = None
+            if self._heap:
+                timeout = max(0.0, self._heap[0][0] - datetime.now().timestamp())
+            if timeout is None or timeout > 0:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            fire_ts, _, name = heapq.heappop(self._heap)
+            job = self.jobs.get(name)
+            # Entradas viejas (job borrado o reprogramado) se descartan al salir del heap
+            if job is None or job.next_run is None or job.next_run.timestamp() != fire_ts:
+                continue
+            self._push(job, job.cron.next_after(datetime.fromtimestamp(fire_ts)))
+            try:
+                await self.db.write(_set_next_run, job.name, job.next_run)
+            except Exception as e:
+                print(f"[Scheduler] Error guardando next_run de {job.name}: {e}")
+            self.fire(job, jitter=True)
+
+    def fire(self, job: Job, jitter: bool = False) -> bool:
+        """Lanza una corrida del job si no superó su límite de concurrencia."""
+        if job.running >= job.max_concurrency:
+            job.skipped += 1
+            print(f"[Scheduler] {job.name}: {job.running} corridas activas, se saltea esta")
+            return False
+        job.running += 1
+        task = asyncio.create_task(self._execute(job, job.jitter_seconds if jitter else 0))
+        self._runs.add(task)
+        task.add_done_callback(self._runs.discard)
+        return True
+
+    async def _read_output(self, stream: asyncio.StreamReader, output: RunOutputWriter):
+        """Pasa la salida del subproceso al writer; si no llega nada por un rato, guarda lo pendiente."""
+        while True:
+            try:
+                chunk = await asyncio.wait_for(stream.read(65536), config.RUN_OUTPUT_FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                await output.flush()
+                continue
+            if not chunk:
+                break
+            await output.write(chunk)
+
+    @staticmethod
+    async def _kill(proc: asyncio.subprocess.Process):
+        """Mata el grupo de procesos completo (el shell y lo que haya lanzado)."""
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        await proc.wait()
+
+    async def _execute(self, job: Job, jitter: float):
+        try:
+            if jitter:
+                await asyncio.sleep(random.uniform(0, jitter))
+            async with self._workers:
+                run_id = await database.add_agent_run(job.name, "running")
+                status, error = "failed", None
+                output = RunOutputWriter(self.db, run_id, on_chunk=self.on_output)
+                proc = reader = None
+                try:
+                    # Sesión propia: el timeout mata también a los hijos del shell
+                    proc = await asyncio.create_subprocess_shell(
+                        job.command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+                        start_new_session=True)
+                    if self.on_start is not None:
+                        self.on_start(run_id, job, proc.pid)
+                    reader = asyncio.create_task(self._read_output(proc.stdout, output))
+                    try:
+                        await asyncio.wait_for(proc.wait(), job.timeout_seconds)
+                    except asyncio.TimeoutError:
+                        await self._kill(proc)
+                        status, error = "timeout", f"Timeout después de {job.timeout_seconds:g}s"
+                    else:
+                        if proc.returncode == 0:
+                            status = "success"
+                        else:
+                            error = f"Exit code {proc.returncode}"
+                    # Algún hijo en segundo plano puede seguir con el pipe abierto
+                    await asyncio.wait_for(asyncio.shield(reader), 5)
+                except asyncio.CancelledError:
+                    status, error = "cancelled", "Scheduler detenido"
+                    if proc is not None and proc.returncode is None:
+                        await self._kill(proc)
+                    raise
+                except asyncio.TimeoutError:
+                    pass
+                except Exception as e:
+                    error = str(e)
+                finally:
+                    if reader is not None:
+                        reader.cancel()
+                    await output.flush()
+                    await database.update_agent_run(run_id, status, output.tail_text(), error, output.total_bytes)
+                    await self.db.write(_record_finish, job.name, status, datetime.utcnow())
+                    if self.on_finish is not None:
+                        self.on_finish(run_id, job, status)
+                    print(f"[Scheduler] {job.name} (run {run_id}): {status}")
+        finally:
+            job.running -= 1
+
+    def run_now(self, name: str) -> bool:
+        """Dispara un job fuera de horario. False si no existe o está al límite."""
+        job = self.jobs.get(name)
+        return job is not None and self.fire(job)
+
+    def start(self):
+        """Inicia el loop del scheduler (llamar desde el startup de la app, después de load)."""
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Detiene el loop y cancela las corridas en curso (quedan como 'cancelled')."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for task in list(self._runs):
+            task.cancel()
+        await asyncio.gather(*self._runs, return_exceptions=True)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "jobs": sorted((job.to_dict() for job in self.jobs.values()),
+                           key=lambda job: job["next_run"] or "~"),
+            "running": sum(job.running for job in self.jobs.values()),
+            "heap_size": len(self._heap),
+        }
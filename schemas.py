@@ -102,6 +102,10 @@ class TaskUpdate(BaseModel):
     priority: Optional[int] = Field(None, ge=1, le=4)
 
 
+class TaskBatchUpdate(TaskUpdate):
+    id: int
+
+
 class TaskResponse(TaskBase):
     id: int
     project_id: int
@@ -113,6 +117,10 @@ class TaskResponse(TaskBase):
         from_attributes = True
 
 
+class ProjectWithTasks(ProjectResponse):
+    tasks: List[TaskResponse] = []
+
+
 # ============== METRIC SCHEMAS ==============
 
 class MetricBase(BaseModel):
@@ -232,7 +240,7 @@ class AgentStatusSummary(BaseModel):
     display_name: Optional[str]
     status: str
     is_online: bool
-    last_seen: datetime
+    last_seen: Optional[datetime] = None
     agent_type: str
 
 
@@ -6,162 +6,351 @@ const formatPercent = (val) => `${val?.toFixed(1) || 0}%`;
 const formatBytes = (gb) => `${gb} GB`;
 const formatTime = (dateStr) => new Date(dateStr).toLocaleString('es-AR');
 
+// Client-side state (se actualiza con los mensajes del WebSocket)
+const MAX_LOGS = 50;
+let agentsCache = [];
+let logsCache = [];
+
+// Render system stats
+function renderSystemStats(data) {
+    // CPU
+    document.getElementById('cpu-percent').textContent = formatPercent(data.cpu.percent);
+    document.getElementById('cpu-bar').style.width = `${data.cpu.percent}%`;
+    
+    // Memory
+    document.getElementById('memory-percent').textContent = formatPercent(data.memory.percent);
+    document.getElementById('memory-bar').style.width = `${data.memory.percent}%`;
+    
+    // Disk
+    document.getElementById('disk-percent').textContent = formatPercent(data.disk.percent);
+    document.getElementById('disk-bar').style.width = `${data.disk.percent}%`;
+    
+    // Uptime
+    if (data.boot_time) document.getElementById('uptime').textContent = data.boot_time;
+}
+
 // Update system stats
 async function updateSystemStats() {
     try {
         const res = await fetch(`${API_BASE}/api/system`);
-        const data = await res.json();
-        
-        // CPU
-        document.getElementById('cpu-percent').textContent = formatPercent(data.cpu.percent);
-        document.getElementById('cpu-bar').style.width = `${data.cpu.percent}%`;
-        
-        // Memory
-        document.getElementById('memory-percent').textContent = formatPercent(data.memory.percent);
-        document.getElementById('memory-bar').style.width = `${data.memory.percent}%`;
-        
-        // Disk
-        document.getElementById('disk-percent').textContent = formatPercent(data.disk.percent);
-        document.getElementById('disk-bar').style.width = `${data.disk.percent}%`;
-        
-        // Uptime
-        document.getElementById('uptime').textContent = data.boot_time;
+        renderSystemStats(await res.json());
     } catch (err) {
         console.error('Error fetching system stats:', err);
     }
 }
 
-// Update agents
-async function updateAgents() {
+// Render agents
+function renderAgents(agents) {
     const container = document.getElementById('agents-container');
     
-    try {
-        const res = await fetch(`${API_BASE}/api/agents`);
-        const agents = await res.json();
-        
-        if (agents.length === 0) {
-            container.innerHTML = `
-                <div class="agent-card">
-                    <div class="agent-info">
-                        <h3>agente-matutino-11am</h3>
-                        <p>11:00 AM daily - Reporte diario</p>
-                    </div>
-                    <span class="agent-status active">● Activo</span>
-                </div>
-                <div class="agent-card">
-                    <div class="agent-info">
-                        <h3>agente-nocturno-creador</h3>
-                        <p>3:00 AM daily - Herramientas sistema</p>
-                    </div>
-                    <span class="agent-status active">● Activo</span>
+    if (agents.length === 0) {
+        container.innerHTML = `
+            <div class="agent-card">
+                <div class="agent-info">
+                    <h3>agente-matutino-11am</h3>
+                    <p>11:00 AM daily - Reporte diario</p>
                 </div>
-                <div class="agent-card">
-                    <div class="agent-info">
-                        <h3>agente-nocturno-ari</h3>
-                        <p>4:00 AM daily - Proyectos Ari</p>
-                    </div>
-                    <span class="agent-status active">● Activo</span>
+                <span class="agent-status active">● Activo</span>
+            </div>
+            <div class="agent-card">
+                <div class="agent-info">
+                    <h3>agente-nocturno-creador</h3>
+                    <p>3:00 AM daily - Herramientas sistema</p>
                 </div>
-                <div class="agent-card">
-                    <div class="agent-info">
-                        <h3>agente-arquitecto</h3>
-                        <p>5:00 AM daily - Apps integradas</p>
-                    </div>
-                    <span class="agent-status active">● Activo</span>
+                <span class="agent-status active">● Activo</span>
+            </div>
+            <div class="agent-card">
+                <div class="agent-info">
+                    <h3>agente-nocturno-ari</h3>
+                    <p>4:00 AM daily - Proyectos Ari</p>
                 </div>
-            `;
-            return;
-        }
-        
-        container.innerHTML = agents.map(agent => `
+                <span class="agent-status active">● Activo</span>
+            </div>
             <div class="agent-card">
                 <div class="agent-info">
-                    <h3>${agent.name}</h3>
-                    <p>Última ejecución: ${agent.last_run || 'Nunca'}</p>
+                    <h3>agente-arquitecto</h3>
+                    <p>5:00 AM daily - Apps integradas</p>
                 </div>
-                <span class="agent-status ${agent.status}">● ${agent.status}</span>
+                <span class="agent-status active">● Activo</span>
             </div>
-        `).join('');
+        `;
+        return;
+    }
+    
+    container.innerHTML = agents.map(agent => `
+        <div class="agent-card">
+            <div class="agent-info">
+                <h3>${agent.name}</h3>
+                <p>Última ejecución: ${agent.last_run || 'Nunca'}</p>
+            </div>
+            <span class="agent-status ${agent.status}">● ${agent.status}</span>
+        </div>
+    `).join('');
+}
+
+// Update agents
+async function updateAgents() {
+    try {
+        const res = await fetch(`${API_BASE}/api/agents`);
+        agentsCache = await res.json();
+        renderAgents(agentsCache);
     } catch (err) {
-        container.innerHTML = '<div class="loading">Error cargando agentes</div>';
+        document.getElementById('agents-container').innerHTML = '<div class="loading">Error cargando agentes</div>';
     }
 }
 
-// Update logs
-async function updateLogs() {
+// Render logs
+function renderLogs(logs) {
     const container = document.getElementById('logs-container');
     
-    try {
-        const res = await fetch(`${API_BASE}/api/logs`);
-        const logs = await res.json();
-        
-        if (logs.length === 0) {
-            container.innerHTML = `
-                <div class="log-entry">
-                    <span class="log-level success">OK</span>
-                    <div class="log-content">
-                        <div class="log-agent">agente-arquitecto</div>
-                        <div class="log-message">Dashboard Jazmín OS iniciado correctamente</div>
-                    </div>
-                    <span class="log-time">${new Date().toLocaleTimeString('es-AR')}</span>
-                </div>
-                <div class="log-entry">
-                    <span class="log-level info">INFO</span>
-                    <div class="log-content">
-                        <div class="log-agent">sistema</div>
-                        <div class="log-message">Sistema operativo Linux detectado</div>
-                    </div>
-                    <span class="log-time">${new Date().toLocaleTimeString('es-AR')}</span>
+    if (logs.length === 0) {
+        container.innerHTML = `
+            <div class="log-entry">
+                <span class="log-level success">OK</span>
+                <div class="log-content">
+                    <div class="log-agent">agente-arquitecto</div>
+                    <div class="log-message">Dashboard Jazmín OS iniciado correctamente</div>
                 </div>
-                <div class="log-entry">
-                    <span class="log-level info">INFO</span>
-                    <div class="log-content">
-                        <div class="log-agent">jazmin-os</div>
-                        <div class="log-message">Servidor FastAPI iniciado en puerto 8080</div>
-                    </div>
-                    <span class="log-time">${new Date().toLocaleTimeString('es-AR')}</span>
+                <span class="log-time">${new Date().toLocaleTimeString('es-AR')}</span>
+            </div>
+            <div class="log-entry">
+                <span class="log-level info">INFO</span>
+                <div class="log-content">
+                    <div class="log-agent">sistema</div>
+                    <div class="log-message">Sistema operativo Linux detectado</div>
                 </div>
-            `;
-            return;
-        }
-        
-        container.innerHTML = logs.map(log => `
+                <span class="log-time">${new Date().toLocaleTimeString('es-AR')}</span>
+            </div>
             <div class="log-entry">
-                <span class="log-level ${log.level.toLowerCase()}">${log.level}</span>
+                <span class="log-level info">INFO</span>
                 <div class="log-content">
-                    <div class="log-agent">${log.agent_name}</div>
-                    <div class="log-message">${log.message}</div>
+                    <div class="log-agent">jazmin-os</div>
+                    <div class="log-message">Servidor FastAPI iniciado en puerto 8080</div>
                 </div>
-                <span class="log-time">${new Date(log.timestamp).toLocaleTimeString('es-AR')}</span>
+                <span class="log-time">${new Date().toLocaleTimeString('es-AR')}</span>
             </div>
-        `).join('');
+        `;
+        return;
+    }
+    
+    container.innerHTML = logs.map(log => `
+        <div class="log-entry">
+            <span class="log-level ${log.level.toLowerCase()}">${log.level}</span>
+            <div class="log-content">
+                <div class="log-agent">${log.agent_name}</div>
+                <div class="log-message">${log.message}</div>
+            </div>
+            <span class="log-time">${new Date(log.timestamp).toLocaleTimeString('es-AR')}</span>
+        </div>
+    `).join('');
+}
+
+// Update logs
+async function updateLogs() {
+    try {
+        const res = await fetch(`${API_BASE}/api/logs?limit=${MAX_LOGS}`);
+        logsCache = await res.json();
+        renderLogs(logsCache);
     } catch (err) {
-        container.innerHTML = '<div class="loading">Error cargando logs</div>';
+        document.getElementById('logs-container').innerHTML = '<div class="loading">Error cargando logs</div>';
+    }
+}
+
+// Procesos en vivo (WebSocket): una fila por pid, se tocan solo las que cambian
+const processRows = new Map();
+
+function fillProcessRow(tr, proc) {
+    const cells = tr.children;
+    cells[0].textContent = proc.pid;
+    cells[1].textContent = proc.name;
+    cells[2].textContent = `${proc.cpu_percent?.toFixed(1) || 0}%`;
+    cells[3].textContent = `${proc.memory_percent?.toFixed(1) || 0}%`;
+    cells[4].firstChild.className = `process-status ${proc.status}`;
+    cells[4].firstChild.textContent = proc.status;
+}
+
+function processRow(proc) {
+    const tr = document.createElement('tr');
+    tr.innerHTML = '<td></td><td></td><td></td><td></td><td><span></span></td>';
+    fillProcessRow(tr, proc);
+    return tr;
+}
+
+function patchProcesses(change) {
+    const tbody = document.getElementById('processes-tbody');
+    const state = views.processes;
+    if (change.snapshot) {
+        processRows.clear();
+        tbody.replaceChildren(...[...state.rows.values()].map(proc => {
+            const tr = processRow(proc);
+            processRows.set(proc.pid, tr);
+            return tr;
+        }));
+    } else {
+        change.removed.forEach(pid => {
+            processRows.get(pid)?.remove();
+            processRows.delete(pid);
+        });
+        change.changed.forEach(proc => {
+            const tr = processRows.get(proc.pid);
+            if (tr) fillProcessRow(tr, proc);
+        });
+        change.added.forEach(proc => processRows.set(proc.pid, processRow(proc)));
     }
+    // Reordenar por CPU moviendo solo las filas que quedaron fuera de lugar
+    const ordered = [...state.rows.values()].sort((a, b) => (b.cpu_percent || 0) - (a.cpu_percent || 0));
+    ordered.forEach((proc, i) => {
+        const tr = processRows.get(proc.pid);
+        if (tr && tbody.children[i] !== tr) tbody.insertBefore(tr, tbody.children[i] || null);
+    });
+}
+
+// Render processes (polling)
+function renderProcesses(processes) {
+    processRows.clear();
+    const tbody = document.getElementById('processes-tbody');
+    tbody.innerHTML = processes.map(proc => `
+        <tr>
+            <td>${proc.pid}</td>
+            <td>${proc.name}</td>
+            <td>${proc.cpu_percent?.toFixed(1) || 0}%</td>
+            <td>${proc.memory_percent?.toFixed(1) || 0}%</td>
+            <td><span class="process-status ${proc.status}">${proc.status}</span></td>
+        </tr>
+    `).join('');
 }
 
 // Update processes
 async function updateProcesses() {
-    const tbody = document.getElementById('processes-tbody');
-    
     try {
         const res = await fetch(`${API_BASE}/api/processes`);
-        const processes = await res.json();
-        
-        tbody.innerHTML = processes.map(proc => `
-            <tr>
-                <td>${proc.pid}</td>
-                <td>${proc.name}</td>
-                <td>${proc.cpu_percent?.toFixed(1) || 0}%</td>
-                <td>${proc.memory_percent?.toFixed(1) || 0}%</td>
-                <td><span class="process-status ${proc.status}">${proc.status}</span></td>
-            </tr>
-        `).join('');
+        renderProcesses(await res.json());
     } catch (err) {
-        tbody.innerHTML = '<tr><td colspan="5">Error cargando procesos</td></tr>';
+        document.getElementById('processes-tbody').innerHTML = '<tr><td colspan="5">Error cargando procesos</td></tr>';
     }
 }
 
+// Initial load: todo lo de la página en un solo request (GET /api/dashboard)
+async function loadDashboard() {
+    try {
+        const res = await fetch(`${API_BASE}/api/dashboard`);
+        const data = await res.json();
+        const metrics = data.system_metrics;
+        if (metrics) {
+            renderSystemStats({
+                cpu: { percent: metrics.cpu_percent },
+                memory: { percent: metrics.memory_percent },
+                disk: { percent: metrics.disk_percent },
+            });
+        }
+        agentsCache = data.agents.map(agent => ({ ...agent, last_run: agent.last_seen }));
+        renderAgents(agentsCache);
+        logsCache = data.recent_logs.map(log => ({ ...log, agent_name: log.source }));
+        renderLogs(logsCache);
+    } catch (err) {
+        console.error('Error fetching dashboard:', err);
+        updateSystemStats();
+        updateAgents();
+        updateLogs();
+    }
+}
+
+// Real-time updates (WebSocket). Mientras no hay conexión se usa polling.
+let socket = null;
+let reconnectDelay = 1000;
+let pollTimers = [];
+const WS_TOPICS = ['metrics', 'processes', 'logs', 'agents'];
+
+function startPolling() {
+    if (pollTimers.length) return;
+    pollTimers = [
+        setInterval(updateSystemStats, 5000),  // Every 5s
+        setInterval(updateAgents, 30000),       // Every 30s
+        setInterval(updateLogs, 10000),         // Every 10s
+        setInterval(updateProcesses, 5000),     // Every 5s
+    ];
+}
+
+function stopPolling() {
+    pollTimers.forEach(clearInterval);
+    pollTimers = [];
+}
+
+// Vistas que el servidor envía como snapshot + deltas: {version, rows: clave -> fila}
+const views = {};
+
+function requestResync(view) {
+    delete views[view];
+    if (socket && socket.readyState === WebSocket.OPEN) {
+        socket.send(JSON.stringify({ action: 'resync', view }));
+    }
+}
+
+// Devuelve {added, changed, removed} aplicados, {snapshot: true}, o null si hubo que pedir resync
+function applyView(message) {
+    const key = message.key;
+    const state = views[message.view];
+    if (message.type === 'view_snapshot') {
+        views[message.view] = {
+            version: message.version,
+            rows: new Map((message.rows || []).map(row => [row[key], row])),
+        };
+        return { snapshot: true };
+    }
+    if (!state || message.version !== state.version + 1) {
+        // Se perdió un delta (o llegó antes del snapshot): aplicar éste dejaría estado viejo
+        requestResync(message.view);
+        return null;
+    }
+    message.removed.forEach(k => state.rows.delete(k));
+    [...message.added, ...message.changed].forEach(row => state.rows.set(row[key], row));
+    state.version = message.version;
+    return message;
+}
+
+function handleMessage(message) {
+    switch (message.type) {
+        case 'system_metrics':
+            renderSystemStats(message.data);
+            break;
+        case 'view_snapshot':
+        case 'view_delta': {
+            const change = applyView(message);
+            if (change && message.view === 'processes') patchProcesses(change);
+            break;
+        }
+        case 'new_log':
+            logsCache = [message.data, ...logsCache].slice(0, MAX_LOGS);
+            renderLogs(logsCache);
+            break;
+        case 'agent_update': {
+            const idx = agentsCache.findIndex(a => a.id === message.data.id);
+            if (idx >= 0) agentsCache[idx] = { ...agentsCache[idx], ...message.data };
+            else agentsCache = [message.data, ...agentsCache];
+            renderAgents(agentsCache);
+            break;
+        }
+    }
+}
+
+function connectSocket() {
+    const protocol = location.protocol === 'https:' ? 'wss' : 'ws';
+    socket = new WebSocket(`${protocol}://${location.host}/ws`);
+    
+    socket.onopen = () => {
+        reconnectDelay = 1000;
+        stopPolling();
+        socket.send(JSON.stringify({ action: 'subscribe', topics: WS_TOPICS }));
+    };
+    socket.onmessage = (event) => handleMessage(JSON.parse(event.data));
+    socket.onclose = () => {
+        Object.keys(views).forEach(view => delete views[view]);
+        startPolling();
+        setTimeout(connectSocket, reconnectDelay);
+        reconnectDelay = Math.min(reconnectDelay * 2, 30000);
+    };
+}
+
 // Update current time
 function updateTime() {
     document.getElementById('current-time').textContent = 
@@ -177,17 +366,11 @@ function updateTime() {
 
 // Initialize
 document.addEventListener('DOMContentLoaded', () => {
-    // Initial load
-    updateSystemStats();
-    updateAgents();
-    updateLogs();
-    updateProcesses();
+    // Initial load (procesos y uptime llegan por el WebSocket)
+    loadDashboard();
     updateTime();
     
-    // Periodic updates
-    setInterval(updateSystemStats, 5000);  // Every 5s
-    setInterval(updateAgents, 30000);       // Every 30s
-    setInterval(updateLogs, 10000);         // Every 10s
-    setInterval(updateProcesses, 5000);     // Every 5s
+    // Real-time updates, with polling as fallback
+    connectSocket();
     setInterval(updateTime, 1000);          // Every 1s
 });
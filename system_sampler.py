@@ -0,0 +1,103 @@
+"""
+Jazmín OS - System Sampler
+===========================
+Muestreo periódico de CPU/memoria/disco en segundo plano.
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import psutil
+
+import config
+
+
+class SystemSampler:
+    """Lee métricas del sistema en un intervalo fijo y guarda el último snapshot."""
+
+    def __init__(self, interval: float = config.SYSTEM_SAMPLE_INTERVAL, disk_path: str = "/"):
+        self.interval = interval
+        self.disk_path = disk_path
+        self.snapshot: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[[Dict[str, Any]], Awaitable[None]]] = []
+        self.boot_ts = psutil.boot_time()
+        self._boot_time = datetime.fromtimestamp(self.boot_ts).strftime("%Y-%m-%d %H:%M:%S")
+        self._cores = psutil.cpu_count()
+
+    def sample(self) -> Dict[str, Any]:
+        """Toma una muestra (bloqueante, pero sin esperas: cpu_percent usa interval=None)."""
+        cpu_percent = psutil.cpu_percent(interval=None)
+        freq = psutil.cpu_freq()
+        memory = psutil.virtual_memory()
+        disk = psutil.disk_usage(self.disk_path)
+        now = datetime.now()
+
+        return {
+            "cpu": {
+                "percent": cpu_percent,
+                "cores": self._cores,
+                "freq": freq._asdict() if freq else None
+            },
+            "memory": {
+                "total": memory.total // (1024**3),
+                "available": memory.available // (1024**3),
+                "percent": memory.percent,
+                "used": memory.used // (1024**3)
+            },
+            "disk": {
+                "total": disk.total // (1024**3),
+                "used": disk.used // (1024**3),
+                "free": disk.free // (1024**3),
+                "percent": (disk.used / disk.total) * 100
+            },
+            "boot_time": self._boot_time,
+            "timestamp": now.strftime("%Y-%m-%d %H:%M:%S"),
+            "sampled_at": now.isoformat(),
+        }
+
+    def add_listener(self, listener: Callable[[Dict[str, Any]], Awaitable[None]]):
+        """Registra una corutina que recibe cada snapshot nuevo."""
+        self._listeners.append(listener)
+
+    async def _run(self):
+        while True:
+            try:
+                self.snapshot = await asyncio.to_thread(self.sample)
+            except Exception as e:
+                print(f"[Sampler] Error muestreando sistema: {e}")
+            else:
+                for listener in self._listeners:
+                    try:
+                        await listener(self.snapshot)
+                    except Exception as e:
+                        print(f"[Sampler] Error en listener {listener.__name__}: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Inicia el loop de muestreo (llamar desde el startup de la app)."""
+        if self._task is None:
+            # La primera llamada a cpu_percent(None) siempre devuelve 0.0: la usamos de referencia
+            psutil.cpu_percent(interval=None)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Detiene el loop de muestreo."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def latest(self) -> Dict[str, Any]:
+        """Devuelve el último snapshot; si todavía no hay ninguno, muestrea en el momento."""
+        if self.snapshot is None:
+            self.snapshot = self.sample()
+        return self.snapshot
+
+
+# Instancia global del sampler
+sampler = SystemSampler()
@@ -0,0 +1,365 @@
+"""
+Jazmín OS - Telemetry
+======================
+Métricas propias de la app en formato de texto de Prometheus (/metrics):
+requests por ruta (conteo, en curso, latencia, tamaño de respuesta),
+tiempos de las consultas a la base, WebSocket y lag del event loop.
+
+Los contadores e histogramas no usan locks en el camino caliente: cada
+hilo escribe en su propio shard (threading.local) y el scrape suma los
+shards. Los gauges se calculan en el momento del scrape con un callback.
+"""
+
+import asyncio
+import bisect
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import config
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Sharded:
+    """Un dict por hilo; solo la creación del shard toma el lock."""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[dict] = []
+        self._lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def _snapshots(self) -> List[dict]:
+        with self._lock:
+            shards = list(self._shards)
+        return [dict(shard) for shard in shards]  # dict(shard) es atómico bajo el GIL
+
+
+class Counter(_Sharded):
+    type = "counter"
+
+    def inc(self, labels: Labels = (), amount: float = 1):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def values(self) -> Dict[Labels, float]:
+        totals: Dict[Labels, float] = {}
+        for shard in self._snapshots():
+            for labels, value in shard.items():
+                totals[labels] = totals.get(labels, 0) + value
+        return totals
+
+    def collect(self) -> Iterable[str]:
+        for labels, value in sorted(self.values().items()):
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+
+class Histogram(_Sharded):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, labels: Labels = ()):
+        shard = self._shard()
+        entry = shard.get(labels)
+        if entry is None:
+            # conteos por bucket (+Inf al final), suma, cantidad
+            entry = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+        entry[bisect.bisect_left(self.buckets, value)] += 1
+        entry[-2] += value
+        entry[-1] += 1
+
+    def values(self) -> Dict[Labels, List[float]]:
+        totals: Dict[Labels, List[float]] = {}
+        for shard in self._snapshots():
+            for labels, entry in shard.items():
+                total = totals.setdefault(labels, [0] * len(entry))
+                for i, value in enumerate(list(entry)):
+                    total[i] += value
+        return totals
+
+    def collect(self) -> Iterable[str]:
+        for labels, entry in sorted(self.values().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), entry):
+                cumulative += count
+                le = 'le="%s"' % _number(bound)
+                yield f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(entry[-2])}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {entry[-1]}"
+
+
+GaugeValue = Union[float, Dict[Labels, float]]
+
+
+class Gauge:
+    """Valor calculado al momento del scrape: un número o {labels: valor}."""
+
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, fn: Callable[[], GaugeValue], labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.fn = fn
+        self.labelnames = tuple(labelnames)
+
+    def collect(self) -> Iterable[str]:
+        value = self.fn()
+        if isinstance(value, dict):
+            for labels, sample in sorted(value.items()):
+                yield f"{self.name}{_labels(self.labelnames, labels)} {_number(sample)}"
+        else:
+            yield f"{self.name} {_number(value)}"
+
+
+class CounterFunc(Gauge):
+    """Total monótono que ya lleva otro objeto (p.ej. descartes del ConnectionManager)."""
+
+    type = "counter"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: Dict[str, Union[Counter, Histogram, Gauge]] = {}
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def gauge(self, name: str, help: str, fn: Callable[[], GaugeValue], labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help, fn, labelnames))
+
+    def counter_func(self, name: str, help: str, fn: Callable[[], GaugeValue],
+                     labelnames: Sequence[str] = ()) -> CounterFunc:
+        return self.register(CounterFunc(name, help, fn, labelnames))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            try:
+                lines.extend(metric.collect())
+            except Exception as e:
+                print(f"[Telemetry] Error en {metric.name}: {e}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# --- HTTP -------------------------------------------------------------------
+
+http_requests = registry.counter("jazmin_http_requests_total", "Requests HTTP atendidos",
+                                 ("method", "route", "status"))
+http_duration = registry.histogram("jazmin_http_request_duration_seconds", "Latencia de requests HTTP",
+                                   ("method", "route"))
+http_response_size = registry.histogram("jazmin_http_response_size_bytes", "Tamaño del body de respuesta",
+                                        ("method", "route"), SIZE_BUCKETS)
+_in_flight = 0
+registry.gauge("jazmin_http_requests_in_flight", "Requests HTTP en curso", lambda: _in_flight)
+
+
+class PrometheusMiddleware:
+    """Middleware ASGI (sin BaseHTTPMiddleware: no bufferiza ni rompe el streaming)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    @staticmethod
+    def _route(scope) -> str:
+        # FastAPI deja la ruta resuelta en el scope; el template evita una serie por id
+        route = scope.get("route")
+        if route is not None:
+            return route.path
+        from starlette.routing import Match
+        for candidate in scope["app"].router.routes:
+            if candidate.matches(scope)[0] == Match.FULL:
+                return getattr(candidate, "path", "<unmatched>")
+        return "<unmatched>"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        global _in_flight
+        _in_flight += 1
+        status = 500
+        size = 0
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _in_flight -= 1
+            elapsed = time.perf_counter() - start
+            method, route = scope["method"], self._route(scope)
+            http_requests.inc((method, route, str(status)))
+            http_duration.observe(elapsed, (method, route))
+            http_response_size.observe(size, (method, route))
+
+
+# --- Base de datos ------------------------------------------------------------
+
+db_duration = registry.histogram("jazmin_db_query_duration_seconds",
+                                 "Tiempo de ejecución de trabajos de base de datos", ("db", "kind"), DB_BUCKETS)
+db_wait = registry.histogram("jazmin_db_queue_wait_seconds",
+                             "Espera en la cola del executor antes de ejecutar", ("db", "kind"), DB_BUCKETS)
+db_errors = registry.counter("jazmin_db_errors_total", "Trabajos de base de datos con error", ("db", "kind"))
+
+
+_executors: Dict[str, Any] = {}  # nombre -> DBExecutor
+
+
+def _executor_stat(key: str) -> Dict[Labels, float]:
+    return {(name, kind): stats[key]
+            for name, executor in _executors.items()
+            for kind, stats in executor.stats().items()}
+
+
+registry.gauge("jazmin_db_queue_depth", "Trabajos esperando en la cola del executor",
+               lambda: _executor_stat("queue_depth"), ("db", "kind"))
+registry.gauge("jazmin_db_running", "Trabajos ejecutándose en el executor",
+               lambda: _executor_stat("running"), ("db", "kind"))
+
+
+def instrument_db_executor(db_name: str, executor):
+    """Registra un DBExecutor: tiempos por trabajo (on_job, desde sus hilos) y profundidad de cola."""
+    def observe(kind: str, wait: float, duration: float, ok: bool):
+        labels = (db_name, kind)
+        db_wait.observe(wait, labels)
+        db_duration.observe(duration, labels)
+        if not ok:
+            db_errors.inc(labels)
+
+    executor.on_job = observe
+    _executors[db_name] = executor
+
+
+def instrument_sqlalchemy(engine, db_name: str = "sqlalchemy"):
+    """Tiempo de cada sentencia de un engine propio (no el compartido con el DBExecutor)."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        context._telemetry_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_telemetry_start", None)
+        if start is not None:
+            db_duration.observe(time.perf_counter() - start, (db_name, "query"))
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        db_errors.inc((db_name, "query"))
+
+    registry.gauge("jazmin_db_pool_checked_out", "Conexiones del pool de SQLAlchemy en uso",
+                   lambda: engine.pool.checkedout())
+
+
+# --- WebSocket --------------------------------------------------------------
+
+def instrument_ws(manager):
+    """Conexiones, colas de envío y descartes del ConnectionManager."""
+    registry.gauge("jazmin_ws_connections", "Conexiones WebSocket abiertas",
+                   lambda: len(manager.active_connections))
+    registry.gauge("jazmin_ws_queued_messages", "Mensajes pendientes en todas las colas de envío",
+                   lambda: sum(len(client.queue) for client in list(manager.clients.values())))
+    registry.gauge("jazmin_ws_max_queue_depth", "Cola de envío más larga",
+                   lambda: max((len(client.queue) for client in list(manager.clients.values())), default=0))
+    registry.gauge("jazmin_ws_dropped_messages", "Mensajes descartados por colas llenas (clientes conectados)",
+                   lambda: sum(client.total_dropped for client in list(manager.clients.values())))
+    registry.counter_func("jazmin_ws_evicted_total", "Clientes expulsados por lentos", lambda: manager.evicted)
+
+
+# --- Event loop -------------------------------------------------------------
+
+loop_lag = registry.histogram("jazmin_event_loop_lag_seconds", "Retraso del event loop al despertar un timer",
+                              buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0))
+
+
+class LoopLagMonitor:
+    """Duerme `interval` segundos y mide cuánto tarda de más en despertar."""
+
+    def __init__(self, interval: float = config.LOOP_LAG_INTERVAL):
+        self.interval = interval
+        self.last = 0.0
+        self.max = 0.0
+        self._task: Optional[asyncio.Task] = None
+        registry.gauge("jazmin_event_loop_lag_last_seconds", "Último retraso medido del event loop",
+                       lambda: self.last)
+        registry.gauge("jazmin_event_loop_lag_max_seconds", "Máximo retraso del event loop desde el arranque",
+                       lambda: self.max)
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - start - self.interval)
+            self.last = lag
+            self.max = max(self.max, lag)
+            loop_lag.observe(lag)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+loop_lag_monitor = LoopLagMonitor()
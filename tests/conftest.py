@@ -0,0 +1,46 @@
+"""
+Jazmín OS - Tests
+==================
+Fixtures compartidas: la app se importa con bases en un directorio temporal,
+sin scheduler, y arranca una sola vez por sesión (main mantiene estado global).
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+DATA_DIR = tempfile.mkdtemp(prefix="jazmin-tests-")
+os.environ.update({
+    "DATA_DIR": DATA_DIR,
+    "APP_DB_PATH": os.path.join(DATA_DIR, "app.db"),
+    "DATABASE_URL": f"sqlite:///{DATA_DIR}/jazmin_os.db",
+    "SCHEDULER_ENABLED": "false",
+    "ADMIN_TOKEN": "secreto",
+    "DASHBOARD_CACHE_TTL": "0",
+    "RETENTION_INTERVAL": "86400",
+    "SYSTEM_SAMPLE_INTERVAL": "3600",  # sin muestras reales mezclándose con las de los tests
+    "PROCESS_SAMPLE_INTERVAL": "3600",
+})
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture(scope="session")
+def app_main():
+    import main
+    return main
+
+
+@pytest.fixture(scope="session")
+def client(app_main):
+    from fastapi.testclient import TestClient
+    with TestClient(app_main.app) as client:
+        yield client
+
+
+@pytest.fixture
+def run(client):
+    """Corre una corrutina en el loop de la app (el mismo de los DBExecutor y el PresenceTracker)."""
+    return client.portal.call
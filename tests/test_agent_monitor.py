@@ -0,0 +1,62 @@
+import subprocess
+import sys
+import time
+
+import pytest
+
+import database
+from agent_monitor import RunMonitor
+
+# Padre que lanza un hijo y ambos trabajan un rato
+TREE = ("import subprocess, sys, time;"
+        "child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(1.5)']);"
+        "data = bytearray(20 * 1024 * 1024); end = time.time() + 0.6\n"
+        "while time.time() < end: pass\n"
+        "child.wait()")
+
+
+@pytest.fixture
+def tree():
+    proc = subprocess.Popen([sys.executable, "-c", TREE])
+    yield proc
+    proc.kill()
+    proc.wait()
+
+
+def test_sample_accounts_for_the_whole_tree(tree):
+    monitor = RunMonitor(1, "arbol", pid=tree.pid)
+    deadline = time.monotonic() + 5
+    while monitor.procs_peak < 2 and time.monotonic() < deadline:
+        monitor.sample()
+        time.sleep(0.1)
+    summary = monitor.summary()
+    assert summary["procs_peak"] == 2
+    assert summary["rss_peak"] > 20 * 1024 * 1024
+    assert summary["ctx_switches"] > 0
+
+
+def test_monitor_requires_a_target():
+    with pytest.raises(ValueError):
+        RunMonitor(1, "nada")
+
+
+def test_monitor_route_saves_a_summary_when_the_run_ends(client, run, tree):
+    run_id = run(database.add_agent_run, "monitoreado", "running")
+    response = client.post(f"/api/runs/{run_id}/monitor", json={"pid": tree.pid, "interval": 0.1})
+    assert response.status_code == 200 and response.json()["active"] is True
+    tree.wait(timeout=10)
+
+    deadline = time.monotonic() + 5
+    while (resources := client.get(f"/api/runs/{run_id}/resources").json())["active"]:
+        assert time.monotonic() < deadline
+        time.sleep(0.1)
+    assert resources["agent_name"] == "monitoreado" and resources["samples"] >= 1
+    compared = client.get("/api/agents/monitoreado/resources").json()
+    assert [r["run_id"] for r in compared["runs"]] == [run_id]
+
+
+def test_monitor_route_validates_input(client, run):
+    run_id = run(database.add_agent_run, "monitoreado", "running")
+    assert client.post("/api/runs/999999/monitor", json={"pid": 1}).status_code == 404
+    assert client.post(f"/api/runs/{run_id}/monitor", json={}).status_code == 422
+    assert client.post(f"/api/runs/{run_id}/monitor", json={"pid": 2 ** 22 + 1}).status_code == 404
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from benchmarks import micro
+from benchmarks.__main__ import parse_args
+from benchmarks.report import compare, latency_summary, percentile
+
+
+def test_percentile_is_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 0.50) == 50
+    assert percentile(values, 0.95) == 95
+    assert percentile(values, 0.99) == 99
+    assert percentile([7], 0.99) == 7
+    assert percentile([], 0.5) == 0.0
+
+
+def test_latency_summary_scales_units_and_rate():
+    summary = latency_summary([0.002, 0.001, 0.003, 0.004], elapsed=2.0)
+    assert summary == {"count": 4, "rps": 2.0, "p50_ms": 2.0, "p95_ms": 4.0, "p99_ms": 4.0, "max_ms": 4.0}
+    micro_summary = latency_summary([0.000005], 1.0, rate_key="ops_per_s", scale=1e6, unit="us")
+    assert micro_summary["p50_us"] == 5.0 and micro_summary["ops_per_s"] == 1.0
+    assert latency_summary([], 0)["max_ms"] == 0.0
+
+
+def test_compare_flags_only_regressions_beyond_tolerance():
+    baseline = {
+        "http": {"logs": {"rps": 1000, "p95_ms": 10}, "gone": {"rps": 5}},
+        "ws": {"msgs_per_s": 500, "p95_ms": 20},
+        "micro": {"helper": {"p50_us": 100}},
+    }
+    report = {
+        "http": {"logs": {"rps": 700, "p95_ms": 12}, "new": {"rps": 1}},
+        "ws": {"msgs_per_s": 600, "p95_ms": 30},
+        "micro": {"helper": {"p50_us": 120}},
+    }
+    regressions = compare(report, baseline, tolerance=0.25)
+    assert {(r["section"], r["name"], r["metric"]) for r in regressions} == {
+        ("http", "logs", "rps"),
+        ("ws", "broadcast", "p95_ms"),
+    }
+    assert next(r for r in regressions if r["metric"] == "rps")["change"] == -0.3
+    assert compare(report, baseline, tolerance=0.6) == []
+
+
+def test_parse_args_rejects_unknown_scenarios(capsys):
+    assert parse_args(["--scenarios", "logs"]).scenarios == "logs"
+    with pytest.raises(SystemExit):
+        parse_args(["--scenarios", "logs,nope"])
+    assert "nope" in capsys.readouterr().err
+
+
+def test_database_helper_micro_benchmarks_run(run):
+    results = run(micro.database_helpers, 3)
+    assert results["database.add_agent_run"]["ops"] == 3
+    assert results["database.save_system_metrics_batch[100]"]["ops"] == 1
+    assert all(result["p50_us"] > 0 for result in results.values())
+
+
+def test_broadcast_micro_benchmark_delivers_to_every_client(monkeypatch):
+    monkeypatch.setattr(micro, "BROADCAST_CLIENTS", (1, 10))
+    results = asyncio.run(micro.broadcast(2))
+    assert set(results) == {f"ConnectionManager.broadcast{suffix}[{clients}]"
+                            for suffix in ("", "+deliver") for clients in (1, 10)}
@@ -0,0 +1,39 @@
+from datetime import datetime
+
+import pytest
+
+from cron import CronExpression
+
+BASE = datetime(2024, 1, 31, 10, 17, 42)  # miércoles
+
+
+@pytest.mark.parametrize("expression, expected", [
+    ("*/15 * * * *", datetime(2024, 1, 31, 10, 30)),
+    ("0 9-17 * * mon-fri", datetime(2024, 1, 31, 11, 0)),
+    ("30 2 * * *", datetime(2024, 2, 1, 2, 30)),
+    ("@hourly", datetime(2024, 1, 31, 11, 0)),
+    ("@monthly", datetime(2024, 2, 1, 0, 0)),
+    ("0 0 29 feb *", datetime(2024, 2, 29, 0, 0)),
+    ("0 12 * * 0", datetime(2024, 2, 4, 12, 0)),
+    ("0 12 * * 7", datetime(2024, 2, 4, 12, 0)),  # 7 también es domingo
+    # Día del mes y día de semana restringidos: alcanza con uno (el 1 o un viernes)
+    ("0 0 1 * fri", datetime(2024, 2, 1, 0, 0)),
+    ("0 0 15 * fri", datetime(2024, 2, 2, 0, 0)),
+])
+def test_next_after(expression, expected):
+    assert CronExpression(expression).next_after(BASE) == expected
+
+
+def test_next_after_is_strictly_later():
+    cron = CronExpression("17 10 * * *")
+    assert cron.next_after(datetime(2024, 1, 31, 10, 17)) == datetime(2024, 2, 1, 10, 17)
+
+
+def test_impossible_dates_never_fire():
+    assert CronExpression("0 0 31 2 *").next_after(BASE) is None
+
+
+@pytest.mark.parametrize("expression", ["* * * *", "60 * * * *", "*/0 * * * *", "5-1 * * * *", "0 0 * * funday"])
+def test_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        CronExpression(expression)
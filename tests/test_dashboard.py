@@ -0,0 +1,45 @@
+import itertools
+
+_ids = itertools.count(900000)
+
+
+def _dashboard(client):
+    response = client.get("/api/dashboard")
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_log_ingest_rejects_empty_message_and_bad_timestamp(client):
+    assert client.post("/api/logs", json={"agent_name": "a", "level": "info", "message": ""}).status_code == 422
+    assert client.post("/api/logs", json={"agent_name": "a", "level": "info", "message": "x",
+                                          "timestamp": "ayer"}).status_code == 422
+    batch = [{"agent_name": "a", "level": "info", "message": "ok"},
+             {"agent_name": "a", "level": "info", "message": "x", "timestamp": "ayer"}]
+    assert client.post("/api/logs/batch", json=batch).status_code == 422
+
+
+def test_dashboard_skips_legacy_invalid_logs(client, app_main):
+    summary = app_main.dashboard_summary
+    summary.logs_committed([
+        {"id": next(_ids), "agent_name": "a", "level": "info", "message": "", "timestamp": "2024-01-01T10:00:00"},
+        {"id": next(_ids), "agent_name": "a", "level": "info", "message": "vieja", "timestamp": "ayer"},
+        {"id": next(_ids), "agent_name": None, "level": None, "message": "buena", "timestamp": "2024-01-01 10:00:00"},
+    ])
+    summary.invalidate()
+    logs = _dashboard(client)["recent_logs"]
+    messages = [log["message"] for log in logs]
+    assert "buena" in messages and "vieja" not in messages and "" not in messages
+    assert next(log for log in logs if log["message"] == "buena")["source"] == "sistema"
+
+
+def test_dashboard_tolerates_free_form_agent_dates(client, app_main):
+    agent_id = next(_ids)
+    app_main.dashboard_summary.agent_changed({"id": agent_id, "name": "libre", "status": "idle",
+                                              "last_run": "hace un rato", "last_seen": "nunca",
+                                              "created_at": "el martes"})
+    agent = next(a for a in _dashboard(client)["agents"] if a["id"] == agent_id)
+    assert agent["last_seen"] is None
+
+    app_main.dashboard_summary.agent_changed({"id": agent_id, "last_run": "2024-05-01 12:00:00"})
+    agent = next(a for a in _dashboard(client)["agents"] if a["id"] == agent_id)
+    assert agent["last_seen"].startswith("2024-05-01T12:00:00")
@@ -0,0 +1,77 @@
+import asyncio
+import contextvars
+import threading
+
+import pytest
+
+from db_executor import DBExecutor
+from db_pool import SQLitePool
+
+request_id = contextvars.ContextVar("request_id", default=None)
+
+
+@pytest.fixture
+def executor(tmp_path):
+    executor = DBExecutor(SQLitePool(tmp_path / "exec.db"), readers=2)
+    asyncio.run(executor.write(lambda conn: conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, v TEXT)")))
+    yield executor
+    executor.shutdown()
+
+
+def test_writes_run_on_a_single_thread_and_reads_elsewhere(executor):
+    def write_thread(conn, value):
+        conn.execute("INSERT INTO t (v) VALUES (?)", (value,))
+        return threading.current_thread().name
+
+    async def scenario():
+        writers = await asyncio.gather(*(executor.write(write_thread, str(i)) for i in range(20)))
+        reader = await executor.read(lambda conn: threading.current_thread().name)
+        rows = await executor.fetchall("SELECT v FROM t")
+        return writers, reader, rows
+
+    writers, reader, rows = asyncio.run(scenario())
+    assert len(set(writers)) == 1 and writers[0].startswith("db-writer")
+    assert reader.startswith("db-reader")
+    assert len(rows) == 20
+
+
+def test_failed_write_rolls_back_and_raises(executor):
+    def failing(conn):
+        conn.execute("INSERT INTO t (v) VALUES ('x')")
+        raise ValueError("falla")
+
+    async def scenario():
+        with pytest.raises(ValueError):
+            await executor.write(failing)
+        return await executor.fetchone("SELECT COUNT(*) AS n FROM t")
+
+    assert asyncio.run(scenario()) == {"n": 0}
+    assert executor.stats()["write"]["errors"] == 1
+
+
+def test_execute_returns_lastrowid_and_context_is_propagated(executor):
+    async def scenario():
+        request_id.set("req-1")
+        row_id = await executor.execute("INSERT INTO t (v) VALUES (?)", ("a",))
+        seen = await executor.read(lambda conn: request_id.get())
+        return row_id, seen
+
+    assert asyncio.run(scenario()) == (1, "req-1")
+
+
+def test_event_loop_stays_responsive_during_slow_reads(executor):
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        await executor.read(lambda conn: threading.Event().wait(0.2))
+        task.cancel()
+        return ticks
+
+    assert asyncio.run(scenario()) >= 5
@@ -0,0 +1,65 @@
+import sqlite3
+import threading
+
+import pytest
+
+from db_pool import SQLitePool, get_pool
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = SQLitePool(tmp_path / "pool.db")
+    yield pool
+    pool.close_all()
+
+
+def test_one_reused_connection_per_thread(pool):
+    conn = pool.connection()
+    assert pool.connection() is conn
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(pool.connection()))
+    thread.start()
+    thread.join()
+    assert other[0] is not conn
+
+
+def test_connections_use_wal_and_row_factory(pool):
+    conn = pool.connection()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    assert isinstance(conn.execute("SELECT 1 AS uno").fetchone(), sqlite3.Row)
+
+
+def test_transaction_commits_or_rolls_back(pool):
+    with pool.transaction() as conn:
+        conn.execute("CREATE TABLE t (x INTEGER)")
+        conn.execute("INSERT INTO t VALUES (1)")
+    with pytest.raises(RuntimeError):
+        with pool.transaction() as conn:
+            conn.execute("INSERT INTO t VALUES (2)")
+            raise RuntimeError("falla")
+    assert [row[0] for row in pool.connection().execute("SELECT x FROM t")] == [1]
+
+
+def test_close_all_closes_and_reopens(pool):
+    conn = pool.connection()
+    pool.close_all()
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+    assert pool.connection() is not conn
+
+
+def test_get_pool_is_shared_per_path(tmp_path):
+    assert get_pool(tmp_path / "a.db") is get_pool(str(tmp_path / "a.db"))
+    assert get_pool(tmp_path / "a.db") is not get_pool(tmp_path / "b.db")
+
+
+def test_statement_hook_sees_every_statement(pool):
+    seen = []
+    pool.connection()
+    pool.set_statement_hook(seen.append)
+    pool.connection().execute("SELECT 42")
+    pool.set_statement_hook(None)
+    pool.connection().execute("SELECT 43")
+    assert seen == ["SELECT 42"]
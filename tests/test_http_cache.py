@@ -0,0 +1,13 @@
+def test_list_endpoints_answer_304_for_a_matching_etag(client):
+    first = client.get("/api/agents")
+    etag = first.headers["ETag"]
+    assert client.get("/api/agents", headers={"If-None-Match": etag}).status_code == 304
+    client.post("/api/agents", json={"name": "etag-nuevo", "status": "idle"})
+    assert client.get("/api/agents", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_log_list_etag_changes_with_new_logs(client):
+    etag = client.get("/api/logs").headers["ETag"]
+    assert client.get("/api/logs", headers={"If-None-Match": etag}).status_code == 304
+    client.post("/api/logs", json={"agent_name": "etag", "level": "info", "message": "nuevo"})
+    assert client.get("/api/logs", headers={"If-None-Match": etag}).status_code == 200
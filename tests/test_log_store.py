@@ -0,0 +1,91 @@
+import sqlite3
+
+import pytest
+
+import log_store
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute("CREATE TABLE logs (id INTEGER PRIMARY KEY, agent_name TEXT, level TEXT, message TEXT, timestamp TEXT)")
+    log_store.create_indexes(conn)
+    log_store.create_fts(conn)
+    rows = [(f"agente-{i % 2}", "error" if i % 5 == 0 else "info", f"mensaje {i}", f"2024-01-01T10:{i // 2:02d}:00")
+            for i in range(40)]
+    conn.executemany("INSERT INTO logs (agent_name, level, message, timestamp) VALUES (?, ?, ?, ?)", rows)
+    return conn
+
+
+def _ids(rows):
+    return [row["id"] for row in rows]
+
+
+def test_keyset_pages_cover_everything_once(conn):
+    pages, before = [], None
+    while True:
+        page = log_store.query_logs(conn, limit=7, before_id=before)
+        if not page:
+            break
+        pages.append(page)
+        before = page[-1]["id"]
+    ids = [i for page in pages for i in _ids(page)]
+    assert len(ids) == len(set(ids)) == 40
+    # Más nuevos primero; empates de timestamp por id descendente
+    keys = [(row["timestamp"], row["id"]) for page in pages for row in page]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_after_id_returns_the_newer_page_in_display_order(conn):
+    first = log_store.query_logs(conn, limit=5)
+    second = log_store.query_logs(conn, limit=5, before_id=first[-1]["id"])
+    assert _ids(log_store.query_logs(conn, limit=5, after_id=second[0]["id"])) == _ids(first)
+
+
+def test_filters_combine(conn):
+    rows = log_store.query_logs(conn, limit=100, agent="agente-0", level="error",
+                                since="2024-01-01T10:05:00", until="2024-01-01T10:15:00")
+    assert rows and all(row["agent_name"] == "agente-0" and row["level"] == "error" for row in rows)
+    assert all("2024-01-01T10:05:00" <= row["timestamp"] < "2024-01-01T10:15:00" for row in rows)
+
+
+def test_page_size_is_clamped(conn):
+    assert len(log_store.query_logs(conn, limit=0)) == 1
+    assert len(log_store.query_logs(conn, limit=10 ** 6)) == 40
+
+
+def test_filtered_query_uses_the_composite_index(conn):
+    plan = " ".join(row[3] for row in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM logs WHERE agent_name = ? AND level = ? ORDER BY timestamp DESC",
+        ("a", "info")))
+    assert "idx_logs_agent_level_ts" in plan
+
+
+def test_search_ranks_matches_and_follows_inserts_and_deletes(conn):
+    conn.execute("INSERT INTO logs (agent_name, level, message, timestamp) VALUES "
+                 "('backup', 'error', 'Conexión rechazada por el servidor', '2024-01-02T00:00:00')")
+    hits = log_store.search_logs(conn, "conexion")  # remove_diacritics
+    assert [hit["agent_name"] for hit in hits] == ["backup"]
+    assert log_store.search_logs(conn, "rechaz*")
+    assert log_store.search_logs(conn, "conexion", level="info") == []
+
+    conn.execute("DELETE FROM logs WHERE agent_name = 'backup'")
+    assert log_store.search_logs(conn, "conexion") == []
+
+
+def test_search_escapes_query_syntax_and_highlights_as_safe_html(conn):
+    conn.execute("INSERT INTO logs (agent_name, level, message, timestamp) VALUES "
+                 "('web', 'info', '<script>alert(1)</script> token \"raro\" OR NOT', '2024-01-02T00:00:00')")
+    assert log_store.search_logs(conn, '"raro" OR NOT (') != []
+    assert log_store.search_logs(conn, "   ") == []
+    [hit] = log_store.search_logs(conn, "alert")
+    assert "<script>" not in hit["highlight"]
+    assert "&lt;script&gt;<mark>alert</mark>" in hit["highlight"]
+
+
+def test_rebuild_restores_a_dropped_index(conn):
+    conn.execute("INSERT INTO logs_fts(logs_fts) VALUES ('delete-all')")
+    assert log_store.search_logs(conn, "mensaje") == []
+    assert log_store.rebuild_fts(conn) == 40
+    assert len(log_store.search_logs(conn, "mensaje", limit=100)) == 40
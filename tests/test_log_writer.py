@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from db_executor import DBExecutor
+from db_pool import SQLitePool
+from log_writer import LogWriter
+
+
+@pytest.fixture
+def executor(tmp_path):
+    executor = DBExecutor(SQLitePool(tmp_path / "logs.db"))
+    asyncio.run(executor.write(lambda conn: conn.execute(
+        "CREATE TABLE logs (id INTEGER PRIMARY KEY, agent_name TEXT, level TEXT, message TEXT, timestamp TEXT)")))
+    yield executor
+    executor.shutdown()
+
+
+def _row(i: int) -> tuple:
+    return ("agente", "info", f"mensaje {i}", f"2024-01-01T00:00:{i % 60:02d}")
+
+
+def _count(executor) -> int:
+    return asyncio.run(executor.fetchone("SELECT COUNT(*) AS n FROM logs"))["n"]
+
+
+def test_concurrent_submits_share_commits(executor):
+    async def scenario():
+        committed = []
+        writer = LogWriter(executor, max_rows=1000, max_delay_ms=20, on_commit=committed.extend)
+        writer.start()
+        ids = await asyncio.gather(*(writer.submit([_row(i), _row(i)]) for i in range(50)))
+        await writer.stop()
+        return writer, ids, committed
+
+    writer, ids, committed = asyncio.run(scenario())
+    assert writer.commits < 10 and writer.rows_written == 100
+    assert all(len(pair) == 2 and pair[0] < pair[1] for pair in ids)
+    assert sorted(row_id for row_id, _ in committed) == sorted(i for pair in ids for i in pair)
+    assert _count(executor) == 100
+
+
+def test_async_submit_returns_before_commit_and_stop_flushes(executor):
+    async def scenario():
+        writer = LogWriter(executor, max_delay_ms=1000)
+        writer.start()
+        result = await writer.submit([_row(1)], durable=False)
+        before = await executor.fetchone("SELECT COUNT(*) AS n FROM logs")
+        await writer.stop()
+        return result, before["n"]
+
+    assert asyncio.run(scenario()) == (None, 0)
+    assert _count(executor) == 1
+
+
+def test_full_queue_degrades_async_to_durable(executor):
+    async def scenario():
+        writer = LogWriter(executor, max_rows=1000, max_delay_ms=200, max_pending_rows=5)
+        writer.start()
+        first = await writer.submit([_row(i) for i in range(4)], durable=False)
+        second = await writer.submit([_row(i) for i in range(4)], durable=False)
+        await writer.stop()
+        return writer, first, second
+
+    writer, first, second = asyncio.run(scenario())
+    assert first is None
+    assert len(second) == 4 and writer.degraded == 1
+
+
+def test_batch_endpoint_accepts_ndjson_and_validates_ack(client):
+    body = "\n".join('{"agent_name": "nd", "level": "info", "message": "linea %d"}' % i for i in range(3))
+    response = client.post("/api/logs/batch", content=body, headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 200 and len(response.json()["ids"]) == 3
+    assert client.post("/api/logs/batch?ack=nunca", json=[]).status_code == 400
+    assert client.post("/api/logs/batch", json={"no": "array"}).status_code == 422
+    response = client.post("/api/logs/batch?ack=async", json=[{"agent_name": "a", "level": "info", "message": "x"}])
+    assert response.status_code == 202 and response.json() == {"accepted": 1}
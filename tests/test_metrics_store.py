@@ -0,0 +1,94 @@
+import time
+from datetime import datetime
+
+import pytest
+
+import database
+import metrics_store
+
+
+def _snapshot(ts: float, cpu: float) -> dict:
+    return {
+        "cpu": {"percent": cpu},
+        "memory": {"percent": 50.0, "used": 4.0, "total": 8.0},
+        "disk": {"percent": 30.0, "used": 100.0, "total": 500.0},
+        "sampled_at": datetime.fromtimestamp(ts).isoformat(),
+    }
+
+
+def _point(history: dict, ts: float) -> dict:
+    t = int(ts) // history["step"] * history["step"]
+    return next(point for point in history["points"] if point["t"] == t)
+
+
+@pytest.fixture
+def recorder():
+    rollups = metrics_store.RollupEngine(database.db, tiers=(3600,))
+    return metrics_store.MetricsRecorder(rollups, boot_ts=0, flush_every=1000)
+
+
+def test_raw_history_includes_unflushed_samples(client, run, recorder):
+    base = int(time.time()) // 10 * 10 - 600
+    for i, cpu in enumerate((10.0, 20.0, 30.0)):
+        run(recorder.record, _snapshot(base + i, cpu))
+
+    history = run(recorder.rollups.history, 3600, 10, recorder.unflushed())
+    assert history["tier"] == "raw"
+    cpu = _point(history, base)["cpu_percent"]
+    assert (cpu["count"], cpu["min"], cpu["max"], cpu["avg"]) == (3, 10.0, 30.0, 20.0)
+
+
+def test_raw_history_does_not_double_count_after_flush(client, run, recorder):
+    base = int(time.time()) // 10 * 10 - 1200
+    run(recorder.record, _snapshot(base, 40.0))
+    run(recorder.record, _snapshot(base + 1, 60.0))
+    pending = recorder.unflushed()
+    run(recorder.flush)  # volcado entre la toma de pendientes y la consulta
+    assert recorder.unflushed() == []
+
+    for history in (run(recorder.rollups.history, 3600, 10, pending),
+                    run(recorder.rollups.history, 3600, 10, recorder.unflushed())):
+        assert _point(history, base)["cpu_percent"]["count"] == 2
+
+
+def test_parse_duration():
+    assert [metrics_store.parse_duration(v) for v in ("90", "90s", "15m", "6h", "7d", "1.5h")] == \
+        [90, 90, 900, 21600, 604800, 5400]
+    with pytest.raises(ValueError):
+        metrics_store.parse_duration("una hora")
+
+
+def test_pick_tier_is_the_coarsest_within_step():
+    rollups = metrics_store.RollupEngine(database.db, tiers=(3600, 60, 900))
+    assert [rollups.pick_tier(step) for step in (10, 60, 300, 900, 7200)] == [0, 60, 60, 900, 3600]
+
+
+def test_add_closes_buckets_with_summary_rows():
+    rollups = metrics_store.RollupEngine(database.db, tiers=(60,))
+    for i, cpu in enumerate(range(1, 21)):
+        assert rollups.add(600 + i, {"cpu_percent": float(cpu)}) == []
+    [row] = rollups.add(660, {"cpu_percent": 5.0})
+    assert row == (60, "cpu_percent", 600, 20, 1.0, 10.5, 20.0, 19.0)
+
+
+def test_merged_p95_is_flagged_as_upper_bound(client, run):
+    rollups = metrics_store.RollupEngine(database.db, tiers=(60,))
+    base = int(time.time()) // 120 * 120 - 7200
+    # Dos buckets de 1m: p95 90 y 10; un punto de 2m los junta
+    for i in range(20):
+        run(rollups.record, base + i, {"cpu_percent": 90.0 if i >= 10 else 1.0})
+    for i in range(20):
+        run(rollups.record, base + 60 + i, {"cpu_percent": 10.0})
+    run(rollups.flush)
+
+    history = run(rollups.history, 3 * 3600, 120)
+    assert history["tier"] == 60 and history["p95_upper_bound"] is True
+    cpu = _point(history, base)["cpu_percent"]
+    assert cpu["count"] == 40 and cpu["p95"] == 90.0
+    assert run(rollups.history, 3600, 10, [])["p95_upper_bound"] is False
+
+
+def test_history_endpoint(client):
+    assert client.get("/api/metrics/history?range=ayer").status_code == 422
+    body = client.get("/api/metrics/history?range=1h&step=1m").json()
+    assert body["range"] == 3600 and body["step"] == 60 and body["tier"] == 60
@@ -0,0 +1,27 @@
+def _create_agent(client, name):
+    response = client.post("/api/agents", json={"name": name, "status": "idle"})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_http_heartbeat_rejects_unknown_agent(client, app_main):
+    response = client.post("/api/agents/fantasma/heartbeat", json={"status": "online"})
+    assert response.status_code == 404
+    assert "fantasma" not in app_main.presence.agents
+    names = [agent["name"] for agent in client.get("/api/agents").json()]
+    assert "fantasma" not in names
+
+
+def test_ws_heartbeat_rejects_unknown_agent(client):
+    with client.websocket_connect("/ws") as ws:
+        ws.send_json({"action": "heartbeat", "agent": "fantasma-ws", "status": "online"})
+        assert ws.receive_json() == {"type": "error", "error": "agente desconocido"}
+
+
+def test_heartbeat_marks_known_agent_online(client, app_main):
+    _create_agent(client, "latidor")
+    response = client.post("/api/agents/latidor/heartbeat", json={"status": "running"})
+    assert response.status_code == 200
+    assert response.json()["is_online"] is True
+    assert app_main.presence.is_online("latidor")
+    assert app_main.presence.agents["latidor"]["status"] == "running"
@@ -0,0 +1,46 @@
+import os
+
+import psutil
+
+from process_table import ProcessTable
+
+
+def test_refresh_reuses_handles_and_reports_this_process():
+    table = ProcessTable()
+    table.refresh()
+    handle = table._procs[os.getpid()]
+    rows = table.refresh()
+    assert table._procs[os.getpid()] is handle
+    me = next(row for row in rows if row["pid"] == os.getpid())
+    assert me["name"] == psutil.Process().name()
+    assert table.sampled_at is not None
+
+
+def test_top_sorts_and_filters_in_memory():
+    table = ProcessTable()
+    table.rows = [
+        {"pid": 1, "name": "python", "username": "ana", "cpu_percent": 5.0, "memory_percent": 1.0, "io_rate": None},
+        {"pid": 2, "name": "postgres", "username": "pg", "cpu_percent": 50.0, "memory_percent": 9.0, "io_rate": 10.0},
+        {"pid": 3, "name": "Python3", "username": "ana", "cpu_percent": 20.0, "memory_percent": 3.0, "io_rate": 99.0},
+    ]
+    assert [row["pid"] for row in table.top(2)] == [2, 3]
+    assert [row["pid"] for row in table.top(sort="memory")] == [2, 3, 1]
+    assert [row["pid"] for row in table.top(sort="io")] == [3, 2, 1]
+    assert [row["pid"] for row in table.top(name="python", user="ana")] == [3, 1]
+
+
+def test_dead_processes_are_forgotten():
+    table = ProcessTable()
+    table.refresh()
+    table._procs[2 ** 22 + 1] = psutil.Process()  # pid que ya no existe
+    table.refresh()
+    assert 2 ** 22 + 1 not in table._procs
+
+
+def test_processes_route_validates_sort_and_supports_etag(client):
+    assert client.get("/api/processes?sort=nombre").status_code == 422
+    response = client.get("/api/processes?limit=5")
+    assert response.status_code == 200 and len(response.json()) <= 5
+    # Sin refresco de por medio la muestra es la misma
+    assert client.get("/api/processes?limit=5",
+                      headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
@@ -0,0 +1,141 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import config
+import profiler
+
+
+def _spin(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sample_collapses_stacks_per_thread():
+    stop = threading.Event()
+    thread = threading.Thread(target=_spin, args=(stop,), name="test-spinner")
+    thread.start()
+    try:
+        profile = profiler.sample(0.1, 0.005)
+    finally:
+        stop.set()
+        thread.join()
+    assert profile["samples"] > 0
+    spinner = [stack for stack in profile["stacks"] if stack.startswith("test-spinner;")]
+    assert spinner and all("_spin (test_profiler.py:" in stack for stack in spinner)
+    lines = profiler.collapsed(profile).splitlines()
+    counts = [int(line.rsplit(" ", 1)[1]) for line in lines]
+    assert counts == sorted(counts, reverse=True) and sum(counts) == sum(profile["stacks"].values())
+
+
+def test_record_query_only_inside_a_request(monkeypatch):
+    profiler.record_query("data", "SELECT 1")  # fuera de un request: no hace nada
+    queries = []
+    token = profiler._queries.set(queries)
+    try:
+        monkeypatch.setattr(config, "SLOW_REQUEST_MAX_QUERIES", 2)
+        profiler.record_query("data", "SELECT *\n    FROM   logs\n WHERE id = ?")
+        profiler.record_query("data", "SELECT " + "x" * 1000)
+        profiler.record_query("data", "SELECT 3")
+    finally:
+        profiler._queries.reset(token)
+    assert [query["sql"] for query in queries][0] == "SELECT * FROM logs WHERE id = ?"
+    assert len(queries[1]["sql"]) == profiler.MAX_QUERY_CHARS
+    assert len(queries) == 2
+
+
+@pytest.fixture
+def slow_app():
+    app = FastAPI()
+
+    @app.get("/lento")
+    async def lento():
+        profiler.record_query("data", "SELECT lento")
+        await asyncio.sleep(0.1)
+        return {"ok": True}
+
+    @app.get("/rapido")
+    async def rapido():
+        return {"ok": True}
+
+    @app.get("/bloqueante")
+    async def bloqueante():
+        time.sleep(0.1)
+        return {"ok": True}
+
+    @app.get("/api/debug/algo")
+    async def debug_algo():
+        await asyncio.sleep(0.1)
+        return {"ok": True}
+
+    app.add_middleware(profiler.SlowRequestMiddleware, threshold_ms=30)
+    profiler.slow_requests.clear()
+    with TestClient(app) as client:
+        yield client
+    profiler.slow_requests.clear()
+
+
+def test_slow_request_keeps_the_awaiting_stack_and_queries(slow_app):
+    slow_app.get("/rapido")
+    slow_app.get("/api/debug/algo")
+    slow_app.get("/lento", params={"x": 1})
+    [entry] = profiler.slow_requests
+    assert entry["path"] == "/lento?x=1" and entry["status"] == 200
+    assert entry["duration_ms"] >= 100
+    assert entry["stack_source"] == "task"
+    assert any(line.endswith(" in lento") for line in entry["stack"])
+    assert [query["sql"] for query in entry["queries"]] == ["SELECT lento"]
+
+
+def test_blocking_request_falls_back_to_the_watchdog(slow_app, monkeypatch):
+    monkeypatch.setattr(profiler.watchdog, "during", lambda start, end: None)
+    slow_app.get("/bloqueante")
+    [entry] = profiler.slow_requests
+    assert entry["stack_source"] is None and entry["stack"] == []
+
+    block = {"stack": ["main.py:1 in bloqueante"]}
+    monkeypatch.setattr(profiler.watchdog, "during", lambda start, end: block)
+    slow_app.get("/bloqueante")
+    assert profiler.slow_requests[-1]["stack_source"] == "watchdog"
+    assert profiler.slow_requests[-1]["stack"] == block["stack"]
+
+
+def _block_loop():
+    time.sleep(0.3)
+
+
+def test_loop_watchdog_records_the_blocking_stack():
+    watchdog = profiler.LoopWatchdog(threshold_ms=50, ring=5)
+
+    async def main():
+        watchdog.start()
+        await asyncio.sleep(0.1)
+        _block_loop()
+        await asyncio.sleep(0.1)
+        watchdog.stop()
+
+    asyncio.run(main())
+    [block] = watchdog.snapshot()
+    assert any(line.endswith(" in _block_loop") for line in block["stack"])
+    assert block["blocked_ms"] >= 200
+
+
+def test_debug_routes_only_exist_with_debug(client, monkeypatch):
+    assert client.get("/api/debug/slow").status_code == 404
+    assert client.get("/api/debug/profile", params={"seconds": 0.05}).status_code == 404
+
+    monkeypatch.setattr(config, "DEBUG", True)
+    assert set(client.get("/api/debug/slow").json()) == {"threshold_ms", "watchdog_threshold_ms",
+                                                         "requests", "loop_blocks"}
+    assert client.get("/api/debug/profile", params={"seconds": 0}).status_code == 400
+    assert client.get("/api/debug/profile", params={"seconds": 0.05, "format": "xml"}).status_code == 400
+    response = client.get("/api/debug/profile", params={"seconds": 0.05, "interval_ms": 5, "idle": True})
+    assert response.status_code == 200
+    assert response.headers["content-disposition"].endswith('.folded"')
+    assert response.text.strip()
+    profile = client.get("/api/debug/profile", params={"seconds": 0.05, "format": "json", "idle": True}).json()
+    assert profile["samples"] > 0 and isinstance(profile["stacks"][0]["stack"], list)
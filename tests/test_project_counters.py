@@ -0,0 +1,70 @@
+import sqlite3
+
+import database
+from db_pool import SQLitePool
+
+
+def _counters(client, project_id):
+    project = client.get(f"/api/projects/{project_id}").json()
+    return project["task_count"], project["completed_tasks"], project["progress"]
+
+
+def test_counters_follow_task_create_update_and_delete(client):
+    project = client.post("/api/projects", json={"name": "contadores"}).json()
+    assert _counters(client, project["id"]) == (0, 0, 0)
+
+    ids = [client.post("/api/tasks", json={"project_id": project["id"], "title": f"t{i}"}).json()["id"]
+           for i in range(3)]
+    assert _counters(client, project["id"]) == (3, 0, 0)
+
+    client.patch(f"/api/tasks/{ids[0]}", json={"status": "completed"})
+    assert _counters(client, project["id"]) == (3, 1, 33.33)
+
+    client.patch("/api/tasks/batch", json=[{"id": ids[1], "status": "completed"},
+                                          {"id": ids[2], "title": "solo el título"}])
+    assert _counters(client, project["id"]) == (3, 2, 66.67)
+
+    client.delete(f"/api/tasks/{ids[2]}")
+    assert _counters(client, project["id"]) == (2, 2, 100)
+
+    client.patch(f"/api/tasks/{ids[0]}", json={"status": "pending"})
+    client.delete(f"/api/tasks/{ids[1]}")
+    assert _counters(client, project["id"]) == (1, 0, 0)
+    client.delete(f"/api/tasks/{ids[0]}")
+    assert _counters(client, project["id"]) == (0, 0, 0)
+
+
+def test_moving_a_task_updates_both_projects(client, run):
+    source = client.post("/api/projects", json={"name": "origen"}).json()["id"]
+    target = client.post("/api/projects", json={"name": "destino"}).json()["id"]
+    task = client.post("/api/tasks", json={"project_id": source, "title": "mover", "status": "completed"}).json()
+    run(database.db.execute, "UPDATE tasks SET project_id = ? WHERE id = ?", (target, task["id"]))
+    assert _counters(client, source) == (0, 0, 0)
+    assert _counters(client, target) == (1, 1, 100)
+
+
+def test_existing_databases_are_backfilled_once(tmp_path, monkeypatch):
+    path = tmp_path / "viejo.db"
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE projects (id INTEGER PRIMARY KEY, name TEXT, description TEXT, status TEXT,
+                               priority INTEGER, progress REAL DEFAULT 0,
+                               created_at TIMESTAMP, updated_at TIMESTAMP);
+        CREATE TABLE tasks (id INTEGER PRIMARY KEY, project_id INTEGER, title TEXT, description TEXT,
+                            status TEXT, priority INTEGER, created_at TIMESTAMP, updated_at TIMESTAMP,
+                            completed_at TIMESTAMP);
+        INSERT INTO projects (id, name) VALUES (1, 'viejo');
+        INSERT INTO tasks (project_id, title, status) VALUES (1, 'a', 'completed'), (1, 'b', 'pending'),
+                                                             (1, 'c', 'pending'), (1, 'd', 'completed');
+    ''')
+    conn.close()
+    pool = SQLitePool(path)
+    monkeypatch.setattr(database, "pool", pool)
+    database.init_db()
+    pool.close_all()
+
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT task_count, completed_tasks, progress FROM projects").fetchone() == (4, 2, 50)
+    conn.execute("INSERT INTO tasks (project_id, title, status) VALUES (1, 'e', 'completed')")
+    assert conn.execute("SELECT task_count, completed_tasks, progress FROM projects").fetchone() == (5, 3, 60)
+    conn.close()
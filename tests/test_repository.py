@@ -0,0 +1,31 @@
+import database
+import repository
+
+
+def test_default_url_shares_the_data_database():
+    assert repository.SHARED
+
+
+def test_projects_and_tasks_round_trip(client):
+    project = client.post("/api/projects", json={"name": "repo-test", "priority": 1}).json()
+    tasks = client.post("/api/tasks/batch", json=[
+        {"project_id": project["id"], "title": f"t{i}", "status": "completed" if i == 0 else "pending"}
+        for i in range(3)
+    ])
+    assert tasks.status_code == 200
+    loaded = client.get(f"/api/projects/{project['id']}").json()
+    assert sorted(task["title"] for task in loaded["tasks"]) == ["t0", "t1", "t2"]
+    assert loaded["task_count"] == 3 and loaded["completed_tasks"] == 1
+
+
+def test_dispose_does_not_close_executor_connections(client, run):
+    client.post("/api/projects", json={"name": "antes-de-dispose"})
+    repository.engine.dispose()  # cierra todas las conexiones que SQLAlchemy cree propias
+    repository.dispose()
+    # Las conexiones del SQLitePool siguen abiertas para el DBExecutor...
+    assert run(database.db.fetchone, "SELECT COUNT(*) AS n FROM projects")["n"] >= 1
+    run(database.db.execute, "UPDATE projects SET progress = progress WHERE 0")
+    # ...y el repositorio las vuelve a tomar prestadas
+    assert client.post("/api/projects", json={"name": "despues-de-dispose"}).status_code == 200
+    names = [project["name"] for project in client.get("/api/projects").json()]
+    assert {"antes-de-dispose", "despues-de-dispose"} <= set(names)
@@ -0,0 +1,78 @@
+import gzip
+import os
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+import retention
+from db_executor import DBExecutor
+from db_pool import SQLitePool
+
+
+@pytest.fixture
+def legacy_db(tmp_path, run):
+    """Base creada sin auto_vacuum (como las anteriores a la retención) con logs viejos y nuevos."""
+    path = tmp_path / "legacy.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE logs (id INTEGER PRIMARY KEY, level TEXT, message TEXT, timestamp TEXT)")
+    now = datetime.now()
+    conn.executemany("INSERT INTO logs (level, message, timestamp) VALUES (?, ?, ?)", [
+        ("info", "x" * 2000, (now - timedelta(days=30 if i % 2 else 0)).isoformat()) for i in range(400)
+    ])
+    conn.commit()
+    conn.close()
+    db = DBExecutor(SQLitePool(path))
+    yield db
+    db.shutdown()
+    db.pool.close_all()
+
+
+def _auto_vacuum(run, db) -> int:
+    # Por el escritor: el lector puede tener cacheado el modo anterior del encabezado
+    return run(db.write, lambda conn: conn.execute("PRAGMA auto_vacuum").fetchone()[0])
+
+
+def test_new_databases_start_incremental(client, run, app_main):
+    assert _auto_vacuum(run, app_main.db) == 2
+
+
+def test_run_once_never_runs_a_full_vacuum(run, legacy_db):
+    job = retention.RetentionJob([retention.RetentionRule(legacy_db, "logs", "timestamp", 7,
+                                                          ts_format=retention.LOCAL_ISO)],
+                                 archive_dir=None)
+    report = run(job.run_once)
+    assert report["rows_deleted"] == {"logs": 200}
+    assert report["needs_compact"] == [legacy_db.pool.path]
+    assert report["bytes_reclaimed"] == {}
+    assert _auto_vacuum(run, legacy_db) == 0
+
+    size = os.path.getsize(legacy_db.pool.path)
+    reclaimed = run(job.compact)
+    assert reclaimed[legacy_db.pool.path] > 0
+    assert os.path.getsize(legacy_db.pool.path) < size
+    assert _auto_vacuum(run, legacy_db) == 2
+    assert run(job.run_once)["needs_compact"] == []
+
+
+def test_cutoff_matches_each_column_format():
+    assert " " in retention.cutoff_for(retention.UTC_SQL, 1) and "T" not in retention.cutoff_for(retention.UTC_SQL, 1)
+    assert "T" in retention.cutoff_for(retention.LOCAL_ISO, 1)
+    assert isinstance(retention.cutoff_for(retention.EPOCH, 1), int)
+
+
+def test_rules_delete_in_chunks_per_level_and_archive(tmp_path, run, legacy_db):
+    run(legacy_db.write, lambda conn: conn.execute("UPDATE logs SET level = 'debug' WHERE id % 4 IN (0, 1)"))
+    rules = [
+        retention.RetentionRule(legacy_db, "logs", "timestamp", 7, "level = ?", ("debug",),
+                                name="logs:debug", ts_format=retention.LOCAL_ISO),
+        retention.RetentionRule(legacy_db, "logs", "timestamp", 60, "level != ?", ("debug",),
+                                name="logs:*", ts_format=retention.LOCAL_ISO),
+    ]
+    job = retention.RetentionJob(rules, chunk_size=30, archive_dir=tmp_path / "archive")
+    report = run(job.run_once)
+    # Los ids pares tienen 30 días: caen los debug viejos (id % 4 == 0), ninguno del resto
+    assert report["rows_deleted"] == {"logs:debug": 100, "logs:*": 0}
+    [archive] = (tmp_path / "archive").iterdir()
+    with gzip.open(archive, "rt") as f:
+        assert sum(1 for _ in f) == 100
@@ -0,0 +1,46 @@
+import math
+
+from ring_buffer import MetricRing
+
+
+def _fill(ring, n, start=0):
+    for i in range(start, start + n):
+        ring.append(float(i), {"cpu": float(i), "mem": None if i % 3 == 0 else 2.0 * i})
+
+
+def test_window_is_chronological_and_bounded():
+    ring = MetricRing(("cpu", "mem"), capacity=10)
+    _fill(ring, 25)
+    assert len(ring) == 10 and ring.written == 25
+    window = ring.window(5, now=24.0)
+    assert window["t"] == [19.0, 20.0, 21.0, 22.0, 23.0, 24.0]
+    assert window["cpu"] == window["t"]
+    # Valores faltantes: None, nunca NaN
+    assert window["mem"][2] is None and not any(isinstance(v, float) and math.isnan(v) for v in window["mem"])
+
+
+def test_window_larger_than_the_buffer_returns_what_is_left():
+    ring = MetricRing(("cpu",), capacity=4)
+    for i in range(6):
+        ring.append(float(i), {"cpu": float(i)})
+    assert ring.window(100, now=5.0)["t"] == [2.0, 3.0, 4.0, 5.0]
+    assert MetricRing(("cpu",), capacity=4).window(10) == {"t": [], "cpu": []}
+
+
+def test_rows_since_tracks_a_sequence_across_wraparound():
+    ring = MetricRing(("cpu", "mem"), capacity=8)
+    _fill(ring, 5)
+    seq, rows = ring.rows_since(0)
+    assert seq == 5 and [row[0] for row in rows] == [0.0, 1.0, 2.0, 3.0, 4.0]
+    _fill(ring, 6, start=5)
+    seq, rows = ring.rows_since(seq)
+    assert seq == 11 and [row[0] for row in rows] == [5.0, 6.0, 7.0, 8.0, 9.0, 10.0]
+    # Si el buffer ya pisó parte del rango, se devuelve lo disponible
+    _, rows = ring.rows_since(0)
+    assert [row[0] for row in rows] == [float(i) for i in range(3, 11)]
+
+
+def test_recent_endpoint_reads_the_ring(client, app_main):
+    body = client.get("/api/metrics/recent?seconds=60").json()
+    assert body["seconds"] == 60
+    assert set(app_main.metrics_store.SAMPLE_FIELDS) <= body.keys()
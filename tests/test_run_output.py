@@ -0,0 +1,90 @@
+import database
+import run_output
+
+
+def test_complete_utf8_drops_a_trailing_partial_character():
+    text = "año€".encode()
+    assert run_output._complete_utf8(text) == len(text)
+    assert run_output._complete_utf8(text[:-1]) == len(text) - 3
+    assert run_output._complete_utf8(text[:-2]) == len(text) - 3
+    assert run_output._complete_utf8("añ".encode()[:-1]) == 1
+    assert run_output._complete_utf8(b"") == 0
+
+
+def _new_run(run, agent="test-output"):
+    return run(database.add_agent_run, agent, "running")
+
+
+def test_writer_stores_fixed_size_chunks_and_keeps_a_bounded_tail(run):
+    run_id = _new_run(run)
+    seen = []
+    writer = run_output.RunOutputWriter(database.db, run_id, chunk_size=4, tail_size=5,
+                                        on_chunk=lambda *chunk: seen.append(chunk))
+
+    async def produce():
+        await writer.write(b"0123")
+        await writer.write(b"456789")
+        assert writer.total_bytes == 10 and writer.offset == 8
+        await writer.flush()
+
+    run(produce)
+    rows = run(database.db.fetchall, "SELECT offset, data FROM agent_run_output WHERE run_id = ? ORDER BY offset",
+               (run_id,))
+    assert [(row["offset"], row["data"]) for row in rows] == [(0, b"0123"), (4, b"4567"), (8, b"89")]
+    assert seen == [(run_id, 0, b"0123"), (run_id, 4, b"4567"), (run_id, 8, b"89")]
+    assert writer.tail_text() == "56789"
+
+
+def test_writer_survives_a_failing_on_chunk_callback(run):
+    run_id = _new_run(run)
+
+    def boom(*chunk):
+        raise RuntimeError("boom")
+
+    writer = run_output.RunOutputWriter(database.db, run_id, chunk_size=2, on_chunk=boom)
+    run(writer.write, b"abcd")
+    assert writer.offset == 4
+
+
+def _store(run, run_id, chunks):
+    offset = 0
+    for chunk in chunks:
+        run(database.db.write, run_output._insert_chunk, run_id, offset, chunk)
+        offset += len(chunk)
+
+
+def test_read_output_spans_chunks_from_any_offset(run):
+    run_id = _new_run(run)
+    _store(run, run_id, [b"hola ", b"mundo ", b"final"])
+    page = run(database.db.read, run_output.read_output, run_id, 3, 6)
+    assert page["data"] == "a mund"
+    assert page["next_offset"] == 9
+    assert page["total_bytes"] == 16
+    rest = run(database.db.read, run_output.read_output, run_id, page["next_offset"], 100)
+    assert rest["data"] == "o final" and rest["next_offset"] == 16
+
+
+def test_read_output_does_not_split_a_multibyte_character(run):
+    run_id = _new_run(run)
+    _store(run, run_id, ["ab€cd".encode()])
+    page = run(database.db.read, run_output.read_output, run_id, 0, 3)
+    assert page["data"] == "ab" and page["next_offset"] == 2
+    page = run(database.db.read, run_output.read_output, run_id, 2, 3)
+    assert page["data"] == "€" and page["next_offset"] == 5
+
+
+def test_output_route(client, run):
+    assert client.get("/api/runs/999999/output").status_code == 404
+    run_id = _new_run(run)
+    _store(run, run_id, [b"linea 1\n", b"linea 2\n"])
+    assert client.get(f"/api/runs/{run_id}/output", params={"offset": -1}).status_code == 422
+    assert client.get(f"/api/runs/{run_id}/output", params={"limit": 0}).status_code == 422
+
+    body = client.get(f"/api/runs/{run_id}/output", params={"offset": 6, "limit": 5}).json()
+    assert body["data"] == "1\nlin"
+    assert body["status"] == "running" and body["complete"] is False
+
+    run(database.update_agent_run, run_id, "success", "linea 2\n", None, 16)
+    body = client.get(f"/api/runs/{run_id}/output").json()
+    assert body["data"] == "linea 1\nlinea 2\n"
+    assert body["complete"] is True
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+
+import database
+import run_stats
+
+
+def _insert_runs(run, agent, runs):
+    """runs: (status, execution_time_ms, horas atrás), en orden cronológico."""
+    now = datetime.utcnow()
+    for status, ms, hours_ago in runs:
+        started = (now - timedelta(hours=hours_ago)).strftime("%Y-%m-%d %H:%M:%S")
+        run(database.db.execute,
+            "INSERT INTO agent_runs (agent_name, status, started_at, execution_time_ms, output, error_message) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (agent, status, started, ms, "salida", "falló" if status == "failed" else None))
+
+
+def test_list_runs_pages_backwards_without_heavy_columns(run):
+    _insert_runs(run, "test-list", [("success", 10, 3), ("failed", 20, 2), ("running", None, 1)])
+    page = run(database.db.read, run_stats.list_runs, 2, "test-list")
+    assert [row["status"] for row in page] == ["running", "failed"]
+    assert "output" not in page[0] and "error_message" not in page[0]
+    assert page[1]["has_error"] == 1
+
+    older = run(database.db.read, run_stats.list_runs, 2, "test-list", None, page[-1]["id"])
+    assert [row["status"] for row in older] == ["success"]
+    failed = run(database.db.read, run_stats.list_runs, 50, "test-list", "failed")
+    assert [row["execution_time_ms"] for row in failed] == [20]
+
+
+def test_agent_stats_counts_percentiles_and_failure_streaks(run):
+    runs = [("success", ms, 30 - i) for i, ms in enumerate(range(10, 110, 10))]
+    runs += [("failed", 500, 15), ("failed", 600, 14), ("failed", 700, 13),
+             ("success", 5, 12), ("failed", 800, 11), ("failed", 900, 10), ("running", None, 9)]
+    runs.append(("success", 1, 24 * 30))  # fuera de la ventana
+    runs.sort(key=lambda item: -item[2])
+    _insert_runs(run, "test-stats", runs)
+
+    [stats] = run(database.db.read, run_stats.agent_stats, run_stats.since_cutoff(7 * 86400), "test-stats")
+    assert stats["runs"] == 17
+    assert (stats["success"], stats["failed"], stats["running"]) == (11, 5, 1)
+    assert stats["success_rate"] == round(11 / 16, 4)
+    assert stats["max_ms"] == 900
+    # nearest-rank sobre 16 duraciones: 5, 10..100, 500..900
+    assert stats["p50_ms"] == 70
+    assert stats["p95_ms"] == 900
+    assert stats["longest_failure_streak"] == 3
+    assert stats["current_failure_streak"] == 2
+
+
+def test_current_failure_streak_is_zero_after_a_success(run):
+    _insert_runs(run, "test-recovered", [("failed", 1, 3), ("failed", 1, 2), ("success", 1, 1)])
+    [stats] = run(database.db.read, run_stats.agent_stats, run_stats.since_cutoff(86400), "test-recovered")
+    assert stats["longest_failure_streak"] == 2
+    assert stats["current_failure_streak"] == 0
+
+
+def test_duration_histogram_uses_equal_width_buckets(run):
+    _insert_runs(run, "test-histo", [("success", ms, 1) for ms in (0, 5, 9, 10, 19, 99)])
+    since = run_stats.since_cutoff(86400)
+    histogram = run(database.db.read, run_stats.duration_histogram, since, "test-histo", 10)
+    assert (histogram["min_ms"], histogram["max_ms"], histogram["width_ms"]) == (0, 99, 10)
+    assert [bucket["count"] for bucket in histogram["buckets"]] == [3, 2, 0, 0, 0, 0, 0, 0, 0, 1]
+    assert run(database.db.read, run_stats.duration_histogram, since, "test-nadie", 10) == {"buckets": []}
+
+
+def test_runs_routes(client, run):
+    _insert_runs(run, "test-routes", [("success", 100, 2), ("failed", 300, 1)])
+    listed = client.get("/api/runs", params={"agent": "test-routes"}).json()
+    assert [row["status"] for row in listed] == ["failed", "success"]
+
+    stats = client.get("/api/runs/stats", params={"since": "1d", "agent": "test-routes"}).json()
+    assert stats["since"] == "1d"
+    assert stats["agents"][0]["runs"] == 2
+
+    histogram = client.get("/api/runs/histogram", params={"agent": "test-routes", "buckets": 2}).json()
+    assert [bucket["count"] for bucket in histogram["buckets"]] == [1, 1]
+
+    assert client.get("/api/runs/stats", params={"since": "ayer"}).status_code == 422
+    assert client.get("/api/runs/histogram", params={"buckets": 0}).status_code == 422
@@ -0,0 +1,77 @@
+import time
+from datetime import datetime
+
+import database
+
+
+def _cron_stats(client):
+    stats = client.get("/api/dashboard").json()["stats"]
+    return stats["total_cron_jobs"], stats["active_cron_jobs"]
+
+
+def test_dashboard_cron_counters_follow_agent_config(client, run):
+    total, active = _cron_stats(client)
+    run(database.db.execute, "INSERT INTO agent_config (name, schedule, enabled) VALUES (?, ?, ?)",
+        ("test-cron-on", "*/5 * * * *", 1))
+    run(database.db.execute, "INSERT INTO agent_config (name, schedule, enabled) VALUES (?, ?, ?)",
+        ("test-cron-off", "0 3 * * *", 0))
+    assert client.post("/api/scheduler/reload").status_code == 200
+    assert _cron_stats(client) == (total + 2, active + 1)
+
+    run(database.db.execute, "DELETE FROM agent_config WHERE name LIKE 'test-cron-%'")
+    client.post("/api/scheduler/reload")
+    assert _cron_stats(client) == (total, active)
+
+
+def test_run_job_requires_admin_token(client):
+    assert client.post("/api/scheduler/jobs/nope/run").status_code == 403
+    assert client.post("/api/scheduler/jobs/nope/run", headers={"X-Admin-Token": "otro"}).status_code == 403
+    assert client.post("/api/scheduler/jobs/nope/run", headers={"X-Admin-Token": "secreto"}).status_code == 404
+
+
+def test_run_job_non_ascii_token_is_forbidden(client):
+    # Starlette decodifica los headers como latin-1: antes compare_digest levantaba TypeError (500)
+    response = client.post("/api/scheduler/jobs/nope/run", headers={"X-Admin-Token": "contraseña".encode("latin-1")})
+    assert response.status_code == 403
+
+
+def _add_job(run, client, name, command, **columns):
+    fields = {"name": name, "schedule": "0 0 1 1 *", "command": command, "enabled": 1, **columns}
+    run(database.db.execute, f"INSERT INTO agent_config ({', '.join(fields)}) VALUES "
+                             f"({', '.join('?' for _ in fields)})", tuple(fields.values()))
+    client.post("/api/scheduler/reload")
+
+
+def _wait_for_run(client, run, name, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        row = run(database.db.fetchone, "SELECT * FROM agent_runs WHERE agent_name = ? ORDER BY id DESC", (name,))
+        if row and row["status"] != "running":
+            return row
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+
+ADMIN = {"X-Admin-Token": "secreto"}
+
+
+def test_run_now_executes_the_command_and_records_the_run(client, run):
+    _add_job(run, client, "test-eco", "echo hola-scheduler")
+    job = next(job for job in client.get("/api/scheduler").json()["jobs"] if job["name"] == "test-eco")
+    assert job["next_run"].startswith(f"{datetime.now().year + 1}-01-01T00:00")
+
+    assert client.post("/api/scheduler/jobs/test-eco/run", headers=ADMIN).status_code == 200
+    finished = _wait_for_run(client, run, "test-eco")
+    assert finished["status"] == "success" and "hola-scheduler" in finished["output"]
+    config_row = run(database.db.fetchone, "SELECT * FROM agent_config WHERE name = 'test-eco'")
+    assert (config_row["run_count"], config_row["success_count"], config_row["last_status"]) == (1, 1, "success")
+
+
+def test_concurrency_limit_and_timeout(client, run):
+    _add_job(run, client, "test-lento", "sleep 5", timeout_seconds=0.5)
+    assert client.post("/api/scheduler/jobs/test-lento/run", headers=ADMIN).status_code == 200
+    assert client.post("/api/scheduler/jobs/test-lento/run", headers=ADMIN).status_code == 409
+    finished = _wait_for_run(client, run, "test-lento")
+    assert finished["status"] == "timeout"
+    assert client.post("/api/scheduler/jobs/test-lento/run", headers=ADMIN).status_code == 200
+    _wait_for_run(client, run, "test-lento")
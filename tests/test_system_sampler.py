@@ -0,0 +1,44 @@
+import asyncio
+
+from system_sampler import SystemSampler
+
+
+def test_snapshot_shape():
+    snapshot = SystemSampler().sample()
+    assert {"cpu", "memory", "disk", "boot_time", "timestamp", "sampled_at"} <= snapshot.keys()
+    assert 0 <= snapshot["disk"]["percent"] <= 100
+
+
+def test_background_loop_feeds_listeners_and_survives_errors():
+    async def scenario():
+        sampler = SystemSampler(interval=0.01)
+        seen = []
+
+        async def failing(snapshot):
+            raise RuntimeError("listener roto")
+
+        async def collect(snapshot):
+            seen.append(snapshot)
+
+        sampler.add_listener(failing)
+        sampler.add_listener(collect)
+        sampler.start()
+        while len(seen) < 3:
+            await asyncio.sleep(0.01)
+        await sampler.stop()
+        return sampler, seen
+
+    sampler, seen = asyncio.run(scenario())
+    assert sampler.snapshot is seen[-1]
+
+
+def test_api_system_serves_the_cached_snapshot(client, app_main, monkeypatch):
+    snapshot = app_main.sampler.latest()
+
+    def sample():
+        raise AssertionError("/api/system no debería muestrear en el request")
+
+    monkeypatch.setattr(app_main.sampler, "sample", sample)
+    response = client.get("/api/system")
+    assert response.status_code == 200
+    assert response.json()["sampled_at"] == snapshot["sampled_at"]
@@ -0,0 +1,89 @@
+import re
+import threading
+
+import telemetry
+
+
+def test_counter_sums_per_thread_shards():
+    registry = telemetry.Registry()
+    counter = registry.counter("test_total", "Prueba", ("kind",))
+
+    def work():
+        for _ in range(1000):
+            counter.inc(("a",))
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    counter.inc(("b",), 2.5)
+    assert counter.values() == {("a",): 4000, ("b",): 2.5}
+    assert registry.render().splitlines() == [
+        "# HELP test_total Prueba",
+        "# TYPE test_total counter",
+        'test_total{kind="a"} 4000',
+        'test_total{kind="b"} 2.5',
+    ]
+
+
+def test_histogram_buckets_are_cumulative_with_inf():
+    histogram = telemetry.Histogram("test_seconds", "Prueba", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, ("/x",))
+    assert list(histogram.collect()) == [
+        'test_seconds_bucket{route="/x",le="0.1"} 2',
+        'test_seconds_bucket{route="/x",le="1.0"} 3',
+        'test_seconds_bucket{route="/x",le="+Inf"} 4',
+        'test_seconds_sum{route="/x"} 3.65',
+        'test_seconds_count{route="/x"} 4',
+    ]
+
+
+def test_label_values_are_escaped():
+    counter = telemetry.Counter("test_escape_total", "Prueba", ("path",))
+    counter.inc(('a"b\\c\nd',))
+    assert list(counter.collect()) == ['test_escape_total{path="a\\"b\\\\c\\nd"} 1']
+
+
+def test_failing_gauge_does_not_break_the_scrape():
+    registry = telemetry.Registry()
+    registry.gauge("test_broken", "Roto", lambda: 1 / 0)
+    registry.gauge("test_labeled", "Con labels", lambda: {("x",): 3}, ("name",))
+    lines = registry.render().splitlines()
+    assert "# TYPE test_broken gauge" in lines
+    assert 'test_labeled{name="x"} 3' in lines
+
+
+def _sample(text, name, **labels):
+    wanted = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    match = re.search(rf"^{re.escape(name)}\{{{re.escape(wanted)}\}} (\S+)$", text, re.M)
+    return float(match.group(1)) if match else 0.0
+
+
+def test_metrics_endpoint_counts_requests_by_route_template(client):
+    before = client.get("/metrics").text
+    for run_id in (999991, 999992):
+        assert client.get(f"/api/runs/{run_id}").status_code == 404
+    response = client.get("/metrics")
+    assert response.headers["content-type"] == telemetry.CONTENT_TYPE
+    text = response.text
+
+    labels = {"method": "GET", "route": "/api/runs/{run_id}", "status": "404"}
+    assert _sample(text, "jazmin_http_requests_total", **labels) == \
+        _sample(before, "jazmin_http_requests_total", **labels) + 2
+    assert "/api/runs/999991" not in text
+    assert _sample(text, "jazmin_http_request_duration_seconds_count", method="GET",
+                   route="/api/runs/{run_id}") >= 2
+    assert "jazmin_http_requests_in_flight 1" in text.splitlines()  # el propio scrape
+    for name in ("jazmin_db_query_duration_seconds_count", "jazmin_db_queue_depth",
+                 "jazmin_ws_connections", "jazmin_event_loop_lag_max_seconds"):
+        assert name in text
+
+
+def test_unmatched_paths_share_one_series(client):
+    client.get("/no-existe-1")
+    client.get("/no-existe-2")
+    text = client.get("/metrics").text
+    assert _sample(text, "jazmin_http_requests_total", method="GET", route="<unmatched>", status="404") >= 2
+    assert "no-existe" not in text
@@ -0,0 +1,55 @@
+import time
+
+
+def _eventually(check, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not check():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def _receive(ws, msg_type):
+    """Siguiente mensaje del tipo pedido (los demás tópicos pueden intercalarse)."""
+    while True:
+        message = ws.receive_json()
+        if message["type"] == msg_type:
+            return message
+
+
+def _subscribe(ws, *topics):
+    ws.send_json({"action": "subscribe", "topics": list(topics)})
+    return _receive(ws, "subscribed")
+
+
+def test_new_logs_are_pushed_after_commit(client):
+    with client.websocket_connect("/ws") as ws:
+        _subscribe(ws, "logs")
+        client.post("/api/logs", json={"agent_name": "push", "level": "info", "message": "llegó"})
+        message = _receive(ws, "new_log")
+        assert message["data"]["agent_name"] == "push" and message["data"]["message"] == "llegó"
+        assert isinstance(message["data"]["id"], int)
+
+
+def test_agent_changes_are_pushed(client):
+    with client.websocket_connect("/ws") as ws:
+        _subscribe(ws, "agents")
+        client.post("/api/agents", json={"name": "empujado", "status": "idle"})
+        assert _receive(ws, "agent_update")["data"]["name"] == "empujado"
+        client.post("/api/agents/empujado/heartbeat", json={"status": "online"})
+        update = _receive(ws, "agent_update")["data"]
+        assert update["name"] == "empujado" and update["is_online"] is True
+
+
+def test_system_metrics_are_pushed_from_the_sampler(client, app_main, run):
+    with client.websocket_connect("/ws") as ws:
+        _subscribe(ws, "metrics")
+        run(app_main.push_system_metrics, app_main.sampler.latest())
+        assert "cpu" in _receive(ws, "system_metrics")["data"]
+
+
+def test_disconnect_unregisters_the_client(client, app_main):
+    with client.websocket_connect("/ws") as ws:
+        _subscribe(ws, "logs")
+    # El cierre lo procesa el servidor en su propio loop
+    _eventually(lambda: app_main.manager.stats()["connections"] == 0)
+    assert "logs" not in app_main.manager.subscribers
@@ -0,0 +1,209 @@
+import asyncio
+import json
+
+import pytest
+
+import config
+from websocket_manager import ConnectionManager
+
+
+class FakeSocket:
+    def __init__(self, delay: float = 0.0, block: bool = False):
+        self.delay = delay
+        self.block = block
+        self.sent = []
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        if self.block:
+            await asyncio.Event().wait()
+        await asyncio.sleep(self.delay)
+        self.sent.append(json.loads(text))
+
+    async def close(self, code: int = 1000):
+        self.closed_with = code
+
+
+def _types(socket):
+    return [message["type"] for message in socket.sent]
+
+
+async def _settle(seconds: float = 0.05):
+    await asyncio.sleep(seconds)
+
+
+@pytest.fixture
+def small_queues(monkeypatch):
+    monkeypatch.setattr(config, "WS_QUEUE_SIZE", 4)
+    monkeypatch.setattr(config, "WS_LAGGARD_DROPS", 6)
+    monkeypatch.setattr(config, "WS_SEND_TIMEOUT", 0.1)
+
+
+def test_slow_client_does_not_delay_the_others():
+    async def scenario():
+        manager = ConnectionManager()
+        fast, slow = FakeSocket(), FakeSocket(delay=0.5)
+        await manager.connect(fast)
+        await manager.connect(slow)
+        for i in range(3):
+            await manager.broadcast({"type": "tick", "n": i})
+        await _settle()
+        return fast, slow
+
+    fast, slow = asyncio.run(scenario())
+    assert [message["n"] for message in fast.sent] == [0, 1, 2]
+    assert len(slow.sent) == 0
+
+
+def test_full_queue_drops_oldest_and_coalesces_metrics(small_queues):
+    async def scenario():
+        manager = ConnectionManager()
+        socket = FakeSocket(block=True)
+        await manager.connect(socket)
+        manager.subscribe(socket, ["metrics"])
+        for i in range(3):
+            manager.broadcast_system_metrics({"n": i})
+        client = manager.clients[socket]
+        coalesced = [json.loads(text)["data"]["n"] for _, text in client.queue]
+        for i in range(5):
+            await manager.broadcast({"type": "tick", "n": i})
+        queued = [json.loads(text) for _, text in client.queue]
+        stats = manager.stats()
+        manager.disconnect(socket)
+        return coalesced, queued, stats
+
+    coalesced, queued, stats = asyncio.run(scenario())
+    # Tres métricas sin enviar: queda una sola entrada, con la última
+    assert coalesced == [2]
+    assert [message["n"] for message in queued] == [1, 2, 3, 4]
+    assert stats["dropped"] == 2 and stats["max_queue_depth"] == 4
+
+
+def test_laggard_is_evicted_after_too_many_drops(small_queues):
+    async def scenario():
+        manager = ConnectionManager()
+        socket = FakeSocket(block=True)
+        await manager.connect(socket)
+        for i in range(20):
+            await manager.broadcast({"type": "tick", "n": i})
+        await _settle()
+        return manager, socket
+
+    manager, socket = asyncio.run(scenario())
+    assert manager.evicted == 1 and socket not in manager.clients
+    assert socket.closed_with == 1013
+
+
+def test_send_timeout_evicts_the_client(small_queues):
+    async def scenario():
+        manager = ConnectionManager()
+        socket = FakeSocket(block=True)
+        await manager.connect(socket)
+        await manager.broadcast({"type": "tick"})
+        await _settle(0.3)
+        return manager, socket
+
+    manager, socket = asyncio.run(scenario())
+    assert manager.evicted == 1 and manager.stats()["connections"] == 0
+
+
+def test_topic_validation():
+    from websocket_manager import valid_topic
+    assert all(valid_topic(topic) for topic in (
+        "metrics", "agents:backup", "logs:backup", "logs:level>=warning", "tasks:3", "runs:12"))
+    assert not any(valid_topic(topic) for topic in ("nada", "agents:", "logs:level>=ruido", 5, None))
+
+
+def test_log_topics_filter_by_agent_and_minimum_level():
+    async def scenario():
+        manager = ConnectionManager()
+        by_agent, warnings, everything = FakeSocket(), FakeSocket(), FakeSocket()
+        for socket, topics in ((by_agent, ["logs:backup"]), (warnings, ["logs:level>=warning"]),
+                               (everything, ["logs"])):
+            await manager.connect(socket)
+            assert manager.subscribe(socket, topics) == []
+        manager.broadcast_new_log({"agent_name": "backup", "level": "info", "message": "a"})
+        manager.broadcast_new_log({"agent_name": "web", "level": "error", "message": "b"})
+        manager.broadcast_new_log({"agent_name": "web", "level": "debug", "message": "c"})
+        await _settle()
+        return by_agent, warnings, everything
+
+    by_agent, warnings, everything = asyncio.run(scenario())
+    assert [m["data"]["message"] for m in by_agent.sent] == ["a"]
+    assert [m["data"]["message"] for m in warnings.sent] == ["b"]
+    assert [m["data"]["message"] for m in everything.sent] == ["a", "b", "c"]
+
+
+def test_subscription_protocol_and_malformed_frames():
+    async def scenario():
+        manager = ConnectionManager()
+        socket = FakeSocket()
+        await manager.connect(socket)
+        for frame in ('{"action": "subscribe", "topics": ["agents", "bogus"]}',
+                      '{"action": "unsubscribe", "topics": "agents"}',
+                      "no es json", '{"topics": []}', '{"action": 3}', '{"action": "subscribe", "topics": 5}',
+                      '{"action": "bailar"}'):
+            await manager.handle_message(socket, frame)
+        await _settle()
+        subscribers = dict(manager.subscribers)
+        manager.disconnect(socket)
+        return socket, subscribers, manager
+
+    socket, subscribers, manager = asyncio.run(scenario())
+    assert socket.sent[0] == {"type": "error", "error": "tópicos inválidos", "topics": ["bogus"]}
+    assert socket.sent[1] == {"type": "subscribed", "topics": ["agents"]}
+    assert socket.sent[2] == {"type": "subscribed", "topics": []}
+    assert [m["error"] for m in socket.sent[3:7]] == ["mensaje inválido"] * 4
+    assert socket.sent[7]["error"].startswith("acción desconocida")
+    assert subscribers == {} and manager.subscribers == {}
+
+
+def _proc(pid, cpu):
+    return {"pid": pid, "name": f"p{pid}", "cpu": cpu}
+
+
+def test_views_send_snapshot_then_deltas_and_resync_on_request():
+    async def scenario():
+        manager = ConnectionManager()
+        socket = FakeSocket()
+        await manager.connect(socket)
+        manager.subscribe(socket, ["processes"])
+        manager.broadcast_processes([_proc(1, 1.0), _proc(2, 2.0)])
+        manager.broadcast_processes([_proc(1, 5.0), _proc(3, 0.5)])
+        manager.broadcast_processes([_proc(1, 5.0), _proc(3, 0.5)])  # sin cambios: nada
+        await manager.handle_message(socket, '{"action": "resync", "view": "processes"}')
+        await manager.handle_message(socket, '{"action": "resync", "view": "otra"}')
+        await _settle()
+        return socket
+
+    socket = asyncio.run(scenario())
+    snapshot, delta, resync, error = socket.sent
+    assert snapshot["type"] == "view_snapshot" and snapshot["version"] == 1 and len(snapshot["rows"]) == 2
+    assert delta == {"type": "view_delta", "view": "processes", "key": "pid", "version": 2,
+                     "added": [_proc(3, 0.5)], "changed": [_proc(1, 5.0)], "removed": [2]}
+    assert resync["type"] == "view_snapshot" and resync["version"] == 2
+    assert sorted(row["pid"] for row in resync["rows"]) == [1, 3]
+    assert error == {"type": "error", "error": "vista desconocida"}
+
+
+def test_dropped_delta_falls_back_to_a_snapshot(small_queues):
+    async def scenario():
+        manager = ConnectionManager()
+        socket = FakeSocket(block=True)
+        await manager.connect(socket)
+        manager.subscribe(socket, ["processes"])
+        manager.broadcast_processes([_proc(1, 1.0)])
+        for i in range(4):
+            await manager.broadcast({"type": "tick", "n": i})  # empuja el snapshot fuera de la cola
+        manager.broadcast_processes([_proc(1, 2.0)])
+        client = manager.clients[socket]
+        last = json.loads(client.queue[-1][1])
+        manager.disconnect(socket)
+        return last
+
+    last = asyncio.run(scenario())
+    assert last["type"] == "view_snapshot" and last["version"] == 2
+
@@ -2,88 +2,397 @@
 Jazmín OS - WebSocket Manager
 ==============================
 Gestión de conexiones WebSocket para actualizaciones en tiempo real.
+
+Cada cliente tiene una cola de salida acotada y su propia tarea de envío:
+un broadcast serializa el mensaje una sola vez y lo encola en todos los
+clientes, así un cliente lento no demora al resto.
+
+Las vistas tipo tabla (p.ej. procesos) se publican como snapshots
+versionados: cada cliente recibe solo el delta (added/changed/removed)
+respecto de la última versión que se le envió, o el snapshot completo si
+no la tiene.
+
+Un cliente que detecta un salto de versión pide el snapshot con
+{"action": "resync", "view": "<vista>"}.
+
+Los clientes se suscriben a tópicos enviando
+{"action": "subscribe" | "unsubscribe", "topics": [...]}:
+
+    metrics, processes, agents, agents:<nombre>, logs, logs:<agente>,
+    logs:level>=<nivel>, tasks, tasks:<project_id>, runs, runs:<run_id>
+
+runs recibe solo los cambios de estado de las corridas; runs:<run_id>
+recibe además la salida de esa corrida a medida que se guarda.
 """
 
-from typing import List, Dict, Any
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set
 from fastapi import WebSocket
 import json
 import asyncio
 from datetime import datetime
 
+import config
+
+# Orden de severidad para los tópicos logs:level>=<nivel>
+LOG_LEVELS = [config.LogLevel.DEBUG, config.LogLevel.INFO, config.LogLevel.WARNING,
+              config.LogLevel.ERROR, config.LogLevel.CRITICAL]
+
+VIEW_TYPES = {"view_delta", "view_snapshot"}
+
+SIMPLE_TOPICS = {"metrics", "processes", "agents", "logs", "tasks", "runs"}
+PREFIX_TOPICS = ("agents:", "logs:", "tasks:", "runs:")
+
+
+def valid_topic(topic: Any) -> bool:
+    """Valida el nombre de un tópico."""
+    if not isinstance(topic, str):
+        return False
+    if topic in SIMPLE_TOPICS:
+        return True
+    if topic.startswith("logs:level>="):
+        return topic[len("logs:level>="):] in LOG_LEVELS
+    return any(topic.startswith(prefix) and len(topic) > len(prefix) for prefix in PREFIX_TOPICS)
+
+
+class ClientConnection:
+    """Cola de salida y tarea de envío de un cliente."""
+
+    def __init__(self, websocket: WebSocket, manager: "ConnectionManager"):
+        self.websocket = websocket
+        self.manager = manager
+        # Entradas [tipo, texto]; las de tipos "coalesce" se reemplazan en el lugar
+        self.queue: Deque[List[str]] = deque()
+        self._coalesce: Dict[str, List[str]] = {}
+        self._ready = asyncio.Event()
+        self.dropped = 0        # descartados desde el último envío exitoso
+        self.total_dropped = 0
+        self.sent = 0
+        self.topics: Set[str] = set()
+        self.view_versions: Dict[str, int] = {}  # versión de cada vista que ya tiene el cliente
+        self.closed = False
+        self.task = asyncio.create_task(self._sender())
+
+    def enqueue(self, msg_type: str, text: str):
+        """Encola un mensaje ya serializado aplicando la política de su tipo."""
+        if msg_type in config.WS_COALESCE_TYPES:
+            entry = self._coalesce.get(msg_type)
+            if entry is not None:
+                entry[1] = text  # todavía no salió: basta con el más reciente
+                return
+
+        if len(self.queue) >= config.WS_QUEUE_SIZE:
+            # drop-oldest
+            old = self.queue.popleft()
+            if self._coalesce.get(old[0]) is old:
+                del self._coalesce[old[0]]
+            if old[0] in VIEW_TYPES:
+                # Se perdió un delta: la próxima vez recibe el snapshot completo
+                self.view_versions.clear()
+            self.dropped += 1
+            self.total_dropped += 1
+            if self.dropped >= config.WS_LAGGARD_DROPS:
+                self.manager.evict(self.websocket, "demasiados mensajes descartados")
+                return
+
+        entry = [msg_type, text]
+        self.queue.append(entry)
+        if msg_type in config.WS_COALESCE_TYPES:
+            self._coalesce[msg_type] = entry
+        self._ready.set()
+
+    def close(self):
+        """Detiene la tarea de envío."""
+        self.closed = True
+        self._ready.set()
+        if self.task is not asyncio.current_task():
+            self.task.cancel()
+
+    async def _sender(self):
+        # `closed` además de cancel(): en 3.11 wait_for se traga la cancelación
+        # si llega justo cuando el envío termina, y la tarea quedaría colgada
+        while not self.closed:
+            await self._ready.wait()
+            while self.queue and not self.closed:
+                entry = self.queue.popleft()
+                if self._coalesce.get(entry[0]) is entry:
+                    del self._coalesce[entry[0]]
+                try:
+                    await asyncio.wait_for(self.websocket.send_text(entry[1]), config.WS_SEND_TIMEOUT)
+                except asyncio.TimeoutError:
+                    self.manager.evict(self.websocket, "timeout de envío")
+                    return
+                except Exception as e:
+                    print(f"[WS] Error enviando mensaje: {e}")
+                    self.manager.disconnect(self.websocket)
+                    return
+                self.sent += 1
+                self.dropped = 0
+            self._ready.clear()
+
 
 class ConnectionManager:
     """Gestiona conexiones WebSocket del dashboard."""
-    
+
     def __init__(self):
-        self.active_connections: List[WebSocket] = []
-        self.agent_subscribers: Dict[str, List[WebSocket]] = {}
-    
+        self.active_connections: Set[WebSocket] = set()
+        self.clients: Dict[WebSocket, ClientConnection] = {}
+        # Acciones extra del protocolo: nombre -> corutina(websocket, mensaje) que devuelve la respuesta (o None)
+        self.actions: Dict[str, Callable[[WebSocket, Dict[str, Any]], Awaitable[Optional[Dict[str, Any]]]]] = {}
+        # Índice tópico -> sockets suscriptos
+        self.subscribers: Dict[str, Set[WebSocket]] = {}
+        # Último estado publicado de cada vista (clave -> fila) y su versión
+        self.views: Dict[str, Dict[Any, Dict[str, Any]]] = {}
+        self.view_versions: Dict[str, int] = {}
+        self.view_keys: Dict[str, str] = {}
+        self.evicted = 0
+
     async def connect(self, websocket: WebSocket):
         """Acepta una nueva conexión WebSocket."""
         await websocket.accept()
-        self.active_connections.append(websocket)
+        self.active_connections.add(websocket)
+        self.clients[websocket] = ClientConnection(websocket, self)
         print(f"[WS] Nueva conexión. Total: {len(self.active_connections)}")
-    
+
     def disconnect(self, websocket: WebSocket):
         """Desconecta un WebSocket."""
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
+        self.active_connections.discard(websocket)
+        client = self.clients.pop(websocket, None)
+        if client is None:
+            return
+        self._unsubscribe(websocket, client, set(client.topics))
+        client.close()
         print(f"[WS] Conexión cerrada. Total: {len(self.active_connections)}")
-    
+
+    def evict(self, websocket: WebSocket, reason: str):
+        """Desconecta a un cliente rezagado y cierra su socket."""
+        if websocket not in self.clients:
+            return
+        print(f"[WS] Expulsando cliente: {reason}")
+        self.evicted += 1
+        self.disconnect(websocket)
+        asyncio.create_task(self._close(websocket))
+
+    async def _close(self, websocket: WebSocket):
+        try:
+            await asyncio.wait_for(websocket.close(code=1013), config.WS_SEND_TIMEOUT)
+        except Exception:
+            pass
+
+    def subscribe(self, websocket: WebSocket, topics: List[str]) -> List[str]:
+        """Suscribe un cliente a tópicos. Devuelve los tópicos inválidos."""
+        client = self.clients.get(websocket)
+        invalid = [topic for topic in topics if not valid_topic(topic)]
+        if client is not None:
+            for topic in topics:
+                if topic not in invalid:
+                    client.topics.add(topic)
+                    self.subscribers.setdefault(topic, set()).add(websocket)
+        return invalid
+
+    def unsubscribe(self, websocket: WebSocket, topics: List[str]):
+        """Quita suscripciones de un cliente."""
+        client = self.clients.get(websocket)
+        if client is not None:
+            self._unsubscribe(websocket, client, set(topics) & client.topics)
+
+    def _unsubscribe(self, websocket: WebSocket, client: ClientConnection, topics: Set[str]):
+        for topic in topics:
+            client.topics.discard(topic)
+            subscribers = self.subscribers.get(topic)
+            if subscribers is not None:
+                subscribers.discard(websocket)
+                if not subscribers:
+                    del self.subscribers[topic]
+
+    async def handle_message(self, websocket: WebSocket, text: str):
+        """Procesa un mensaje del cliente (protocolo de suscripción y acciones registradas)."""
+        try:
+            message = json.loads(text)
+            action = message["action"]
+            topics = message.get("topics", [])
+            if isinstance(topics, str):
+                topics = [topics]
+            if not isinstance(action, str) or not isinstance(topics, list):
+                raise TypeError
+        except (ValueError, KeyError, TypeError, AttributeError):
+            await self.send_personal_message({"type": "error", "error": "mensaje inválido"}, websocket)
+            return
+
+        if action == "subscribe":
+            invalid = self.subscribe(websocket, topics)
+            if invalid:
+                await self.send_personal_message({"type": "error", "error": "tópicos inválidos",
+                                                  "topics": invalid}, websocket)
+        elif action == "resync":
+            if not self.resync_view(websocket, message.get("view")):
+                await self.send_personal_message({"type": "error", "error": "vista desconocida"}, websocket)
+            return
+        elif action == "unsubscribe":
+            self.unsubscribe(websocket, [topic for topic in topics if isinstance(topic, str)])
+        elif action in self.actions:
+            reply = await self.actions[action](websocket, message)
+            if reply is not None:
+                await self.send_personal_message(reply, websocket)
+            return
+        else:
+            await self.send_personal_message({"type": "error", "error": f"acción desconocida: {action}"},
+                                             websocket)
+            return
+        client = self.clients.get(websocket)
+        await self.send_personal_message({"type": "subscribed",
+                                          "topics": sorted(client.topics) if client else []}, websocket)
+
+    def _targets(self, *topics: str) -> Set[WebSocket]:
+        targets: Set[WebSocket] = set()
+        for topic in topics:
+            targets |= self.subscribers.get(topic, set())
+        return targets
+
     async def send_personal_message(self, message: Dict[str, Any], websocket: WebSocket):
         """Envía un mensaje a un cliente específico."""
-        await websocket.send_json(message)
-    
+        client = self.clients.get(websocket)
+        if client is not None:
+            client.enqueue(message.get("type", ""), json.dumps(message, default=str))
+
+    def publish(self, message: Dict[str, Any], targets: Optional[Set[WebSocket]] = None):
+        """Serializa una vez y encola en cada cliente (sin esperar a los envíos)."""
+        clients = self.clients if targets is None else targets
+        if not clients:
+            return
+        text = json.dumps(message, default=str)
+        msg_type = message.get("type", "")
+        for websocket in list(clients):
+            client = self.clients.get(websocket)
+            if client is not None:
+                client.enqueue(msg_type, text)
+
+    def publish_view(self, view: str, rows: List[Dict[str, Any]], key: str, topic: Optional[str] = None):
+        """Publica el estado completo de una vista; a cada cliente le llega solo lo que le falta."""
+        old_state = self.views.get(view)
+        new_state = {row[key]: row for row in rows}
+        version = self.view_versions.get(view, 0)
+        delta = None
+        if old_state is None:
+            version += 1
+        else:
+            added = [row for k, row in new_state.items() if k not in old_state]
+            changed = [row for k, row in new_state.items() if k in old_state and old_state[k] != row]
+            removed = [k for k in old_state if k not in new_state]
+            if added or changed or removed:
+                version += 1
+                delta = {"added": added, "changed": changed, "removed": removed}
+        self.views[view] = new_state
+        self.view_versions[view] = version
+        self.view_keys[view] = key
+
+        delta_text = snapshot_text = None
+        for websocket in self._targets(topic or view):
+            client = self.clients.get(websocket)
+            if client is None:
+                continue
+            seen = client.view_versions.get(view)
+            if seen == version:
+                continue
+            if delta is not None and seen == version - 1:
+                if delta_text is None:
+                    delta_text = json.dumps({"type": "view_delta", "view": view, "key": key,
+                                             "version": version, **delta}, default=str)
+                client.enqueue("view_delta", delta_text)
+            else:
+                if snapshot_text is None:
+                    snapshot_text = json.dumps({"type": "view_snapshot", "view": view, "key": key,
+                                                "version": version, "rows": rows}, default=str)
+                client.enqueue("view_snapshot", snapshot_text)
+            client.view_versions[view] = version
+
+    def resync_view(self, websocket: WebSocket, view: Any) -> bool:
+        """Encola el snapshot actual de una vista para un cliente. False si la vista no existe."""
+        if not isinstance(view, str) or view not in self.views:
+            return False
+        client = self.clients.get(websocket)
+        if client is not None:
+            version = self.view_versions[view]
+            client.enqueue("view_snapshot", json.dumps({
+                "type": "view_snapshot", "view": view, "key": self.view_keys[view],
+                "version": version, "rows": list(self.views[view].values())}, default=str))
+            client.view_versions[view] = version
+        return True
+
     async def broadcast(self, message: Dict[str, Any]):
         """Broadcast a todos los clientes conectados."""
-        disconnected = []
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except Exception as e:
-                print(f"[WS] Error enviando mensaje: {e}")
-                disconnected.append(connection)
-        
-        # Limpiar conexiones rotas
-        for conn in disconnected:
-            self.disconnect(conn)
-    
+        self.publish(message)
+
+    def stats(self) -> Dict[str, Any]:
+        """Conexiones, profundidad de colas y descartes."""
+        depths = [len(client.queue) for client in self.clients.values()]
+        return {
+            "connections": len(self.active_connections),
+            "queued_messages": sum(depths),
+            "max_queue_depth": max(depths, default=0),
+            "dropped": sum(client.total_dropped for client in self.clients.values()),
+            "evicted": self.evicted,
+            "topics": {topic: len(subscribers) for topic, subscribers in self.subscribers.items()},
+        }
+
     def broadcast_agent_update(self, data: Dict[str, Any]):
-        """Envía actualización de agente (versión sync que programa async)."""
+        """Envía actualización de agente (tópicos agents y agents:<nombre>)."""
         message = {
             "type": "agent_update",
             "timestamp": datetime.utcnow().isoformat(),
             "data": data,
         }
-        # Programar broadcast async
-        asyncio.create_task(self.broadcast(message))
-    
+        self.publish(message, self._targets("agents", f"agents:{data.get('name')}"))
+
     def broadcast_system_metrics(self, data: Dict[str, Any]):
-        """Envía actualización de métricas del sistema."""
+        """Envía actualización de métricas del sistema (tópico metrics)."""
         message = {
             "type": "system_metrics",
             "timestamp": datetime.utcnow().isoformat(),
             "data": data,
         }
-        asyncio.create_task(self.broadcast(message))
-    
+        self.publish(message, self._targets("metrics"))
+
     def broadcast_new_log(self, log_data: Dict[str, Any]):
-        """Envía notificación de nuevo log."""
+        """Envía notificación de nuevo log (logs, logs:<agente>, logs:level>=<nivel>)."""
         message = {
             "type": "new_log",
             "timestamp": datetime.utcnow().isoformat(),
             "data": log_data,
         }
-        asyncio.create_task(self.broadcast(message))
-    
+        topics = ["logs", f"logs:{log_data.get('agent_name')}"]
+        level = (log_data.get("level") or "").lower()
+        if level in LOG_LEVELS:
+            topics += [f"logs:level>={lower}" for lower in LOG_LEVELS[:LOG_LEVELS.index(level) + 1]]
+        self.publish(message, self._targets(*topics))
+
+    def broadcast_processes(self, processes: List[Dict[str, Any]]):
+        """Envía el top de procesos como delta por pid (tópico processes)."""
+        self.publish_view("processes", processes, key="pid")
+
     def broadcast_task_update(self, task_data: Dict[str, Any]):
-        """Envía actualización de tarea."""
+        """Envía actualización de tarea (tópicos tasks y tasks:<project_id>)."""
         message = {
             "type": "task_update",
             "timestamp": datetime.utcnow().isoformat(),
             "data": task_data,
         }
-        asyncio.create_task(self.broadcast(message))
+        self.publish(message, self._targets("tasks", f"tasks:{task_data.get('project_id')}"))
+
+    def broadcast_run_output(self, run_id: int, offset: int, data: str):
+        """Envía un tramo de salida de una corrida en curso (tópico runs:<run_id>)."""
+        targets = self._targets(f"runs:{run_id}")
+        if targets:
+            self.publish({"type": "run_output", "run_id": run_id, "offset": offset, "data": data}, targets)
+
+    def broadcast_run_status(self, run_data: Dict[str, Any]):
+        """Envía el cambio de estado de una corrida (tópicos runs y runs:<run_id>)."""
+        message = {
+            "type": "run_status",
+            "timestamp": datetime.utcnow().isoformat(),
+            "data": run_data,
+        }
+        self.publish(message, self._targets("runs", f"runs:{run_data.get('id')}"))
 
 
 # Instancia global del manager